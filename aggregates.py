@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS仪表板汇总
+安全等级、生命周期阶段、威胁阶段等统计由写接口增量维护，
+仪表板只需读取一张小表；一致性检查可从明细表重新计算并报告偏差。
+"""
+
+from app import db, DataObject, ThreatDatabase, SecurityRule, DashboardAggregate
+
+LEVEL = 'security_level'
+STAGE = 'lifecycle_stage'
+THREAT_STAGE = 'threat_stage'
+ACTIVE_RULES = 'active_rules'
+META = 'meta'
+
+# 标记汇总表已完整构建，缺失时首次读取会自动重建
+BUILT_KEY = 'built'
+
+def adjust(category, key, count=0, value_sum=0.0):
+    """在当前事务中累加一项汇总值（由调用方提交）"""
+    if not count and not value_sum:
+        return
+    updated = DashboardAggregate.query.filter_by(category=category, key=key).update({
+        DashboardAggregate.count: DashboardAggregate.count + count,
+        DashboardAggregate.value_sum: DashboardAggregate.value_sum + value_sum
+    }, synchronize_session=False)
+    if not updated:
+        db.session.add(DashboardAggregate(category=category, key=key, count=count, value_sum=value_sum))
+        db.session.flush()
+
+def adjust_many(deltas):
+    """在当前事务中批量累加汇总值，deltas 为 {(category, key): count} 或 {(category, key): (count, value_sum)}
+
+    读取一次现有键，已有的行以一次 executemany 更新，缺失的行批量插入，语句数与键的数量无关。
+    """
+    deltas = {
+        key: value if isinstance(value, tuple) else (value, 0.0)
+        for key, value in deltas.items()
+    }
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+    if not deltas:
+        return
+    table = DashboardAggregate.__table__
+    existing = set(db.session.query(DashboardAggregate.category, DashboardAggregate.key).filter(
+        DashboardAggregate.category.in_({category for category, _ in deltas})
+    ).all())
+    
+    updates = [
+        {'b_category': category, 'b_key': key, 'b_count': count, 'b_value_sum': value_sum}
+        for (category, key), (count, value_sum) in deltas.items() if (category, key) in existing
+    ]
+    if updates:
+        db.session.execute(table.update().where(
+            table.c.category == db.bindparam('b_category'), table.c.key == db.bindparam('b_key')
+        ).values(
+            count=table.c.count + db.bindparam('b_count'), value_sum=table.c.value_sum + db.bindparam('b_value_sum')
+        ), updates)
+    inserts = [
+        {'category': category, 'key': key, 'count': count, 'value_sum': value_sum}
+        for (category, key), (count, value_sum) in deltas.items() if (category, key) not in existing
+    ]
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+
+def record_data_object(level, stage, sign=1):
+    """新增（sign=1）或删除（sign=-1）一个数据对象"""
+    adjust(LEVEL, level, sign)
+    adjust(STAGE, stage, sign)
+
+def move_data_object(old_level, old_stage, new_level, new_stage):
+    """数据对象等级或阶段发生变化"""
+    if old_level != new_level:
+        adjust(LEVEL, old_level, -1)
+        adjust(LEVEL, new_level, 1)
+    if old_stage != new_stage:
+        adjust(STAGE, old_stage, -1)
+        adjust(STAGE, new_stage, 1)
+
+def record_level_transitions(transitions):
+    """批量记录等级变化，transitions 为 {(旧等级, 新等级): 数量}"""
+    deltas = {}
+    for (old_level, new_level), count in transitions.items():
+        deltas[(LEVEL, old_level)] = deltas.get((LEVEL, old_level), 0) - count
+        deltas[(LEVEL, new_level)] = deltas.get((LEVEL, new_level), 0) + count
+    adjust_many(deltas)
+
+def record_threat(stage, risk_level, sign=1):
+    """新增或删除一条威胁"""
+    adjust(THREAT_STAGE, stage, sign, sign * (risk_level or 0.0))
+
+def record_rule(is_active, sign=1):
+    """新增或删除一条规则，仅统计启用规则"""
+    if is_active:
+        adjust(ACTIVE_RULES, ACTIVE_RULES, sign)
+
+def compute_aggregates():
+    """从明细表重新计算全部汇总值，返回 {(category, key): (count, value_sum)}"""
+    aggregates = {}
+    for level, count in db.session.query(
+        DataObject.security_level, db.func.count(DataObject.id)
+    ).group_by(DataObject.security_level):
+        aggregates[(LEVEL, level)] = (count, 0.0)
+    for stage, count in db.session.query(
+        DataObject.lifecycle_stage, db.func.count(DataObject.id)
+    ).group_by(DataObject.lifecycle_stage):
+        aggregates[(STAGE, stage)] = (count, 0.0)
+    for stage, count, risk_sum in db.session.query(
+        ThreatDatabase.stage, db.func.count(ThreatDatabase.id), db.func.sum(ThreatDatabase.risk_level)
+    ).group_by(ThreatDatabase.stage):
+        aggregates[(THREAT_STAGE, stage)] = (count, float(risk_sum or 0.0))
+    aggregates[(ACTIVE_RULES, ACTIVE_RULES)] = (SecurityRule.query.filter_by(is_active=True).count(), 0.0)
+    return aggregates
+
+def rebuild_aggregates():
+    """清空并重建汇总表"""
+    aggregates = compute_aggregates()
+    DashboardAggregate.query.delete(synchronize_session=False)
+    db.session.add_all([
+        DashboardAggregate(category=category, key=key, count=count, value_sum=value_sum)
+        for (category, key), (count, value_sum) in aggregates.items()
+    ])
+    db.session.add(DashboardAggregate(category=META, key=BUILT_KEY, count=1))
+    db.session.commit()
+
+def load_aggregates():
+    """读取汇总表，返回 {(category, key): (count, value_sum)}"""
+    rows = db.session.query(
+        DashboardAggregate.category, DashboardAggregate.key, DashboardAggregate.count, DashboardAggregate.value_sum
+    ).all()
+    if not any(row[0] == META and row[1] == BUILT_KEY for row in rows):
+        rebuild_aggregates()
+        return load_aggregates()
+    return {(category, key): (count, value_sum) for category, key, count, value_sum in rows}
+
+def check_aggregates(tolerance=1e-6):
+    """比较汇总表与明细表，返回偏差列表 [(category, key, 存储值, 实际值)]"""
+    stored = {
+        key: value for key, value in load_aggregates().items() if key[0] != META
+    }
+    actual = compute_aggregates()
+    drift = []
+    for key in sorted(set(stored) | set(actual), key=lambda item: (item[0], str(item[1]))):
+        stored_count, stored_sum = stored.get(key, (0, 0.0))
+        actual_count, actual_sum = actual.get(key, (0, 0.0))
+        if stored_count != actual_count or abs(stored_sum - actual_sum) > tolerance:
+            drift.append((key[0], key[1], (stored_count, stored_sum), (actual_count, actual_sum)))
+    return drift
+
+def dashboard_summary():
+    """仪表板统计部分"""
+    aggregates = load_aggregates()
+    
+    def distribution(category):
+        return sorted(
+            [(key, count, value_sum) for (cat, key), (count, value_sum) in aggregates.items() if cat == category and count > 0],
+            key=lambda item: str(item[0])
+        )
+    
+    levels = distribution(LEVEL)
+    threats = distribution(THREAT_STAGE)
+    return {
+        'security_level_distribution': [{'level': key, 'count': count} for key, count, _ in levels],
+        'lifecycle_stage_distribution': [{'stage': key, 'count': count} for key, count, _ in distribution(STAGE)],
+        'threat_statistics': [{'stage': key, 'count': count, 'avg_risk': value_sum / count} for key, count, value_sum in threats],
+        'total_data_objects': sum(count for _, count, _ in levels),
+        'total_threats': sum(count for _, count, _ in threats),
+        'total_rules': aggregates.get((ACTIVE_RULES, ACTIVE_RULES), (0, 0.0))[0]
+    }
@@ -1,36 +1,371 @@
-from flask import request, jsonify
-from app import app, db, DataObject, ThreatDatabase, WeightConfig, SecurityRule, SecurityEvent
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context
+from app import db, DataObject, ThreatDatabase, WeightConfig, SecurityRule, SecurityEvent, Tombstone
 from app import SecurityQuantificationEngine, DynamicClassificationEngine, SecurityRuleEngine
+from app import weight_cache, rule_cache, bump_version, read_version, read_versions, tombstone_horizon
+from app import DATA_OBJECTS_VERSION, THREATS_VERSION, EVENTS_VERSION
+from jobs import job_registry, start_rescore_job, start_reclassify_job
+import aggregates
+from ingest import ingest_data_objects, parse_ndjson
+from event_sink import event_sink
+from broadcaster import broadcaster
+from event_store import query_events, naive_utc
+from metrics import metrics
+from diagnostics import diagnostics
 from datetime import datetime
-import uuid
+import base64
+import csv
+import functools
+import hashlib
+import io
+import json
+
+api = Blueprint('api', __name__)
+
+# 列表接口单页最大条数
+MAX_PAGE_LIMIT = 5000
+
+# 增量同步单页默认条数
+SYNC_PAGE_LIMIT = 1000
+
+# 导出接口每批从数据库读取的行数
+EXPORT_CHUNK_SIZE = 1000
+
+# /metrics 附带的安全事件队列与实时推送统计：(来源, 统计项, 指标名, 类型, 说明)，累计值为 counter，瞬时值为 gauge
+RUNTIME_METRICS = (
+    ('event_sink', 'enqueued', 'dsqds_event_sink_enqueued_total', 'counter', '放入写入队列的安全事件数'),
+    ('event_sink', 'written', 'dsqds_event_sink_written_total', 'counter', '已写入的安全事件数'),
+    ('event_sink', 'failed', 'dsqds_event_sink_failed_total', 'counter', '写入失败的安全事件数'),
+    ('event_sink', 'flushes', 'dsqds_event_sink_flushes_total', 'counter', '批量写入次数'),
+    ('event_sink', 'backpressure_waits', 'dsqds_event_sink_backpressure_waits_total', 'counter', '队列满时生产者等待次数'),
+    ('event_sink', 'sync_fallbacks', 'dsqds_event_sink_sync_fallbacks_total', 'counter', '等待超时后同步写入的次数'),
+    ('event_sink', 'total_flush_ms', 'dsqds_event_sink_flush_milliseconds_total', 'counter', '批量写入累计耗时（毫秒）'),
+    ('event_sink', 'last_flush_ms', 'dsqds_event_sink_last_flush_ms', 'gauge', '最近一次批量写入耗时（毫秒）'),
+    ('event_sink', 'max_flush_ms', 'dsqds_event_sink_max_flush_ms', 'gauge', '批量写入最长耗时（毫秒）'),
+    ('event_sink', 'queue_depth', 'dsqds_event_sink_queue_depth', 'gauge', '写入队列中的事件数'),
+    ('event_sink', 'queue_capacity', 'dsqds_event_sink_queue_capacity', 'gauge', '写入队列容量'),
+    ('event_sink', 'running', 'dsqds_event_sink_running', 'gauge', '写线程是否在运行'),
+    ('stream', 'published', 'dsqds_stream_published_total', 'counter', '推送的消息数'),
+    ('stream', 'polls', 'dsqds_stream_polls_total', 'counter', '轮询次数'),
+    ('stream', 'connections', 'dsqds_stream_connections_total', 'counter', '建立的推送连接数'),
+    ('stream', 'rejected', 'dsqds_stream_rejected_total', 'counter', '连接数已满时要求稍后重连的次数'),
+    ('stream', 'clients', 'dsqds_stream_clients', 'gauge', '当前推送连接数'),
+    ('stream', 'buffered', 'dsqds_stream_buffered', 'gauge', '缓冲区中的消息数'),
+)
+
+class ListQueryError(ValueError):
+    """列表查询参数错误"""
+
+def _encode_cursor(last_id):
+    """将最后一行的主键编码为不透明游标"""
+    raw = json.dumps({'id': last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """解析游标，返回主键"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        return int(json.loads(raw)['id'])
+    except Exception:
+        raise ListQueryError('无效的游标')
+
+def _encode_keyset_cursor(last_key, last_id):
+    """按 (排序列, 主键) 分页的游标：最后一行的排序列值（可为空）与主键"""
+    raw = json.dumps({'key': _json_value(last_key), 'id': last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_keyset_cursor(cursor, order_column):
+    """解析 (排序列, 主键) 游标，时间列的值还原为 datetime"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        key = raw['key']
+        if key is not None and isinstance(order_column.type, db.DateTime):
+            key = datetime.fromisoformat(key)
+        return key, int(raw['id'])
+    except Exception:
+        raise ListQueryError('无效的游标')
+
+def _encode_sync_cursor(version, last_id=None):
+    """增量同步游标：已同步到的 (版本号, 主键)，主键为空表示该版本已全部同步"""
+    raw = json.dumps({'v': version, 'id': last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_sync_cursor(cursor):
+    """解析增量同步游标，空游标表示全量同步"""
+    if not cursor:
+        return -1, None
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return int(raw['v']), None if raw.get('id') is None else int(raw['id'])
+    except Exception:
+        raise ListQueryError('无效的同步游标')
+
+def _parse_fields(model):
+    """解析 fields= 投影参数，默认返回全部列"""
+    columns = [column.name for column in model.__table__.columns]
+    fields = request.args.get('fields')
+    if not fields:
+        return columns
+    
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in columns]
+    if unknown:
+        raise ListQueryError(f"未知字段: {', '.join(unknown)}")
+    return requested
+
+def _parse_limit(default=None):
+    """解析 limit 参数，限制在 [1, MAX_PAGE_LIMIT]"""
+    limit = request.args.get('limit', default)
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ListQueryError('limit 必须为整数')
+    return min(max(limit, 1), MAX_PAGE_LIMIT)
+
+def _json_value(value):
+    """列值转换为 JSON 可序列化的值"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _select_columns(model, fields):
+    """列表与导出查询的列表达式
+
+    SQLite 中时间以文本保存，直接在 SQL 中转换为 ISO 8601 文本，省去逐值解析为 datetime 再格式化；
+    其他数据库返回 datetime，由 JSON 编码器输出为 ISO 8601。
+    """
+    columns = []
+    sqlite = db.engine.dialect.name == 'sqlite'
+    for field in fields:
+        column = getattr(model, field)
+        if sqlite and isinstance(column.type, db.DateTime):
+            column = db.func.replace(db.type_coerce(column, db.String), ' ', 'T').label(field)
+        columns.append(column)
+    return columns
+
+def list_response(model, filters=(), descending=False, default_limit=None, order_column=None):
+    """按主键（或 (order_column, 主键)）游标分页并按需投影列的通用列表响应
+
+    使用 Core 列元组查询，不构造 ORM 实例；返回 JSON 数组，还有下一页时通过 X-Next-Cursor 响应头给出游标。
+    order_column 为空值的行排在最后，主键用于区分该列取值相同的行。
+    """
+    try:
+        fields = _parse_fields(model)
+        limit = _parse_limit(default_limit)
+        cursor = request.args.get('cursor')
+        if order_column is None:
+            last_key, last_id = None, _decode_cursor(cursor) if cursor else None
+        else:
+            last_key, last_id = _decode_keyset_cursor(cursor, order_column) if cursor else (None, None)
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # 排序列与主键放在最后，zip(fields, row) 时自动忽略
+    keys = [model.id] if order_column is None else [order_column, model.id]
+    statement = db.select(*_select_columns(model, fields), *keys)
+    for condition in filters:
+        statement = statement.where(condition)
+    if last_id is not None:
+        after = model.id < last_id if descending else model.id > last_id
+        if order_column is not None:
+            if last_key is None:
+                after = db.and_(order_column.is_(None), after)
+            else:
+                beyond = order_column < last_key if descending else order_column > last_key
+                after = db.or_(beyond, db.and_(order_column == last_key, after), order_column.is_(None))
+        statement = statement.where(after)
+    if order_column is None:
+        statement = statement.order_by(model.id.desc() if descending else model.id)
+    else:
+        statement = statement.order_by(
+            (order_column.desc() if descending else order_column.asc()).nulls_last(),
+            model.id.desc() if descending else model.id
+        )
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    
+    rows = db.session.connection().execute(statement).all()  # Core 执行，跳过 ORM 结果处理
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        if order_column is None:
+            next_cursor = _encode_cursor(rows[-1][-1])
+        else:
+            next_cursor = _encode_keyset_cursor(rows[-1][-2], rows[-1][-1])
+    
+    response = jsonify([dict(zip(fields, row)) for row in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def sync_response(model, version_column, current_version, tombstone_table=None):
+    """?since=<游标> 增量同步：返回游标之后变更的行、删除的主键与新游标
+
+    行按 (版本号, 主键) 排序分页。先读取当前版本号作为本次同步的上界：版本号随写事务递增且在提交前持有锁，
+    上界以内的写入均已提交，客户端保存新游标后不会漏掉任何变更。since 为空时为全量同步。
+    墓碑超出保留期后被清理，游标早于清理水位时返回 410 与 resync 标记，客户端需清空本地数据后全量同步。
+    """
+    try:
+        fields = _parse_fields(model)
+        limit = _parse_limit(SYNC_PAGE_LIMIT)
+        since_version, since_id = _decode_sync_cursor(request.args.get('since'))
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if tombstone_table and 0 <= since_version < tombstone_horizon(tombstone_table):
+        return jsonify({'error': '同步游标早于删除记录保留期，请清空本地数据后全量同步（since 为空）', 'resync': True}), 410
+    
+    upper = current_version()
+    after = version_column > since_version
+    if since_id is not None:
+        after = db.or_(after, db.and_(version_column == since_version, model.id > since_id))
+    # 版本号与主键放在最后两列，zip(fields, row) 时自动忽略
+    statement = db.select(*_select_columns(model, fields), version_column, model.id).where(
+        after, version_column <= upper
+    ).order_by(version_column, model.id).limit(limit + 1)
+    rows = db.session.connection().execute(statement).all()
+    
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+        cursor_version, cursor_id = rows[-1][-2], rows[-1][-1]
+    else:
+        cursor_version, cursor_id = max(upper, since_version), None
+    
+    deleted = []
+    if tombstone_table and since_version >= 0:
+        deleted = db.session.connection().execute(
+            db.select(Tombstone.record_id).where(
+                Tombstone.table_name == tombstone_table,
+                Tombstone.row_version > since_version,
+                Tombstone.row_version <= cursor_version
+            ).order_by(Tombstone.row_version)
+        ).scalars().all()
+    
+    return jsonify({
+        'changes': [dict(zip(fields, row)) for row in rows],
+        'deleted': deleted,
+        'cursor': _encode_sync_cursor(cursor_version, cursor_id),
+        'has_more': has_more
+    })
+
+def _parse_time(name):
+    """解析 ISO 8601 时间参数，带时区的转换为 UTC 无时区时间（与库中时间一致）"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ListQueryError(f'{name} 必须为 ISO 8601 时间')
+
+def _parse_since():
+    """解析 since 参数（ISO 8601 时间）"""
+    return _parse_time('since')
+
+def _etag(names):
+    """由所依赖表的版本计数器与请求路径、规范化的查询参数生成 ETag
+
+    limit、fields、cursor 等参数不同的响应内容不同，各自使用独立的校验值。
+    """
+    raw = ';'.join(
+        f"{name}:{version}:{updated_at.isoformat() if updated_at else ''}"
+        for name, (version, updated_at) in sorted(read_versions(names).items())
+    )
+    raw += '|' + request.path + '?' + '&'.join(
+        f'{key}={value}' for key, value in sorted(request.args.items(multi=True))
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+def conditional_get(*names):
+    """GET 响应附带由 names 版本计数器生成的 ETag，If-None-Match 命中时直接返回 304
+
+    ETag 在查询数据之前计算：期间若有写入，响应内容只会比 ETag 更新，下次请求必然重新获取。
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            
+            etag = _etag(names)
+            if etag in request.if_none_match:
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'  # 浏览器缓存须每次校验
+            return response
+        return wrapper
+    return decorator
+
+def export_response(model, time_column, basename):
+    """流式导出整表，支持 format=ndjson|csv、fields= 与 since= 增量过滤
+
+    按主键顺序分批读取（yield_per），内存占用与表大小无关。
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format 仅支持 ndjson 或 csv'}), 400
+    try:
+        fields = _parse_fields(model)
+        since = _parse_since()
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    statement = db.select(*_select_columns(model, fields))
+    if since is not None:
+        statement = statement.where(time_column >= since)
+    statement = statement.order_by(model.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    
+    def generate_ndjson():
+        for partition in db.session.connection().execute(statement).partitions():
+            yield b''.join(current_app.json.dumps_bytes(dict(zip(fields, row)), sort_keys=False) + b'\n' for row in partition)
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for partition in db.session.connection().execute(statement).partitions():
+            writer.writerows([_json_value(value) for value in row] for row in partition)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():  # 空表时仍输出表头
+            yield buffer.getvalue()
+    
+    if export_format == 'csv':
+        generator, mimetype = generate_csv(), 'text/csv'
+    else:
+        generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    response = Response(stream_with_context(generator), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={basename}.{export_format}'
+    return response
 
 # API路由定义
 
-@app.route('/')
+@api.route('/')
 def index():
     """主页"""
-    return app.send_static_file('index.html')
+    return current_app.send_static_file('index.html')
 
-@app.route('/api/data-objects', methods=['GET', 'POST'])
+@api.route('/api/data-objects', methods=['GET', 'POST'])
+@conditional_get(DATA_OBJECTS_VERSION)
 def handle_data_objects():
     """数据对象管理"""
     if request.method == 'GET':
-        objects = DataObject.query.all()
-        return jsonify([{
-            'id': obj.id,
-            'name': obj.name,
-            'data_type': obj.data_type,
-            'spatial_scale': obj.spatial_scale,
-            'position_accuracy': obj.position_accuracy,
-            'content_sensitivity': obj.content_sensitivity,
-            'data_flow': obj.data_flow,
-            'historical_risk': obj.historical_risk,
-            'lifecycle_stage': obj.lifecycle_stage,
-            'security_score': obj.security_score,
-            'security_level': obj.security_level,
-            'created_at': obj.created_at.isoformat(),
-            'updated_at': obj.updated_at.isoformat()
-        } for obj in objects])
+        if 'since' in request.args:
+            return sync_response(
+                DataObject, DataObject.row_version,
+                lambda: read_version(DATA_OBJECTS_VERSION),
+                tombstone_table=DataObject.__tablename__
+            )
+        return list_response(DataObject)
     
     elif request.method == 'POST':
         data = request.json
@@ -48,45 +383,63 @@ def handle_data_objects():
         )
         
         # 计算安全分值和等级
-        obj.security_score = SecurityQuantificationEngine.calculate_security_score(
+        obj.security_score = obj.base_score = SecurityQuantificationEngine.calculate_security_score(
             obj.spatial_scale, obj.position_accuracy, obj.content_sensitivity,
             obj.data_flow, obj.historical_risk
         )
         obj.security_level = SecurityQuantificationEngine.determine_security_level(obj.security_score)
         
         db.session.add(obj)
+        aggregates.record_data_object(obj.security_level, obj.lifecycle_stage)
+        obj.row_version = bump_version(DATA_OBJECTS_VERSION)
         db.session.commit()
         
         # 执行安全规则
         actions = SecurityRuleEngine.execute_rules(obj)
         
-        # 记录安全事件
+        # 记录安全事件（异步组提交）
         if actions:
-            event = SecurityEvent(
-                event_id=str(uuid.uuid4()),
-                data_object_id=obj.id,
-                trigger_condition=f"新建数据对象: {obj.name}",
-                executed_strategy=str(actions),
-                result="规则执行成功"
-            )
-            db.session.add(event)
-            db.session.commit()
+            event_sink.enqueue(obj.id, f"新建数据对象: {obj.name}", str(actions), "规则执行成功")
         
         return jsonify({
             'message': '数据对象创建成功',
             'id': obj.id,
             'security_score': obj.security_score,
             'security_level': obj.security_level,
+            'weight_version': weight_cache.version,
             'executed_actions': actions
         })
 
-@app.route('/api/data-objects/<int:obj_id>', methods=['PUT', 'DELETE'])
+@api.route('/api/data-objects/bulk', methods=['POST'])
+def bulk_create_data_objects():
+    """批量创建数据对象（JSON数组或NDJSON）"""
+    if 'ndjson' in (request.content_type or ''):
+        items = parse_ndjson(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        items = data.get('data_objects') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({'error': '请求体应为JSON数组或NDJSON'}), 400
+    
+    results = ingest_data_objects(items)
+    created = sum(1 for result in results if 'id' in result)
+    
+    return jsonify({
+        'message': f'批量创建完成，成功 {created} 个，失败 {len(results) - created} 个',
+        'created': created,
+        'failed': len(results) - created,
+        'weight_version': weight_cache.version,
+        'results': results
+    })
+
+@api.route('/api/data-objects/<int:obj_id>', methods=['PUT', 'DELETE'])
 def handle_data_object(obj_id):
     """单个数据对象操作"""
     obj = DataObject.query.get_or_404(obj_id)
     
     if request.method == 'PUT':
         data = request.json
+        old_level, old_stage = obj.security_level, obj.lifecycle_stage
         
         # 更新属性
         obj.name = data.get('name', obj.name)
@@ -101,69 +454,63 @@ def handle_data_object(obj_id):
         
         # 重新计算安全分值
         old_score = obj.security_score
-        obj.security_score = SecurityQuantificationEngine.calculate_security_score(
+        obj.security_score = obj.base_score = SecurityQuantificationEngine.calculate_security_score(
             obj.spatial_scale, obj.position_accuracy, obj.content_sensitivity,
             obj.data_flow, obj.historical_risk
         )
         
-        # 动态分级调整
+        # 动态分级调整（仅在提供外部威胁时，另叠加与全量动态分级相同的阶段威胁与阶段系数）
         external_threats = request.json.get('external_threats', [])
         if external_threats:
             obj.security_score = DynamicClassificationEngine.adjust_classification(obj, external_threats)
         
         obj.security_level = SecurityQuantificationEngine.determine_security_level(obj.security_score)
         
+        aggregates.move_data_object(old_level, old_stage, obj.security_level, obj.lifecycle_stage)
+        obj.row_version = bump_version(DATA_OBJECTS_VERSION)
         db.session.commit()
         
         # 如果分级发生变化，执行相应规则
         actions = []
         if abs(old_score - obj.security_score) > 0.1:  # 分值变化超过0.1
-            actions = SecurityRuleEngine.execute_rules(obj)
+            actions = SecurityRuleEngine.execute_rules(obj, {'external_threats': external_threats})
             
-            # 记录分级变更事件
-            event = SecurityEvent(
-                event_id=str(uuid.uuid4()),
-                data_object_id=obj.id,
-                trigger_condition=f"分级调整: {old_score:.2f} → {obj.security_score:.2f}",
-                executed_strategy=str(actions),
-                result="动态分级成功"
+            # 记录分级变更事件（异步组提交）
+            event_sink.enqueue(
+                obj.id,
+                f"分级调整: {old_score:.2f} → {obj.security_score:.2f}",
+                str(actions),
+                "动态分级成功"
             )
-            db.session.add(event)
-            db.session.commit()
         
         return jsonify({
             'message': '数据对象更新成功',
             'security_score': obj.security_score,
             'security_level': obj.security_level,
             'score_change': obj.security_score - old_score,
+            'weight_version': weight_cache.version,
             'executed_actions': actions
         })
     
     elif request.method == 'DELETE':
         db.session.delete(obj)
+        aggregates.record_data_object(obj.security_level, obj.lifecycle_stage, -1)
+        db.session.add(Tombstone(
+            table_name=DataObject.__tablename__,
+            record_id=obj.id,
+            row_version=bump_version(DATA_OBJECTS_VERSION)
+        ))
         db.session.commit()
         return jsonify({'message': '数据对象删除成功'})
 
-@app.route('/api/threats', methods=['GET', 'POST'])
+@api.route('/api/threats', methods=['GET', 'POST'])
+@conditional_get(THREATS_VERSION)
 def handle_threats():
     """威胁管理"""
     if request.method == 'GET':
         stage = request.args.get('stage')
-        query = ThreatDatabase.query
-        if stage:
-            query = query.filter_by(stage=stage)
-        
-        threats = query.all()
-        return jsonify([{
-            'id': threat.id,
-            'threat_id': threat.threat_id,
-            'stage': threat.stage,
-            'threat_type': threat.threat_type,
-            'description': threat.description,
-            'impact_scope': threat.impact_scope,
-            'risk_level': threat.risk_level,
-            'created_at': threat.created_at.isoformat()
-        } for threat in threats])
+        filters = [ThreatDatabase.stage == stage] if stage else []
+        return list_response(ThreatDatabase, filters)
     
     elif request.method == 'POST':
         data = request.json
@@ -176,11 +523,14 @@ def handle_threats():
             risk_level=float(data.get('risk_level', 0.5))
         )
         db.session.add(threat)
+        aggregates.record_threat(threat.stage, threat.risk_level)
+        bump_version(THREATS_VERSION)
         db.session.commit()
         
         return jsonify({'message': '威胁添加成功', 'id': threat.id})
 
-@app.route('/api/weights', methods=['GET', 'PUT'])
+@api.route('/api/weights', methods=['GET', 'PUT'])
+@conditional_get(weight_cache.version_name)
 def handle_weights():
     """权重配置管理"""
     if request.method == 'GET':
@@ -195,30 +545,31 @@ def handle_weights():
     
     elif request.method == 'PUT':
         data = request.json
+        # 一次读取全部指标，避免逐项查询
+        configs = {config.indicator_name: config for config in WeightConfig.query.all()}
+        now = datetime.utcnow()
         for item in data:
-            weight_config = WeightConfig.query.filter_by(indicator_name=item['indicator_name']).first()
+            weight_config = configs.get(item['indicator_name'])
             if weight_config:
                 weight_config.weight = float(item['weight'])
-                weight_config.updated_at = datetime.utcnow()
+                weight_config.updated_at = now
         
+        # 版本号与权重在同一事务中提交，其他进程据此刷新缓存
+        version = bump_version(weight_cache.version_name)
         db.session.commit()
-        return jsonify({'message': '权重配置更新成功'})
+        weight_cache.invalidate()
+        
+        # 后台分块重新评分存量数据对象
+        job = start_rescore_job()
+        
+        return jsonify({'message': '权重配置更新成功', 'weight_version': version, 'rescore_job_id': job.job_id})
 
-@app.route('/api/rules', methods=['GET', 'POST'])
+@api.route('/api/rules', methods=['GET', 'POST'])
+@conditional_get(rule_cache.version_name)
 def handle_rules():
     """安全规则管理"""
     if request.method == 'GET':
-        rules = SecurityRule.query.all()
-        return jsonify([{
-            'id': rule.id,
-            'rule_id': rule.rule_id,
-            'condition_type': rule.condition_type,
-            'condition_json': rule.condition_json,
-            'action_json': rule.action_json,
-            'priority': rule.priority,
-            'is_active': rule.is_active,
-            'created_at': rule.created_at.isoformat()
-        } for rule in rules])
+        return list_response(SecurityRule)
     
     elif request.method == 'POST':
         data = request.json
@@ -231,89 +582,145 @@ def handle_rules():
             is_active=data.get('is_active', True)
         )
         db.session.add(rule)
+        aggregates.record_rule(rule.is_active)
+        bump_version(rule_cache.version_name)
         db.session.commit()
+        rule_cache.invalidate()
         
         return jsonify({'message': '安全规则添加成功', 'id': rule.id})
 
-@app.route('/api/events', methods=['GET'])
+@api.route('/api/events', methods=['GET'])
+@conditional_get(EVENTS_VERSION)
 def get_events():
     """获取安全事件"""
-    events = SecurityEvent.query.order_by(SecurityEvent.event_time.desc()).limit(100).all()
-    return jsonify([{
-        'id': event.id,
-        'event_id': event.event_id,
-        'data_object_id': event.data_object_id,
-        'trigger_condition': event.trigger_condition,
-        'executed_strategy': event.executed_strategy,
-        'result': event.result,
-        'event_time': event.event_time.isoformat()
-    } for event in events])
+    if 'since' in request.args:
+        # 安全事件只追加不修改，按写入时的 events 版本号同步（主键在插入时分配，提交顺序与主键顺序不一致）
+        return sync_response(SecurityEvent, SecurityEvent.row_version, lambda: read_version(EVENTS_VERSION))
+    
+    if 'start' in request.args or 'end' in request.args:
+        # 时间范围查询：合并在线分桶与归档分桶
+        try:
+            fields = _parse_fields(SecurityEvent)
+            limit = _parse_limit(100)
+            start, end = _parse_time('start'), _parse_time('end')
+        except ListQueryError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify([
+            {field: _json_value(event.get(field)) for field in fields}
+            for event in query_events(start, end, limit)
+        ])
+    
+    # 按事件时间倒序分页（时间相同时按主键倒序），默认每页100条
+    return list_response(SecurityEvent, descending=True, default_limit=100, order_column=SecurityEvent.event_time)
+
+@api.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """获取后台任务列表"""
+    return jsonify([job.to_dict() for job in job_registry.list()])
 
-@app.route('/api/analytics/dashboard', methods=['GET'])
+@api.route('/api/jobs/reclassify', methods=['POST'])
+def reclassify():
+    """启动威胁感知的全量动态分级任务"""
+    job = start_reclassify_job()
+    return jsonify({'message': '动态分级任务已启动', 'job_id': job.job_id})
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """获取后台任务进度"""
+    job = job_registry.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+@api.route('/api/system/event-sink', methods=['GET'])
+def get_event_sink_metrics():
+    """安全事件写入队列深度与写入延迟"""
+    return jsonify(event_sink.metrics())
+
+@api.route('/api/system/stream', methods=['GET'])
+def get_stream_metrics():
+    """获取实时推送连接数与消息统计（本进程）"""
+    return jsonify(broadcaster.metrics())
+
+@api.route('/api/system/diagnostics', methods=['GET'])
+def get_diagnostics():
+    """最近的慢查询（含执行计划）与疑似 N+1 请求（本进程，需开启 DSQDS_SLOW_QUERY_MS / DSQDS_N_PLUS_ONE）"""
+    return jsonify(diagnostics.report())
+
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 文本格式的运行指标（本进程），附带安全事件队列与实时推送的统计（需开启 DSQDS_METRICS，不允许跨域）"""
+    if not metrics.enabled:
+        return jsonify({'error': '运行指标未启用'}), 404
+    sources = {'event_sink': event_sink.metrics(), 'stream': broadcaster.metrics()}
+    extra = [
+        (name, kind, documentation, float(sources[source][key]))
+        for source, key, name, kind, documentation in RUNTIME_METRICS
+    ]
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/stream', methods=['GET'])
+def stream():
+    """实时推送（Server-Sent Events）
+
+    事件类型: security_event（新增安全事件）、data_objects（数据对象分级变化）、
+    aggregates（仪表板汇总增量）、refresh（变更过多或断线过久，客户端需整体刷新）、
+    busy（连接数已满，响应随即结束，客户端按 retry 间隔自动重连）。
+    """
+    subscription = broadcaster.subscribe(request.headers.get('Last-Event-ID'))
+    if subscription is None:
+        subscription = broadcaster.busy_response()
+    response = Response(subscription, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭反向代理缓冲
+    return response
+
+@api.route('/api/export/data-objects', methods=['GET'])
+def export_data_objects():
+    """流式导出数据对象（since 按更新时间过滤）"""
+    return export_response(DataObject, DataObject.updated_at, 'data_objects')
+
+@api.route('/api/export/events', methods=['GET'])
+def export_events():
+    """流式导出安全事件（since 按事件时间过滤）"""
+    return export_response(SecurityEvent, SecurityEvent.event_time, 'security_events')
+
+@api.route('/api/analytics/dashboard', methods=['GET'])
+@conditional_get(DATA_OBJECTS_VERSION, THREATS_VERSION, rule_cache.version_name, EVENTS_VERSION)
 def get_dashboard_data():
     """获取仪表板数据"""
-    # 安全等级分布
-    level_stats = db.session.query(
-        DataObject.security_level,
-        db.func.count(DataObject.id).label('count')
-    ).group_by(DataObject.security_level).all()
-    
-    # 生命周期阶段分布
-    stage_stats = db.session.query(
-        DataObject.lifecycle_stage,
-        db.func.count(DataObject.id).label('count')
-    ).group_by(DataObject.lifecycle_stage).all()
-    
-    # 威胁统计
-    threat_stats = db.session.query(
-        ThreatDatabase.stage,
-        db.func.count(ThreatDatabase.id).label('count'),
-        db.func.avg(ThreatDatabase.risk_level).label('avg_risk')
-    ).group_by(ThreatDatabase.stage).all()
+    # 分布与总数来自增量维护的汇总表
+    summary = aggregates.dashboard_summary()
     
     # 最近安全事件
     recent_events = SecurityEvent.query.order_by(SecurityEvent.event_time.desc()).limit(5).all()
+    summary['recent_events'] = [{
+        'event_id': event.event_id,
+        'trigger_condition': event.trigger_condition,
+        'result': event.result,
+        'event_time': event.event_time.isoformat()
+    } for event in recent_events]
     
-    return jsonify({
-        'security_level_distribution': [{'level': item[0], 'count': item[1]} for item in level_stats],
-        'lifecycle_stage_distribution': [{'stage': item[0], 'count': item[1]} for item in stage_stats],
-        'threat_statistics': [{'stage': item[0], 'count': item[1], 'avg_risk': float(item[2] or 0)} for item in threat_stats],
-        'recent_events': [{
-            'event_id': event.event_id,
-            'trigger_condition': event.trigger_condition,
-            'result': event.result,
-            'event_time': event.event_time.isoformat()
-        } for event in recent_events],
-        'total_data_objects': DataObject.query.count(),
-        'total_threats': ThreatDatabase.query.count(),
-        'total_rules': SecurityRule.query.filter_by(is_active=True).count()
-    })
+    return jsonify(summary)
 
-@app.route('/api/batch-assessment', methods=['POST'])
+@api.route('/api/batch-assessment', methods=['POST'])
 def batch_assessment():
     """批量安全评估"""
     data = request.json
-    results = []
+    items = data.get('data_objects', [])
     
-    for item in data.get('data_objects', []):
-        # 计算安全分值
-        score = SecurityQuantificationEngine.calculate_security_score(
-            float(item.get('spatial_scale', 0)),
-            float(item.get('position_accuracy', 0)),
-            float(item.get('content_sensitivity', 0)),
-            float(item.get('data_flow', 0)),
-            float(item.get('historical_risk', 0))
-        )
-        
-        level = SecurityQuantificationEngine.determine_security_level(score)
-        
-        results.append({
-            'name': item.get('name'),
-            'security_score': score,
-            'security_level': level
-        })
+    # 一次读取权重快照，整批向量化计算分值与等级
+    weights, weight_version = weight_cache.snapshot()
+    scores, levels = SecurityQuantificationEngine.assess_batch(items, weights)
+    
+    results = [{
+        'name': item.get('name'),
+        'security_score': float(score),
+        'security_level': str(level)
+    } for item, score, level in zip(items, scores, levels)]
     
     return jsonify({
         'message': f'批量评估完成，共处理 {len(results)} 个对象',
+        'weight_version': weight_version,
         'results': results
     })
\ No newline at end of file
@@ -1,17 +1,46 @@
-from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import numpy as np
+from bisect import bisect_left, bisect_right
 import json
 import os
+import threading
+import time
 
-app = Flask(__name__, static_folder='static')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///dsqds.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-CORS(app)
+from config import load_config, install_engine_hooks
+from extensions import EXTENSION_NAME, app_state
+from metrics import metrics
 
-db = SQLAlchemy(app)
+# NumPy 只在评分时按需导入，导入本模块与创建应用不加载 NumPy
+db = SQLAlchemy()
+
+def create_app(config=None):
+    """创建应用：默认配置来自环境变量，config 字典中的项覆盖默认值（如测试用的数据库地址）
+
+    缓存、事件写入器、实时推送与指标均按应用隔离（见 extensions.py），同一进程可创建多个互不影响的应用。
+    """
+    from flask_cors import CORS
+    from json_provider import FastJSONProvider
+    from api_routes import api
+    from broadcaster import broadcaster
+    from event_sink import event_sink
+    from diagnostics import diagnostics
+    
+    app = Flask(__name__, static_folder='static')
+    app.config.update(load_config(config))
+    app.json = FastJSONProvider(app)
+    app.extensions[EXTENSION_NAME] = {}
+    CORS(app, resources={r'/api/*': {}}, expose_headers=['X-Next-Cursor', 'ETag'])  # /metrics 等不允许跨域读取
+    
+    db.init_app(app)
+    with app.app_context():
+        install_engine_hooks(db.engine)
+    metrics.init_app(app)
+    diagnostics.init_app(app)
+    event_sink.init_app(app)
+    broadcaster.init_app(app)
+    app.register_blueprint(api)
+    return app
 
 # 数据模型
 class DataObject(db.Model):
@@ -24,17 +53,19 @@ class DataObject(db.Model):
     content_sensitivity = db.Column(db.Float, default=0.0)  # C - 内容敏感性 [0,1]
     data_flow = db.Column(db.Float, default=0.0)  # F - 数据流通性 [0,1]
     historical_risk = db.Column(db.Float, default=0.0)  # H - 历史风险 [0,1]
-    lifecycle_stage = db.Column(db.String(50), default='采集')  # 生命周期阶段
-    security_score = db.Column(db.Float, default=0.0)  # 安全分值
-    security_level = db.Column(db.String(20), default='一般数据')  # 安全等级
+    lifecycle_stage = db.Column(db.String(50), default='采集', index=True)  # 生命周期阶段
+    security_score = db.Column(db.Float, default=0.0)  # 安全分值（当前分级依据）
+    base_score = db.Column(db.Float)  # 属性加权分值；仅动态分级任务与带外部威胁的更新使安全分值偏离该值
+    security_level = db.Column(db.String(20), default='一般数据', index=True)  # 安全等级
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    row_version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)  # 最后一次写入时的 data_objects 版本号，用于增量同步
 
 class ThreatDatabase(db.Model):
     """威胁清单表"""
     id = db.Column(db.Integer, primary_key=True)
     threat_id = db.Column(db.String(50), unique=True, nullable=False)
-    stage = db.Column(db.String(20), nullable=False)  # 采集/传输/存储/共享/应用
+    stage = db.Column(db.String(20), nullable=False, index=True)  # 采集/传输/存储/共享/应用
     threat_type = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     impact_scope = db.Column(db.String(100))
@@ -51,6 +82,9 @@ class WeightConfig(db.Model):
 
 class SecurityRule(db.Model):
     """安全规则库表"""
+    __table_args__ = (
+        db.Index('ix_security_rule_active_priority', 'is_active', 'priority'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     rule_id = db.Column(db.String(50), unique=True, nullable=False)
     condition_type = db.Column(db.String(50), nullable=False)  # 属性规则/环节规则/事件触发规则/复合规则
@@ -64,336 +98,536 @@ class SecurityEvent(db.Model):
     """安全事件表"""
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.String(50), unique=True, nullable=False)
-    data_object_id = db.Column(db.Integer, db.ForeignKey('data_object.id'))
+    data_object_id = db.Column(db.Integer, db.ForeignKey('data_object.id'), index=True)
     trigger_condition = db.Column(db.Text)
     executed_strategy = db.Column(db.Text)
     result = db.Column(db.Text)
-    event_time = db.Column(db.DateTime, default=datetime.utcnow)
+    event_time = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    row_version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)  # 写入时的 events 版本号，用于增量同步
+
+class Tombstone(db.Model):
+    """删除记录（墓碑），供增量同步告知客户端已删除的行"""
+    __table_args__ = (
+        db.Index('ix_tombstone_table_version', 'table_name', 'row_version'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    row_version = db.Column(db.Integer, nullable=False)  # 删除时该表的版本号
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DashboardAggregate(db.Model):
+    """仪表板汇总表，由写接口增量维护，可随时从明细表重建"""
+    category = db.Column(db.String(50), primary_key=True)  # security_level/lifecycle_stage/threat_stage/active_rules/meta
+    key = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    value_sum = db.Column(db.Float, nullable=False, default=0.0)  # 威胁风险等级求和，用于计算均值
+
+class EventArchive(db.Model):
+    """安全事件归档目录：每个过期月份分桶压缩为一个或多个 NDJSON.gz 文件"""
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(7), nullable=False, index=True)  # 月份分桶，如 2025-08
+    path = db.Column(db.String(500), nullable=False)  # 相对归档目录的文件名
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    min_event_time = db.Column(db.DateTime)
+    max_event_time = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class VersionCounter(db.Model):
+    """配置版本计数表，用于跨进程同步缓存"""
+    name = db.Column(db.String(50), primary_key=True)  # 计数器名称，如 weights
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def read_version(name):
+    """读取版本计数器当前值"""
+    version = db.session.query(VersionCounter.version).filter_by(name=name).scalar()
+    return version or 0
+
+def bump_version(name):
+    """版本计数器加一（随调用方事务提交），返回新版本号"""
+    updated = VersionCounter.query.filter_by(name=name).update(
+        {VersionCounter.version: VersionCounter.version + 1, VersionCounter.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.session.add(VersionCounter(name=name, version=1))
+        db.session.flush()
+    return read_version(name)
+
+# 数据表版本计数器：每条写路径随事务递增，GET 接口据此生成 ETag（权重、规则分别沿用 weights、rules）
+DATA_OBJECTS_VERSION = 'data_objects'
+THREATS_VERSION = 'threats'
+EVENTS_VERSION = 'events'
+
+def read_versions(names):
+    """批量读取版本计数器，返回 {名称: (版本号, 更新时间)}，未创建的计数器为 (0, None)"""
+    rows = db.session.query(VersionCounter.name, VersionCounter.version, VersionCounter.updated_at).filter(
+        VersionCounter.name.in_(names)
+    ).all()
+    versions = {name: (0, None) for name in names}
+    versions.update({name: (version, updated_at) for name, version, updated_at in rows})
+    return versions
+
+def tombstone_horizon(table_name):
+    """该表已清理墓碑的最高版本号：早于此版本的同步游标无法得知其间的删除，需全量同步"""
+    return read_version(f'tombstones:{table_name}')
+
+def advance_tombstone_horizon(table_name, horizon):
+    """将该表的清理水位推进到 horizon 并删除其以内的墓碑（随调用方事务提交），返回删除条数"""
+    name = f'tombstones:{table_name}'
+    counter = db.session.get(VersionCounter, name)
+    if counter is None:
+        db.session.add(VersionCounter(name=name, version=horizon))
+    elif counter.version < horizon:
+        counter.version = horizon
+    return Tombstone.query.filter(
+        Tombstone.table_name == table_name, Tombstone.row_version <= horizon
+    ).delete(synchronize_session=False)
+
+def prune_tombstones(before):
+    """删除 before 之前的墓碑并推进各表的清理水位（随调用方事务提交），返回 {表名: 删除条数}"""
+    horizons = db.session.query(Tombstone.table_name, db.func.max(Tombstone.row_version)).filter(
+        Tombstone.deleted_at < before
+    ).group_by(Tombstone.table_name).all()
+    return {table_name: advance_tombstone_horizon(table_name, horizon) for table_name, horizon in horizons}
+
+# 进程内版本化缓存
+class CacheEntry:
+    """一个应用中某项缓存的值与版本"""
+    __slots__ = ('lock', 'value', 'version', 'checked_at')
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None
+        self.checked_at = 0.0
+
+class VersionedCache:
+    """按版本号缓存加载结果，其他进程的修改通过 version_counter 表感知
+
+    缓存值保存在当前应用的扩展状态中，不同应用（数据库）各自缓存。
+    """
+    
+    def __init__(self, version_name, loader, check_interval=2.0):
+        self.version_name = version_name  # version_counter 中的计数器名称
+        self.loader = loader  # 无参加载函数
+        self.check_interval = check_interval  # 检查数据库版本的最小间隔（秒）
+        self._key = f'cache:{version_name}'
+    
+    def _entry(self):
+        state = app_state()
+        entry = state.get(self._key)
+        if entry is None:
+            entry = state.setdefault(self._key, CacheEntry())
+        return entry
+    
+    def snapshot(self):
+        """返回当前应用的 (缓存值, 版本号)，间隔期内不访问数据库"""
+        entry = self._entry()
+        now = time.monotonic()
+        if entry.value is not None and now - entry.checked_at < self.check_interval:
+            return entry.value, entry.version
+        
+        with entry.lock:
+            if entry.value is None or now - entry.checked_at >= self.check_interval:
+                version = read_version(self.version_name)
+                if entry.value is None or version != entry.version:
+                    entry.value = self.loader()
+                    entry.version = version
+                entry.checked_at = now
+            return entry.value, entry.version
+    
+    def invalidate(self):
+        """强制当前应用下次读取时重新检查版本"""
+        entry = self._entry()
+        with entry.lock:
+            entry.checked_at = 0.0
+    
+    @property
+    def version(self):
+        return self.snapshot()[1]
 
 # 多维安全属性量化算法
 class SecurityQuantificationEngine:
+    # 指标顺序与属性列一一对应
+    INDICATORS = ('S', 'P', 'C', 'F', 'H')
+    ATTRIBUTES = ('spatial_scale', 'position_accuracy', 'content_sensitivity', 'data_flow', 'historical_risk')
+    DEFAULT_WEIGHTS = {'S': 0.2, 'P': 0.2, 'C': 0.3, 'F': 0.15, 'H': 0.15}
+    
+    # 分级阈值（升序）及对应等级，score >= 阈值即进入上一级
+    LEVEL_THRESHOLDS = (0.3, 0.6, 0.8)
+    LEVEL_NAMES = ('公开数据', '一般数据', '重要数据', '核心数据')
+    
     @staticmethod
-    def calculate_security_score(spatial_scale, position_accuracy, content_sensitivity, data_flow, historical_risk):
-        """计算安全分值"""
-        # 获取权重配置
-        weights = {}
-        weight_configs = WeightConfig.query.all()
-        for config in weight_configs:
-            weights[config.indicator_name] = config.weight
-        
-        # 默认权重（如果数据库中没有配置）
+    def load_weights():
+        """读取权重配置，返回按S/P/C/F/H排列的权重向量"""
+        with metrics.stage('weight_load'):
+            weights = {}
+            for config in WeightConfig.query.all():
+                weights[config.indicator_name] = config.weight
+            return SecurityQuantificationEngine.weight_vector(weights)
+    
+    @staticmethod
+    def weight_vector(weights):
+        """将 {指标: 权重} 转换为按S/P/C/F/H排列的权重向量，缺失指标取默认权重"""
+        # 默认权重（如果没有任何配置）
         if not weights:
-            weights = {'S': 0.2, 'P': 0.2, 'C': 0.3, 'F': 0.15, 'H': 0.15}
+            weights = SecurityQuantificationEngine.DEFAULT_WEIGHTS
         
-        # 计算加权分值
-        score = (
-            weights.get('S', 0.2) * spatial_scale +
-            weights.get('P', 0.2) * position_accuracy +
-            weights.get('C', 0.3) * content_sensitivity +
-            weights.get('F', 0.15) * data_flow +
-            weights.get('H', 0.15) * historical_risk
+        import numpy as np
+        return np.array([
+            float(weights.get(name, SecurityQuantificationEngine.DEFAULT_WEIGHTS[name]))
+            for name in SecurityQuantificationEngine.INDICATORS
+        ], dtype=float)
+    
+    @staticmethod
+    def build_attribute_matrix(items):
+        """将字典列表转换为 N×5 的 S/P/C/F/H 矩阵"""
+        import numpy as np
+        attributes = SecurityQuantificationEngine.ATTRIBUTES
+        matrix = np.zeros((len(items), len(attributes)), dtype=float)
+        for row, item in enumerate(items):
+            matrix[row] = [float(item.get(attr, 0) or 0) for attr in attributes]
+        return matrix
+    
+    @staticmethod
+    def calculate_security_scores(matrix, weights=None):
+        """批量计算安全分值，matrix 为 N×5 的 S/P/C/F/H 矩阵"""
+        import numpy as np
+        if weights is None:
+            weights = weight_cache.snapshot()[0]
+        matrix = np.asarray(matrix, dtype=float).reshape(-1, len(SecurityQuantificationEngine.INDICATORS))
+        return np.clip(matrix @ weights, 0.0, 1.0)  # 确保在[0,1]范围内
+    
+    @staticmethod
+    def determine_security_levels(scores):
+        """批量确定安全等级"""
+        import numpy as np
+        indexes = np.searchsorted(SecurityQuantificationEngine.LEVEL_THRESHOLDS, scores, side='right')
+        return np.array(SecurityQuantificationEngine.LEVEL_NAMES)[indexes]
+    
+    @staticmethod
+    def assess_batch(items, weights=None):
+        """批量评估，返回 (分值数组, 等级数组)"""
+        matrix = SecurityQuantificationEngine.build_attribute_matrix(items)
+        scores = SecurityQuantificationEngine.calculate_security_scores(matrix, weights)
+        return scores, SecurityQuantificationEngine.determine_security_levels(scores)
+    
+    @staticmethod
+    def calculate_security_score(spatial_scale, position_accuracy, content_sensitivity, data_flow, historical_risk):
+        """计算安全分值"""
+        scores = SecurityQuantificationEngine.calculate_security_scores(
+            [[spatial_scale, position_accuracy, content_sensitivity, data_flow, historical_risk]]
         )
-        
-        return min(max(score, 0.0), 1.0)  # 确保在[0,1]范围内
+        return float(scores[0])
     
     @staticmethod
     def determine_security_level(score):
         """根据分值确定安全等级"""
-        if score >= 0.8:
-            return '核心数据'
-        elif score >= 0.6:
-            return '重要数据'
-        elif score >= 0.3:
-            return '一般数据'
-        else:
-            return '公开数据'
+        return str(SecurityQuantificationEngine.determine_security_levels([score])[0])
 
 # 动态分级决策引擎
 class DynamicClassificationEngine:
+    # 生命周期阶段系数
+    STAGE_MULTIPLIERS = {
+        '采集': 1.0,
+        '传输': 1.1,
+        '存储': 1.05,
+        '共享': 1.2,
+        '应用': 1.15
+    }
+    # 威胁清单中该阶段平均风险等级计入分值的比例
+    STAGE_THREAT_WEIGHT = 0.1
+    
     @staticmethod
-    def adjust_classification(data_object, external_threats=None):
-        """动态调整数据分级"""
-        base_score = data_object.security_score
-        adjusted_score = base_score
+    def load_stage_risks():
+        """按阶段汇总威胁清单，返回 {阶段: 平均风险等级}"""
+        rows = db.session.query(
+            ThreatDatabase.stage, db.func.avg(ThreatDatabase.risk_level)
+        ).group_by(ThreatDatabase.stage).all()
+        return {stage: float(risk or 0.0) for stage, risk in rows}
+    
+    @staticmethod
+    def adjust_scores(scores, stages, stage_risks=None, external_impact=0.0):
+        """批量动态调整分值：叠加外部威胁与阶段威胁风险后乘以阶段系数
         
-        # 根据外部威胁调整
-        if external_threats:
-            threat_adjustment = sum([threat.get('impact', 0) for threat in external_threats])
-            adjusted_score = min(base_score + threat_adjustment, 1.0)
+        scores 与 stages 等长；stage_risks 为 load_stage_risks() 的结果，为空时不计阶段威胁。
+        """
+        import numpy as np
+        scores = np.asarray(scores, dtype=float)
+        stage_risks = stage_risks or {}
+        keys, inverse = np.unique(np.array(stages, dtype=object).astype(str), return_inverse=True)
+        multipliers = np.array([DynamicClassificationEngine.STAGE_MULTIPLIERS.get(key, 1.0) for key in keys])
+        risks = np.array([stage_risks.get(key, 0.0) for key in keys])
         
-        # 根据生命周期阶段调整
-        stage_multipliers = {
-            '采集': 1.0,
-            '传输': 1.1,
-            '存储': 1.05,
-            '共享': 1.2,
-            '应用': 1.15
-        }
+        adjusted = np.minimum(scores + external_impact + DynamicClassificationEngine.STAGE_THREAT_WEIGHT * risks[inverse], 1.0)
+        return np.minimum(adjusted * multipliers[inverse], 1.0)
+    
+    @staticmethod
+    def adjust_classification(data_object, external_threats=None, stage_risks=None):
+        """动态调整数据分级：在外部威胁之外，与全量动态分级任务相同地叠加阶段威胁（stage_risks 未提供时读取威胁清单）与阶段系数"""
+        if stage_risks is None:
+            stage_risks = DynamicClassificationEngine.load_stage_risks()
+        # 根据外部威胁调整
+        threat_adjustment = sum([threat.get('impact', 0) for threat in external_threats or []])
+        return float(DynamicClassificationEngine.adjust_scores(
+            [data_object.security_score], [data_object.lifecycle_stage], stage_risks, external_impact=threat_adjustment
+        )[0])
+
+weight_cache = VersionedCache('weights', SecurityQuantificationEngine.load_weights)
+
+# 安全规则引擎
+class CompiledRule:
+    """编译后的安全规则：谓词闭包 + 预解析的动作"""
+    __slots__ = ('rule_id', 'priority', 'condition', 'predicate', 'action')
+    
+    def __init__(self, rule_id, priority, condition, predicate, action):
+        self.rule_id = rule_id
+        self.priority = priority
+        self.condition = condition  # 解析后的条件字典，供索引使用
+        self.predicate = predicate  # predicate(data_object, context) -> bool
+        self.action = action
+
+class RuleSet:
+    """按优先级排列的编译规则集，附带等值哈希桶与阈值有序表索引"""
+    
+    def __init__(self, rules):
+        self.rules = rules  # 按优先级降序排列
+        self.unindexed = []  # 无法索引、每次都需评估的规则位置
+        self.equality = {}  # 属性 -> {取值: [规则位置]}
+        self.lower_bounds = {}  # 属性 -> (升序阈值, 规则位置)，用于 >= / >
+        self.upper_bounds = {}  # 属性 -> (升序阈值, 规则位置)，用于 <= / <
         
-        multiplier = stage_multipliers.get(data_object.lifecycle_stage, 1.0)
-        adjusted_score = min(adjusted_score * multiplier, 1.0)
+        lower, upper = {}, {}
+        for position, rule in enumerate(rules):
+            key = SecurityRuleEngine.index_key(rule.condition)
+            if key is None:
+                self.unindexed.append(position)
+            elif key[0] == 'eq':
+                self.equality.setdefault(key[1], {}).setdefault(key[2], []).append(position)
+            elif key[0] == 'ge':
+                lower.setdefault(key[1], []).append((key[2], position))
+            else:
+                upper.setdefault(key[1], []).append((key[2], position))
         
-        return adjusted_score
+        for target, entries in ((self.lower_bounds, lower), (self.upper_bounds, upper)):
+            for attribute, items in entries.items():
+                items.sort()
+                target[attribute] = ([item[0] for item in items], [item[1] for item in items])
+    
+    def candidates(self, data_object):
+        """返回可能命中的规则位置（升序，即优先级顺序）"""
+        positions = set(self.unindexed)
+        for attribute, buckets in self.equality.items():
+            try:
+                positions.update(buckets.get(getattr(data_object, attribute, None), ()))
+            except TypeError:
+                pass  # 不可哈希的属性值（如列表）不等于任何已建桶的取值
+        for attribute, (thresholds, rule_positions) in self.lower_bounds.items():
+            value = getattr(data_object, attribute, None) or 0
+            positions.update(rule_positions[:bisect_right(thresholds, value)])
+        for attribute, (thresholds, rule_positions) in self.upper_bounds.items():
+            value = getattr(data_object, attribute, None) or 0
+            positions.update(rule_positions[bisect_left(thresholds, value):])
+        return sorted(positions)
+    
+    def match(self, data_object, context=None):
+        """索引匹配：仅评估候选规则"""
+        return self._evaluate((self.rules[position] for position in self.candidates(data_object)), data_object, context)
+    
+    def match_linear(self, data_object, context=None):
+        """线性匹配：逐条评估全部规则（用于对照与基准测试）"""
+        return self._evaluate(self.rules, data_object, context)
+    
+    @staticmethod
+    def _evaluate(rules, data_object, context):
+        matched = []
+        for rule in rules:
+            try:
+                if rule.predicate(data_object, context or {}):
+                    matched.append(rule)
+            except Exception as e:
+                print(f"规则执行错误: {e}")
+        return matched
+    
+    def __len__(self):
+        return len(self.rules)
 
-# 安全规则引擎
 class SecurityRuleEngine:
+    # 可做阈值比较的数值属性
+    NUMERIC_ATTRIBUTES = (
+        'spatial_scale', 'position_accuracy', 'content_sensitivity',
+        'data_flow', 'historical_risk', 'security_score'
+    )
+    # 等值条件：条件类型 -> (对象属性, 条件中的取值字段)
+    EQUALITY_CONDITIONS = {
+        'security_level': ('security_level', 'level'),
+        'lifecycle_stage': ('lifecycle_stage', 'stage'),
+        'data_type': ('data_type', 'value'),
+    }
+    COMPARATORS = {
+        '>=': lambda value, threshold: value >= threshold,
+        '>': lambda value, threshold: value > threshold,
+        '<=': lambda value, threshold: value <= threshold,
+        '<': lambda value, threshold: value < threshold,
+        '==': lambda value, threshold: value == threshold,
+    }
+    # 事件类条件中定性等级对应的数值下限
+    QUALITATIVE_THRESHOLDS = {'high': 0.7, 'medium': 0.4, 'low': 0.0}
+    
+    @staticmethod
+    def execute_rules(data_object, context=None):
+        """执行安全规则，context 可携带 external_threats 等事件信息"""
+        rule_set, _ = rule_cache.snapshot()
+        with metrics.stage('rule_eval'):
+            return [{
+                'rule_id': rule.rule_id,
+                'action': rule.action
+            } for rule in rule_set.match(data_object, context)]
+    
     @staticmethod
-    def execute_rules(data_object):
-        """执行安全规则"""
-        executed_actions = []
-        rules = SecurityRule.query.filter_by(is_active=True).order_by(SecurityRule.priority.desc()).all()
+    def load_rules():
+        """读取并编译全部启用规则，返回按优先级降序排列的规则集"""
+        return SecurityRuleEngine.build_rule_set(SecurityRuleEngine.load_rule_definitions())
+    
+    @staticmethod
+    def load_rule_definitions():
+        """读取全部启用规则，返回 (rule_id, priority, 条件, 动作) 列表（可跨进程传递）"""
+        rules = SecurityRule.query.filter_by(is_active=True).order_by(
+            SecurityRule.priority.desc(), SecurityRule.id
+        ).all()
         
+        definitions = []
         for rule in rules:
             try:
-                condition = json.loads(rule.condition_json)
-                if SecurityRuleEngine._check_condition(data_object, condition):
-                    action = json.loads(rule.action_json)
-                    executed_actions.append({
-                        'rule_id': rule.rule_id,
-                        'action': action
-                    })
+                definitions.append((rule.rule_id, rule.priority, json.loads(rule.condition_json), json.loads(rule.action_json)))
             except Exception as e:
-                print(f"规则执行错误: {e}")
-        
-        return executed_actions
+                print(f"规则解析错误 {rule.rule_id}: {e}")
+        return definitions
+    
+    @staticmethod
+    def build_rule_set(definitions):
+        """编译规则定义，返回规则集（保持定义的优先级顺序）"""
+        with metrics.stage('rule_compile'):
+            compiled = []
+            for rule_id, priority, condition, action in definitions:
+                try:
+                    compiled.append(CompiledRule(
+                        rule_id, priority, condition, SecurityRuleEngine.compile_condition(condition), action
+                    ))
+                except Exception as e:
+                    print(f"规则编译错误 {rule_id}: {e}")
+            
+            return RuleSet(compiled)
     
     @staticmethod
-    def _check_condition(data_object, condition):
-        """检查条件是否满足"""
+    def compile_condition(condition):
+        """将条件字典编译为谓词闭包"""
         condition_type = condition.get('type')
         
+        if condition_type == 'composite':
+            children = [SecurityRuleEngine.compile_condition(child) for child in condition.get('conditions', [])]
+            if str(condition.get('operator', 'AND')).upper() == 'OR':
+                return lambda obj, ctx: any(child(obj, ctx) for child in children)
+            return lambda obj, ctx: all(child(obj, ctx) for child in children)
+        
         if condition_type == 'score_threshold':
-            return data_object.security_score >= condition.get('threshold', 0)
-        elif condition_type == 'security_level':
-            return data_object.security_level == condition.get('level')
-        elif condition_type == 'lifecycle_stage':
-            return data_object.lifecycle_stage == condition.get('stage')
+            return SecurityRuleEngine._compile_threshold('security_score', condition)
+        
+        if condition_type in SecurityRuleEngine.NUMERIC_ATTRIBUTES:
+            return SecurityRuleEngine._compile_threshold(condition_type, condition)
+        
+        if condition_type in SecurityRuleEngine.EQUALITY_CONDITIONS:
+            attribute, key = SecurityRuleEngine.EQUALITY_CONDITIONS[condition_type]
+            expected = condition.get(key)
+            return lambda obj, ctx: getattr(obj, attribute) == expected
+        
+        if condition_type == 'data_flow_anomaly':
+            # 流通频次异常：按定性频次映射到 data_flow 阈值
+            threshold = SecurityRuleEngine.QUALITATIVE_THRESHOLDS.get(condition.get('frequency', 'high'), 0.7)
+            return lambda obj, ctx: (getattr(obj, 'data_flow') or 0) >= threshold
+        
+        if condition_type == 'external_threat':
+            # 外部威胁：由调用方通过 context['external_threats'] 传入
+            level = condition.get('threat_level', 'high')
+            threshold = SecurityRuleEngine.QUALITATIVE_THRESHOLDS.get(level, 0.7)
+            
+            def predicate(obj, ctx):
+                for threat in ctx.get('external_threats') or []:
+                    if threat.get('threat_level', threat.get('level')) == level:
+                        return True
+                    if float(threat.get('risk_level', 0)) >= threshold:
+                        return True
+                return False
+            return predicate
+        
+        raise ValueError(f"不支持的条件类型: {condition_type}")
+    
+    @staticmethod
+    def index_key(condition):
+        """提取可索引的必要条件：('eq', 属性, 值) / ('ge'|'le', 属性, 阈值)，不可索引时返回 None"""
+        condition_type = condition.get('type')
         
-        return False
+        if condition_type == 'composite':
+            if str(condition.get('operator', 'AND')).upper() == 'OR':
+                return None
+            # AND 组合任一子条件都是必要条件，优先选择选择性更高的等值条件
+            keys = [SecurityRuleEngine.index_key(child) for child in condition.get('conditions', [])]
+            keys = [key for key in keys if key is not None]
+            keys.sort(key=lambda key: key[0] != 'eq')
+            return keys[0] if keys else None
+        
+        if condition_type in SecurityRuleEngine.EQUALITY_CONDITIONS:
+            attribute, key = SecurityRuleEngine.EQUALITY_CONDITIONS[condition_type]
+            value = condition.get(key)
+            try:
+                hash(value)
+            except TypeError:
+                return None  # 列表、字典等取值无法建哈希桶，按不可索引规则逐条评估
+            return ('eq', attribute, value)
+        
+        if condition_type == 'score_threshold' or condition_type in SecurityRuleEngine.NUMERIC_ATTRIBUTES:
+            attribute = 'security_score' if condition_type == 'score_threshold' else condition_type
+            operator = condition.get('operator', '>=')
+            if operator in ('>=', '>'):
+                return ('ge', attribute, float(condition.get('threshold', 0)))
+            if operator in ('<=', '<'):
+                return ('le', attribute, float(condition.get('threshold', 0)))
+            return None
+        
+        if condition_type == 'data_flow_anomaly':
+            threshold = SecurityRuleEngine.QUALITATIVE_THRESHOLDS.get(condition.get('frequency', 'high'), 0.7)
+            return ('ge', 'data_flow', threshold)
+        
+        return None
+    
+    @staticmethod
+    def _compile_threshold(attribute, condition):
+        """编译数值阈值条件，默认比较符为 >="""
+        threshold = float(condition.get('threshold', 0))
+        compare = SecurityRuleEngine.COMPARATORS[condition.get('operator', '>=')]
+        return lambda obj, ctx: compare(getattr(obj, attribute) or 0, threshold)
 
-# 导入API路由
-import api_routes
+rule_cache = VersionedCache('rules', SecurityRuleEngine.load_rules)
+
+def bump_all_versions():
+    """初始化或重置数据后递增全部表版本，使客户端缓存的 ETag 全部失效"""
+    for name in (DATA_OBJECTS_VERSION, THREATS_VERSION, EVENTS_VERSION, weight_cache.version_name, rule_cache.version_name):
+        bump_version(name)
 
 if __name__ == '__main__':
+    # 以脚本运行时本文件是 __main__ 模块，需使用 app 模块中的 db 与模型（路由等模块引用的是后者）
+    from app import create_app, WeightConfig
+    app = create_app()
     with app.app_context():
-        db.create_all()
+        from migrations import upgrade_database
+        from seed_data import seed_database
+        upgrade_database()
         
-        # 初始化默认权重配置
+        # 首次启动时写入默认数据
         if not WeightConfig.query.first():
-            default_weights = [
-                WeightConfig(indicator_name='S', weight=0.2, calculation_method='空间尺度归一化'),
-                WeightConfig(indicator_name='P', weight=0.2, calculation_method='位置精度归一化'),
-                WeightConfig(indicator_name='C', weight=0.3, calculation_method='内容敏感性评估'),
-                WeightConfig(indicator_name='F', weight=0.15, calculation_method='数据流通性分析'),
-                WeightConfig(indicator_name='H', weight=0.15, calculation_method='历史风险统计')
-            ]
-            for weight in default_weights:
-                db.session.add(weight)
-            
-            # 初始化威胁数据库
-            default_threats = [
-                ThreatDatabase(threat_id='T001', stage='采集', threat_type='非法设备入侵', description='未授权设备接入数据采集网络', impact_scope='数据完整性', risk_level=0.7),
-                ThreatDatabase(threat_id='T002', stage='采集', threat_type='数据篡改', description='采集过程中数据被恶意修改', impact_scope='数据完整性', risk_level=0.8),
-                ThreatDatabase(threat_id='T003', stage='采集', threat_type='采集误差', description='传感器故障或环境干扰导致数据误差', impact_scope='数据真实性', risk_level=0.5),
-                ThreatDatabase(threat_id='T004', stage='传输', threat_type='数据包截获', description='传输过程中数据包被截获', impact_scope='数据机密性', risk_level=0.6),
-                ThreatDatabase(threat_id='T005', stage='传输', threat_type='链路监听', description='网络链路被恶意监听', impact_scope='数据机密性', risk_level=0.7),
-                ThreatDatabase(threat_id='T006', stage='传输', threat_type='注入攻击', description='传输过程中遭受SQL注入等攻击', impact_scope='数据可用性', risk_level=0.8),
-                ThreatDatabase(threat_id='T007', stage='存储', threat_type='权限配置漏洞', description='存储系统存在权限管理漏洞', impact_scope='访问控制', risk_level=0.7),
-                ThreatDatabase(threat_id='T008', stage='存储', threat_type='介质损坏', description='存储介质物理损坏导致数据丢失', impact_scope='数据可用性', risk_level=0.6),
-                ThreatDatabase(threat_id='T009', stage='存储', threat_type='物理盗窃', description='存储设备被物理盗窃', impact_scope='数据保密性', risk_level=0.9),
-                ThreatDatabase(threat_id='T010', stage='共享', threat_type='越权访问', description='用户超出权限范围访问数据', impact_scope='访问控制', risk_level=0.8),
-                ThreatDatabase(threat_id='T011', stage='共享', threat_type='敏感数据无控制扩散', description='敏感数据在共享过程中失控扩散', impact_scope='数据可控性', risk_level=0.8),
-                ThreatDatabase(threat_id='T012', stage='应用', threat_type='非法调用', description='应用程序非法调用数据接口', impact_scope='数据完整性', risk_level=0.7),
-                ThreatDatabase(threat_id='T013', stage='应用', threat_type='数据滥用', description='应用程序非法使用数据', impact_scope='数据使用', risk_level=0.6),
-                ThreatDatabase(threat_id='T014', stage='应用', threat_type='内容泄漏', description='应用过程中敏感内容被泄漏', impact_scope='数据追溯性', risk_level=0.8)
-            ]
-            for threat in default_threats:
-                db.session.add(threat)
-            
-            # 初始化数据对象
-            default_data_objects = [
-                DataObject(
-                    name='国家重点工程遥感影像数据',
-                    data_type='遥感影像',
-                    spatial_scale=1.0,  # 国家级
-                    position_accuracy=1.0,  # 厘米级
-                    content_sensitivity=1.0,  # 涉敏重
-                    data_flow=0.8,  # 频繁共享
-                    historical_risk=0.0,  # 无历史泄露
-                    lifecycle_stage='存储',
-                    security_score=0.92,
-                    security_level='核心数据'
-                ),
-                DataObject(
-                    name='省级基础地理信息数据',
-                    data_type='基础地理信息',
-                    spatial_scale=0.8,  # 省级
-                    position_accuracy=0.8,  # 分米级
-                    content_sensitivity=0.5,  # 一般
-                    data_flow=0.6,  # 偶尔共享
-                    historical_risk=0.0,  # 无历史泄露
-                    lifecycle_stage='共享',
-                    security_score=0.68,
-                    security_level='重要数据'
-                ),
-                DataObject(
-                    name='市级专题地图数据',
-                    data_type='专题地图',
-                    spatial_scale=0.6,  # 市级
-                    position_accuracy=0.6,  # 米级
-                    content_sensitivity=0.3,  # 普通
-                    data_flow=0.4,  # 偶尔共享
-                    historical_risk=0.2,  # 曾有轻微泄露
-                    lifecycle_stage='应用',
-                    security_score=0.48,
-                    security_level='一般数据'
-                ),
-                DataObject(
-                    name='县级公开地理数据',
-                    data_type='公开地理数据',
-                    spatial_scale=0.4,  # 县级
-                    position_accuracy=0.4,  # 米级以下
-                    content_sensitivity=0.0,  # 普通
-                    data_flow=0.2,  # 封闭
-                    historical_risk=0.0,  # 无历史泄露
-                    lifecycle_stage='应用',
-                    security_score=0.24,
-                    security_level='公开数据'
-                ),
-                DataObject(
-                    name='传感器实时监测数据',
-                    data_type='传感器数据',
-                    spatial_scale=0.7,  # 省级
-                    position_accuracy=0.9,  # 厘米级
-                    content_sensitivity=0.7,  # 涉敏
-                    data_flow=0.9,  # 频繁流转
-                    historical_risk=0.1,  # 轻微历史风险
-                    lifecycle_stage='传输',
-                    security_score=0.76,
-                    security_level='重要数据'
-                )
-            ]
-            for data_obj in default_data_objects:
-                db.session.add(data_obj)
-            
-            # 初始化安全事件
-            default_security_events = [
-                SecurityEvent(
-                    event_id='E001',
-                    data_object_id=1,
-                    trigger_condition='检测到异常访问行为',
-                    executed_strategy='启动多因子认证，提升数据分级',
-                    result='成功阻止未授权访问，数据分级从重要数据提升为核心数据'
-                ),
-                SecurityEvent(
-                    event_id='E002',
-                    data_object_id=2,
-                    trigger_condition='外部安全预警触发',
-                    executed_strategy='限制数据共享，启动审计记录',
-                    result='有效控制数据流通，记录完整操作日志'
-                ),
-                SecurityEvent(
-                    event_id='E003',
-                    data_object_id=3,
-                    trigger_condition='检测到数据多次流转未脱敏',
-                    executed_strategy='强制脱敏处理，限制共享次数',
-                    result='数据成功脱敏，共享次数限制生效'
-                ),
-                SecurityEvent(
-                    event_id='E004',
-                    data_object_id=4,
-                    trigger_condition='存储介质异常检测',
-                    executed_strategy='数据只读锁定，触发安全审计',
-                    result='及时发现并修复存储问题，数据安全得到保障'
-                ),
-                SecurityEvent(
-                    event_id='E005',
-                    data_object_id=5,
-                    trigger_condition='权限配置错误检测',
-                    executed_strategy='重新配置访问权限，通知管理员',
-                    result='权限配置已修正，系统安全性得到提升'
-                )
-            ]
-            for event in default_security_events:
-                db.session.add(event)
-            
-            # 初始化安全规则（扩展版）
-            default_rules = [
-                SecurityRule(
-                    rule_id='R001', 
-                    condition_type='属性规则',
-                    condition_json='{"type": "score_threshold", "threshold": 0.8}',
-                    action_json='{"type": "encryption", "level": "high", "description": "高级加密存储"}',
-                    priority=1
-                ),
-                SecurityRule(
-                    rule_id='R002',
-                    condition_type='属性规则', 
-                    condition_json='{"type": "security_level", "level": "核心数据"}',
-                    action_json='{"type": "access_control", "level": "strict", "description": "严格访问控制"}',
-                    priority=2
-                ),
-                SecurityRule(
-                    rule_id='R003',
-                    condition_type='环节规则',
-                    condition_json='{"type": "lifecycle_stage", "stage": "共享"}',
-                    action_json='{"type": "audit", "level": "full", "description": "全程审计记录"}',
-                    priority=1
-                ),
-                SecurityRule(
-                    rule_id='R004',
-                    condition_type='事件触发规则',
-                    condition_json='{"type": "external_threat", "threat_level": "high"}',
-                    action_json='{"type": "level_upgrade", "description": "数据分级提升一级，启动多因子认证"}',
-                    priority=1
-                ),
-                SecurityRule(
-                    rule_id='R005',
-                    condition_type='复合规则',
-                    condition_json='{"type": "composite", "conditions": [{"type": "data_type", "value": "遥感影像"}, {"type": "position_accuracy", "threshold": 0.9}]}',
-                    action_json='{"type": "core_classification", "description": "分级为核心数据，加密存储，访问权限最小化"}',
-                    priority=1
-                ),
-                SecurityRule(
-                    rule_id='R006',
-                    condition_type='环节规则',
-                    condition_json='{"type": "lifecycle_stage", "stage": "传输"}',
-                    action_json='{"type": "encrypted_transmission", "description": "全过程加密传输"}',
-                    priority=2
-                ),
-                SecurityRule(
-                    rule_id='R007',
-                    condition_type='属性规则',
-                    condition_json='{"type": "historical_risk", "threshold": 0.5}',
-                    action_json='{"type": "enhanced_monitoring", "description": "审核频次提升，分级门槛上调"}',
-                    priority=2
-                ),
-                SecurityRule(
-                    rule_id='R008',
-                    condition_type='事件触发规则',
-                    condition_json='{"type": "data_flow_anomaly", "frequency": "high"}',
-                    action_json='{"type": "flow_control", "description": "限制共享次数，强制脱敏处理"}',
-                    priority=1
-                ),
-                SecurityRule(
-                    rule_id='R009',
-                    condition_type='环节规则',
-                    condition_json='{"type": "lifecycle_stage", "stage": "存储"}',
-                    action_json='{"type": "storage_protection", "description": "数据只读锁定，触发系统安全审计"}',
-                    priority=2
-                ),
-                SecurityRule(
-                    rule_id='R010',
-                    condition_type='复合规则',
-                    condition_json='{"type": "composite", "conditions": [{"type": "content_sensitivity", "threshold": 0.8}, {"type": "spatial_scale", "threshold": 0.9}]}',
-                    action_json='{"type": "military_grade", "description": "军事级加密，全流程监控，多因子审批"}',
-                    priority=1
-                )
-            ]
-            for rule in default_rules:
-                db.session.add(rule)
-            
-            db.session.commit()
+            seed_database()
     
     print("DSQDS系统启动成功！")
     print("访问地址: http://localhost:3000")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite并发读写基准测试：默认日志模式 vs WAL + PRAGMA 调优
+
+模拟 threaded=True 下的混合负载：若干写线程逐条插入并提交，若干读线程反复执行
+仪表板式的聚合查询，比较两种配置下的吞吐、读延迟与锁冲突次数。
+
+用法: python -m benchmarks.db_concurrency [--seconds 5] [--readers 8] [--writers 2] [--rows 50000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from config import sqlite_pragmas, apply_sqlite_pragmas
+
+BASELINE_PRAGMAS = [('journal_mode', 'DELETE'), ('synchronous', 'FULL')]
+
+def prepare_database(path, rows):
+    """建表并预置数据"""
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE data_object (id INTEGER PRIMARY KEY, name TEXT, security_level TEXT, security_score REAL)'
+    )
+    connection.execute('CREATE INDEX ix_level ON data_object (security_level)')
+    levels = ['核心数据', '重要数据', '一般数据', '公开数据']
+    connection.executemany(
+        'INSERT INTO data_object (name, security_level, security_score) VALUES (?, ?, ?)',
+        ((f'对象{i}', random.choice(levels), random.random()) for i in range(rows))
+    )
+    connection.commit()
+    connection.close()
+
+def run_workload(path, pragmas, seconds, readers, writers):
+    """运行混合负载，返回统计结果"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'writes': 0, 'reads': 0, 'busy': 0, 'read_latencies': []}
+
+    def connect():
+        # 与应用一致：Python 层锁等待 5 秒
+        connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        apply_sqlite_pragmas(connection, pragmas)
+        return connection
+
+    def writer():
+        connection = connect()
+        writes = busy = 0
+        while not stop.is_set():
+            try:
+                connection.execute(
+                    'INSERT INTO data_object (name, security_level, security_score) VALUES (?, ?, ?)',
+                    ('新对象', '一般数据', 0.5)
+                )
+                connection.commit()
+                writes += 1
+            except sqlite3.OperationalError:
+                connection.rollback()
+                busy += 1
+        connection.close()
+        with lock:
+            stats['writes'] += writes
+            stats['busy'] += busy
+
+    def reader():
+        connection = connect()
+        reads = busy = 0
+        latencies = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                connection.execute('SELECT security_level, COUNT(*) FROM data_object GROUP BY security_level').fetchall()
+                latencies.append(time.perf_counter() - start)
+                reads += 1
+            except sqlite3.OperationalError:
+                busy += 1
+        connection.close()
+        with lock:
+            stats['reads'] += reads
+            stats['busy'] += busy
+            stats['read_latencies'].extend(latencies)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(stats['read_latencies']) or [0.0]
+    return {
+        'writes_per_sec': stats['writes'] / seconds,
+        'reads_per_sec': stats['reads'] / seconds,
+        'read_p50_ms': latencies[len(latencies) // 2] * 1000,
+        'read_p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'busy_errors': stats['busy'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite并发读写基准测试')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    configurations = [('默认(DELETE/FULL)', BASELINE_PRAGMAS), ('WAL调优', sqlite_pragmas())]
+    print(f"{'配置':<18} {'写/秒':>10} {'读/秒':>10} {'读p50(ms)':>10} {'读p95(ms)':>10} {'锁冲突':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (label, pragmas) in enumerate(configurations):
+            path = os.path.join(directory, f'bench{index}.db')
+            prepare_database(path, args.rows)
+            result = run_workload(path, pragmas, args.seconds, args.readers, args.writers)
+            print(f"{label:<18} {result['writes_per_sec']:>10.0f} {result['reads_per_sec']:>10.0f} "
+                  f"{result['read_p50_ms']:>10.2f} {result['read_p95_ms']:>10.2f} {result['busy_errors']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表接口基准测试：ORM 实例 + 标准库 jsonify vs Core 列元组 + 快速 JSON 编码
+
+在临时 SQLite 库中预置数据对象，通过测试客户端请求完整的 GET /api/data-objects，
+与原实现（逐行构造 ORM 实例、逐字段 isoformat、Flask 默认 JSON 编码）对比耗时。
+
+用法: python -m benchmarks.list_endpoints [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+def seed(rows):
+    """批量写入数据对象"""
+    from app import db, DataObject
+    from ingest import bulk_insert
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    stages = ['采集', '传输', '存储', '共享', '应用']
+    levels = ['核心数据', '重要数据', '一般数据', '公开数据']
+    for start in range(0, rows, 10000):
+        bulk_insert(DataObject.__table__, [{
+            'id': start + offset + 1,
+            'name': f'基准对象{start + offset}',
+            'data_type': '遥感影像',
+            'spatial_scale': rng.random(),
+            'position_accuracy': rng.random(),
+            'content_sensitivity': rng.random(),
+            'data_flow': rng.random(),
+            'historical_risk': rng.random(),
+            'lifecycle_stage': rng.choice(stages),
+            'security_score': rng.random(),
+            'security_level': rng.choice(levels),
+            'created_at': now,
+            'updated_at': now
+        } for offset in range(min(10000, rows - start))])
+        db.session.commit()
+
+def legacy_data_objects():
+    """原 GET /api/data-objects 实现"""
+    from flask import current_app
+    from flask.json.provider import DefaultJSONProvider
+    from app import DataObject
+
+    objects = DataObject.query.all()
+    return DefaultJSONProvider(current_app._get_current_object()).response([{
+        'id': obj.id,
+        'name': obj.name,
+        'data_type': obj.data_type,
+        'spatial_scale': obj.spatial_scale,
+        'position_accuracy': obj.position_accuracy,
+        'content_sensitivity': obj.content_sensitivity,
+        'data_flow': obj.data_flow,
+        'historical_risk': obj.historical_risk,
+        'lifecycle_stage': obj.lifecycle_stage,
+        'security_score': obj.security_score,
+        'security_level': obj.security_level,
+        'created_at': obj.created_at.isoformat(),
+        'updated_at': obj.updated_at.isoformat()
+    } for obj in objects])
+
+def measure(client, url, repeat):
+    """返回 (耗时中位数, 响应字节数)"""
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+        size = len(response.data)
+    return statistics.median(timings), size
+
+def main():
+    parser = argparse.ArgumentParser(description='列表接口基准测试')
+    parser.add_argument('--rows', type=int, default=100000, help='数据对象条数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种实现的请求次数（取中位数）')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='dsqds-bench-')
+    os.environ['DSQDS_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+
+    from app import create_app
+    from migrations import upgrade_database
+
+    app = create_app()
+    app.add_url_rule('/benchmark/legacy/data-objects', view_func=legacy_data_objects)
+    with app.app_context():
+        upgrade_database()
+        seed(args.rows)
+
+    client = app.test_client()
+    print(f"GET /api/data-objects，{args.rows} 条，每种实现 {args.repeat} 次取中位数")
+
+    baseline, baseline_size = measure(client, '/benchmark/legacy/data-objects', args.repeat)
+    print(f"  原实现 (ORM + json):        {baseline * 1000:8.1f} ms  {baseline_size / 1e6:.1f} MB")
+
+    encoders = ['orjson', 'json'] if app.json.use_orjson else ['json']
+    for encoder in encoders:
+        app.json.use_orjson = encoder == 'orjson'
+        elapsed, size = measure(client, '/api/data-objects', args.repeat)
+        label = f'Core + {encoder}:'
+        print(f"  {label:<27} {elapsed * 1000:8.1f} ms  {size / 1e6:.1f} MB  ×{baseline / elapsed:.1f}")
+
+if __name__ == '__main__':
+    main()
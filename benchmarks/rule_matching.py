@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+规则匹配基准测试：索引匹配 vs 线性扫描
+
+用法: python -m benchmarks.rule_matching [--objects 2000] [--sizes 10 1000 10000]
+"""
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app import SecurityRuleEngine, CompiledRule, RuleSet
+
+STAGES = ['采集', '传输', '存储', '共享', '应用']
+LEVELS = ['核心数据', '重要数据', '一般数据', '公开数据']
+DATA_TYPES = [f'专题数据{i:03d}' for i in range(200)] + ['遥感影像', '基础地理信息', '传感器数据']
+NUMERIC = list(SecurityRuleEngine.NUMERIC_ATTRIBUTES)
+
+def random_leaf(rng):
+    """随机生成一个叶子条件"""
+    kind = rng.random()
+    if kind < 0.15:
+        return {'type': 'lifecycle_stage', 'stage': rng.choice(STAGES)}
+    if kind < 0.25:
+        return {'type': 'security_level', 'level': rng.choice(LEVELS)}
+    if kind < 0.55:
+        return {'type': 'data_type', 'value': rng.choice(DATA_TYPES)}
+    return {'type': rng.choice(NUMERIC), 'threshold': round(rng.uniform(0.5, 1.0), 2)}
+
+def random_condition(rng):
+    """随机生成站点规则条件，约三成为复合规则"""
+    kind = rng.random()
+    if kind < 0.25:
+        return {'type': 'composite', 'conditions': [random_leaf(rng) for _ in range(rng.randint(2, 3))]}
+    if kind < 0.30:
+        return {'type': 'composite', 'operator': 'OR', 'conditions': [random_leaf(rng) for _ in range(2)]}
+    return random_leaf(rng)
+
+def build_rule_set(size, rng):
+    """构建指定规模的编译规则集"""
+    rules = []
+    for i in range(size):
+        condition = random_condition(rng)
+        rules.append(CompiledRule(
+            f'B{i:05d}',
+            rng.randint(1, 5),
+            condition,
+            SecurityRuleEngine.compile_condition(condition),
+            {'type': 'benchmark'}
+        ))
+    rules.sort(key=lambda rule: -rule.priority)
+    return RuleSet(rules)
+
+def random_object(rng):
+    """随机生成数据对象"""
+    values = {name: round(rng.random(), 3) for name in NUMERIC}
+    return SimpleNamespace(
+        data_type=rng.choice(DATA_TYPES),
+        lifecycle_stage=rng.choice(STAGES),
+        security_level=rng.choice(LEVELS),
+        **values
+    )
+
+def time_matcher(matcher, objects):
+    """返回每个对象的平均匹配耗时（微秒）"""
+    start = time.perf_counter()
+    for obj in objects:
+        matcher(obj)
+    return (time.perf_counter() - start) / len(objects) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='规则匹配基准测试')
+    parser.add_argument('--objects', type=int, default=2000, help='每个规模下评估的对象数')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000], help='规则数量')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    objects = [random_object(rng) for _ in range(args.objects)]
+    
+    print(f"{'规则数':>8} {'线性(us/对象)':>14} {'索引(us/对象)':>14} {'加速比':>8} {'平均候选':>10}")
+    for size in args.sizes:
+        rule_set = build_rule_set(size, rng)
+        
+        # 两种匹配方式结果必须一致（包括顺序）
+        for obj in objects[:200]:
+            linear = [rule.rule_id for rule in rule_set.match_linear(obj)]
+            indexed = [rule.rule_id for rule in rule_set.match(obj)]
+            assert linear == indexed, f'匹配结果不一致: {linear} != {indexed}'
+        
+        linear_us = time_matcher(rule_set.match_linear, objects)
+        indexed_us = time_matcher(rule_set.match, objects)
+        avg_candidates = sum(len(rule_set.candidates(obj)) for obj in objects) / len(objects)
+        print(f"{size:>8} {linear_us:>14.1f} {indexed_us:>14.1f} {linear_us / indexed_us:>7.1f}x {avg_candidates:>10.1f}")
+
+if __name__ == '__main__':
+    main()
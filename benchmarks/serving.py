@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程服务负载测试：不同工作进程数下的吞吐与延迟
+
+在临时 SQLite 库（WAL）上依次以 --workers 1、2、4… 启动 run.py 生产模式，由多个客户端进程
+发送混合请求（批量评估、列表查询、创建数据对象），统计每秒请求数、延迟分位与错误数。
+创建请求跨进程并发写入同一个库，用于检验 WAL 与锁等待配置。
+
+用法: python -m benchmarks.serving [--workers 1,2,4] [--clients 8] [--seconds 10] [--threads 4]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def batch_body(rng, size=200):
+    return json.dumps({'data_objects': [{
+        'name': f'评估对象{i}',
+        'spatial_scale': rng.random(),
+        'position_accuracy': rng.random(),
+        'content_sensitivity': rng.random(),
+        'data_flow': rng.random(),
+        'historical_risk': rng.random()
+    } for i in range(size)]})
+
+def client(port, seconds, write_ratio, seed, queue):
+    """单个客户端进程：保持长连接循环发送请求，返回 (延迟列表, 错误数)"""
+    rng = random.Random(seed)
+    body = batch_body(rng)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < write_ratio:
+            request = ('POST', '/api/data-objects', json.dumps({
+                'name': f'负载对象{rng.random():.6f}', 'data_type': '遥感影像',
+                'spatial_scale': rng.random(), 'content_sensitivity': rng.random()
+            }))
+        elif roll < 0.5:
+            request = ('POST', '/api/batch-assessment', body)
+        else:
+            request = ('GET', '/api/data-objects?limit=100', None)
+        start = time.perf_counter()
+        try:
+            method, url, payload = request
+            connection.request(method, url, body=payload, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    queue.put((latencies, errors))
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/weights')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError('服务启动超时')
+
+def run_level(workers, args, env):
+    """启动指定工作进程数的服务并施加负载"""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'run.py'), '--workers', str(workers), '--threads', str(args.threads),
+         '--port', str(args.port), '--no-browser'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(args.port)
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client, args=(args.port, args.seconds, args.write_ratio, seed, queue))
+            for seed in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        results = [queue.get() for _ in clients]
+        for process in clients:
+            process.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(latency for items, _ in results for latency in items)
+    errors = sum(count for _, count in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        'rps': len(latencies) / args.seconds,
+        'p50': quantiles[49] * 1000,
+        'p95': quantiles[94] * 1000,
+        'errors': errors
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程服务负载测试')
+    parser.add_argument('--workers', default='1,2,4', help='依次测试的工作进程数，逗号分隔')
+    parser.add_argument('--threads', type=int, default=4, help='每个工作进程的线程数')
+    parser.add_argument('--clients', type=int, default=8, help='并发客户端进程数')
+    parser.add_argument('--seconds', type=float, default=10, help='每轮持续时间（秒）')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='创建数据对象请求的比例')
+    parser.add_argument('--port', type=int, default=3901, help='测试端口')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='dsqds-bench-')
+    env = dict(os.environ, DSQDS_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    subprocess.run(
+        [sys.executable, '-c', 'import init_data; init_data.init_database()'],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+    print(f"CPU核数 {os.cpu_count()}，{args.clients} 个客户端，每轮 {args.seconds:.0f}s，写请求比例 {args.write_ratio:.0%}")
+    print(f"  {'工作进程':<8} {'请求/秒':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'错误':>6}  加速比")
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(',')]:
+        result = run_level(workers, args, env)
+        baseline = baseline or result['rps']
+        print(f"  {workers:<12} {result['rps']:>10.1f} {result['p50']:>10.1f} {result['p95']:>10.1f} {result['errors']:>6}  "
+              f"×{result['rps'] / baseline:.2f}")
+
+if __name__ == '__main__':
+    main()
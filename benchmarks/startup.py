@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+
+- 冷启动：新解释器中导入 app 并调用 create_app()，对比仅导入 Flask + SQLAlchemy 的下限
+- 冷启动首个请求：新解释器中创建应用并完成一次 GET /api/weights（不使用 preload 的工作进程）
+- fork 首个请求：已预热的进程 fork 出子进程并完成一次请求（run.py --workers N --preload 的工作进程）
+- 测试初始化：同一进程内以独立的临时库反复 create_app() + 建表
+
+用法: python -m benchmarks.startup [--repeat 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code, env, repeat):
+    """返回新解释器执行 code 的耗时中位数（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def forked_request(app, repeat):
+    """返回 fork 子进程完成首个请求的耗时中位数（秒）"""
+    from app import db
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            with app.app_context():
+                db.engine.dispose(close=False)  # 不复用父进程的连接
+            status = app.test_client().get('/api/weights').status_code
+            os._exit(0 if status == 200 else 1)
+        _, code = os.waitpid(pid, 0)
+        timings.append(time.perf_counter() - start)
+        assert code == 0, code
+    return statistics.median(timings)
+
+def test_setup(directory, repeat):
+    """返回同一进程内 create_app() + 建表的耗时中位数（秒）"""
+    from app import create_app, db
+
+    timings = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, f'test{index}.db')}", 'TESTING': True})
+        with app.app_context():
+            db.create_all()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--repeat', type=int, default=10, help='每项测量次数（取中位数）')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='dsqds-bench-')
+    os.environ['DSQDS_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    env = dict(os.environ)
+    subprocess.run(
+        [sys.executable, '-c', 'import init_data; init_data.init_database()'],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+    print(f"启动耗时（{args.repeat} 次取中位数）")
+    floor = run_python('import flask, flask_sqlalchemy', env, args.repeat)
+    print(f"  导入 Flask + SQLAlchemy（下限）: {floor * 1000:8.1f} ms")
+    cold = run_python('from app import create_app; create_app()', env, args.repeat)
+    print(f"  冷启动 create_app():            {cold * 1000:8.1f} ms")
+    loaded = subprocess.run(
+        [sys.executable, '-c', "import sys; from app import create_app; create_app(); print('numpy' in sys.modules)"],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout.strip()
+    print(f"    （创建应用后已加载 NumPy: {loaded}）")
+    cold_request = run_python(
+        "from app import create_app; assert create_app().test_client().get('/api/weights').status_code == 200",
+        env, args.repeat
+    )
+    print(f"  冷启动 + 首个请求:              {cold_request * 1000:8.1f} ms")
+
+    from app import create_app
+    from server import warm_up
+    app = create_app()
+    warm_up(app)
+    app.test_client().get('/api/weights')
+    print(f"  fork 预热进程 + 首个请求:       {forked_request(app, args.repeat) * 1000:8.1f} ms")
+    print(f"  测试初始化 create_app() + 建表: {test_setup(directory, args.repeat) * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
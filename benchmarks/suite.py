@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内基准测试套件：引擎函数与全部 /api/* 接口
+
+每个语料规模在独立子进程中运行：新建临时 SQLite 库，写入默认数据后用 generate_corpus 生成指定数量的
+数据对象（每对象平均 2 条安全事件），再通过测试客户端逐项测量。每项至少执行 --min-ops 次且持续
+--seconds 秒，记录每秒操作数（执行次数 ÷ 墙钟总耗时）与 p50/p95/p99 延迟，结果写入 JSON，可用 --compare 与之前的结果对比。
+
+写操作在只读项之后执行；触发后台任务的接口在下一项开始前等待任务结束，延迟只计请求耗时，每秒操作数包含等待时间。
+
+用法: python -m benchmarks.suite [--sizes 1000,100000,1000000] [--seconds 2] [--output results.json]
+                                 [--compare baseline.json]
+"""
+
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# --compare 时视为回退的每秒操作数降幅
+REGRESSION_RATIO = 0.9
+
+def summarize(name, latencies, elapsed):
+    """单项结果：每秒操作数（按墙钟总耗时计算）与延迟分位（毫秒）"""
+    count = len(latencies)
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'name': name,
+        'ops': count,
+        'ops_per_sec': count / elapsed if elapsed else None,
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000
+    }
+
+class Runner:
+    """按时间预算重复执行各测试项"""
+
+    def __init__(self, seconds, min_ops):
+        self.seconds = seconds
+        self.min_ops = min_ops
+        self.results = []
+
+    def measure(self, name, operation, after=None):
+        """重复调用 operation(序号)；after 不计入单次延迟（如等待后台任务），但计入每秒操作数的墙钟时间"""
+        latencies = []
+        started = time.perf_counter()
+        deadline = started + self.seconds
+        while len(latencies) < self.min_ops or time.perf_counter() < deadline:
+            start = time.perf_counter()
+            outcome = operation(len(latencies))
+            latencies.append(time.perf_counter() - start)
+            if after:
+                after(outcome)
+        result = summarize(name, latencies, time.perf_counter() - started)
+        self.results.append(result)
+        print(f"  {name:<44} {result['ops_per_sec'] or 0:>12,.1f} ops/s  p50 {result['p50_ms']:>9.3f}  "
+              f"p95 {result['p95_ms']:>9.3f}  p99 {result['p99_ms']:>9.3f} ms", flush=True)
+
+    def request(self, name, client, method, url, payload=None, after=None, status=200, **kwargs):
+        """测量一个接口；url / payload 可为以序号为参数的函数"""
+        def operation(index):
+            target = url(index) if callable(url) else url
+            body = payload(index) if callable(payload) else payload
+            response = client.open(target, method=method, json=body, **kwargs)
+            response.get_data()
+            assert response.status_code == status, (name, response.status_code, response.get_data(as_text=True)[:200])
+            return response
+        self.measure(name, operation, after)
+
+def attribute_samples(rng, count):
+    return [
+        {name: round(rng.random(), 3) for name in ('spatial_scale', 'position_accuracy', 'content_sensitivity', 'data_flow', 'historical_risk')}
+        for _ in range(count)
+    ]
+
+def engine_cases(runner, rng):
+    """引擎函数：评分、定级、规则执行、动态分级"""
+    from app import db, DataObject, SecurityQuantificationEngine, DynamicClassificationEngine, SecurityRuleEngine
+    from app import weight_cache
+
+    samples = attribute_samples(rng, 1000)
+    runner.measure('engine.calculate_security_score', lambda index: SecurityQuantificationEngine.calculate_security_score(
+        **samples[index % len(samples)]
+    ))
+    scores = [rng.random() for _ in range(1000)]
+    runner.measure('engine.determine_security_level', lambda index: SecurityQuantificationEngine.determine_security_level(
+        scores[index % len(scores)]
+    ))
+
+    columns = [column.name for column in DataObject.__table__.columns]
+    rows = db.session.execute(db.select(DataObject.__table__).order_by(db.func.random()).limit(1000)).all()
+    objects = [SimpleNamespace(**dict(zip(columns, row))) for row in rows]
+    context = {'external_threats': [{'threat_level': 'medium', 'risk_level': 0.5}]}
+    runner.measure('engine.execute_rules', lambda index: SecurityRuleEngine.execute_rules(objects[index % len(objects)], context))
+    threats = [{'impact': 0.1}, {'impact': 0.05}]
+    stage_risks = DynamicClassificationEngine.load_stage_risks()
+    runner.measure('engine.adjust_classification', lambda index: DynamicClassificationEngine.adjust_classification(
+        objects[index % len(objects)], threats, stage_risks
+    ))
+
+    weights, _ = weight_cache.snapshot()
+    batch = attribute_samples(rng, 1000)
+    runner.measure('engine.assess_batch[1000]', lambda index: SecurityQuantificationEngine.assess_batch(batch, weights))
+    db.session.remove()
+
+def wait_for_job(response):
+    """等待接口启动的后台任务结束，避免影响后续测试项"""
+    from jobs import job_registry
+
+    body = response.get_json()
+    job = job_registry.get(body.get('job_id') or body.get('rescore_job_id'))
+    while job is not None and not job.finished:
+        time.sleep(0.05)
+
+def read_stream(client):
+    """打开 SSE 连接，读到首个数据块后断开"""
+    response = client.get('/api/stream', buffered=False)
+    assert response.status_code == 200, response.status_code
+    next(response.response)
+    response.close()
+    return response
+
+def endpoint_cases(runner, client, rng):
+    """全部 /api/* 接口：先只读，后写入"""
+    from app import db, DataObject, SecurityEvent
+
+    with client.application.app_context():
+        max_id = db.session.query(db.func.max(DataObject.id)).scalar()
+        latest_event = db.session.query(db.func.max(SecurityEvent.event_time)).scalar()
+    window_start = (latest_event.replace(day=1)).isoformat()
+
+    # 只读接口
+    runner.request('GET /api/data-objects?limit=100', client, 'GET', '/api/data-objects?limit=100')
+    runner.request('GET /api/data-objects?limit=5000&fields=...', client, 'GET',
+                   '/api/data-objects?limit=5000&fields=id,name,security_score,security_level')
+    first = client.get('/api/data-objects?limit=100')
+    runner.request('GET /api/data-objects?cursor=', client, 'GET',
+                   f"/api/data-objects?limit=100&cursor={first.headers['X-Next-Cursor']}")
+    runner.request('GET /api/data-objects (304)', client, 'GET', '/api/data-objects?limit=100',
+                   status=304, headers={'If-None-Match': first.headers['ETag']})
+    runner.request('GET /api/data-objects?since=', client, 'GET', '/api/data-objects?since=')
+    runner.request('GET /api/threats', client, 'GET', '/api/threats')
+    runner.request('GET /api/weights', client, 'GET', '/api/weights')
+    runner.request('GET /api/rules', client, 'GET', '/api/rules')
+    runner.request('GET /api/events', client, 'GET', '/api/events')
+    runner.request('GET /api/events?since=', client, 'GET', '/api/events?since=')
+    runner.request('GET /api/events?start=&end=', client, 'GET',
+                   f'/api/events?start={window_start}&end={latest_event.isoformat()}&limit=100')
+    runner.request('GET /api/analytics/dashboard', client, 'GET', '/api/analytics/dashboard')
+    runner.request('GET /api/jobs', client, 'GET', '/api/jobs')
+    runner.request('GET /api/system/event-sink', client, 'GET', '/api/system/event-sink')
+    runner.request('GET /api/system/stream', client, 'GET', '/api/system/stream')
+    runner.measure('GET /api/stream (first chunk)', lambda index: read_stream(client))
+    runner.request('GET /api/export/data-objects', client, 'GET', '/api/export/data-objects')
+    runner.request('GET /api/export/events', client, 'GET', '/api/export/events')
+    runner.request('GET /api/export/data-objects?format=csv', client, 'GET', '/api/export/data-objects?format=csv')
+
+    batch = {'data_objects': [dict(sample, name=f'评估对象{i}') for i, sample in enumerate(attribute_samples(rng, 1000))]}
+    runner.request('POST /api/batch-assessment[1000]', client, 'POST', '/api/batch-assessment', batch)
+
+    # 写接口
+    def new_object(index):
+        return dict(attribute_samples(rng, 1)[0], name=f'基准对象{index}', data_type='遥感影像', lifecycle_stage='共享')
+
+    runner.request('POST /api/data-objects', client, 'POST', '/api/data-objects', new_object)
+    bulk = [new_object(index) for index in range(1000)]
+    runner.request('POST /api/data-objects/bulk[1000]', client, 'POST', '/api/data-objects/bulk', {'data_objects': bulk})
+    runner.request('PUT /api/data-objects/<id>', client, 'PUT', lambda index: f'/api/data-objects/{rng.randint(1, max_id)}',
+                   lambda index: dict(attribute_samples(rng, 1)[0], external_threats=[{'impact': 0.2}]))
+    runner.request('DELETE /api/data-objects/<id>', client, 'DELETE', lambda index: f'/api/data-objects/{max_id - index}')
+    runner.request('POST /api/threats', client, 'POST', '/api/threats', lambda index: {
+        'threat_id': f'BENCH{index:06d}', 'stage': '共享', 'threat_type': '越权访问', 'risk_level': 0.6
+    })
+    runner.request('POST /api/rules', client, 'POST', '/api/rules', lambda index: {
+        'rule_id': f'BENCH{index:06d}', 'condition_type': '环节规则', 'priority': 1,
+        'condition_json': json.dumps({'type': 'lifecycle_stage', 'stage': '共享'}),
+        'action_json': json.dumps({'type': 'audit', 'description': '基准测试'})
+    })
+    weights = client.get('/api/weights').get_json()
+    runner.request('PUT /api/weights', client, 'PUT', '/api/weights', [
+        {'indicator_name': item['indicator_name'], 'weight': item['weight']} for item in weights
+    ], after=wait_for_job)
+    jobs = []
+    runner.request('POST /api/jobs/reclassify', client, 'POST', '/api/jobs/reclassify',
+                   after=lambda response: (jobs.append(response.get_json()['job_id']), wait_for_job(response)))
+    runner.request('GET /api/jobs/<id>', client, 'GET', lambda index: f'/api/jobs/{jobs[index % len(jobs)]}')
+
+def run_size(size, args):
+    """在当前进程中对一个语料规模执行全部测试项，结果写入 args.part"""
+    from app import create_app, db
+    from migrations import upgrade_database
+    from seed_data import seed_database
+    from generate_corpus import generate_corpus
+    from event_sink import event_sink
+
+    directory = tempfile.mkdtemp(prefix='dsqds-bench-')
+    try:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}", 'TESTING': True})
+        try:
+            started = time.perf_counter()
+            with app.app_context():
+                upgrade_database()
+                seed_database()
+                generate_corpus(size, seed=args.seed, end=datetime(2026, 1, 1))
+            setup_seconds = time.perf_counter() - started
+            print(f"📦 语料 {size} 个对象，准备耗时 {setup_seconds:.1f}s", flush=True)
+
+            runner = Runner(args.seconds, args.min_ops)
+            rng = random.Random(args.seed)
+            with app.app_context():
+                engine_cases(runner, rng)
+            endpoint_cases(runner, app.test_client(), rng)
+        finally:
+            # 先关闭事件写入器并释放连接池，再删除临时库目录
+            event_sink.get(app).close()
+            with app.app_context():
+                db.engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    with open(args.part, 'w', encoding='utf-8') as handle:
+        json.dump({'size': size, 'setup_seconds': setup_seconds, 'cases': runner.results}, handle, ensure_ascii=False)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """与之前的结果逐项对比每秒操作数，返回回退项数"""
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    previous = {
+        (run['size'], case['name']): case for run in baseline['results'] for case in run['cases']
+    }
+    regressions = 0
+    print(f"\n对比 {baseline_path}（{(baseline['meta'].get('commit') or '')[:10]}）")
+    for run in results:
+        for case in run['cases']:
+            old = previous.get((run['size'], case['name']))
+            if not old or not old['ops_per_sec'] or not case['ops_per_sec']:
+                continue
+            ratio = case['ops_per_sec'] / old['ops_per_sec']
+            marker = '⚠️ ' if ratio < REGRESSION_RATIO else '  '
+            regressions += ratio < REGRESSION_RATIO
+            print(f"{marker}[{run['size']}] {case['name']:<44} ×{ratio:.2f}  "
+                  f"p95 {old['p95_ms']:.3f} → {case['p95_ms']:.3f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='进程内基准测试套件')
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='语料规模（数据对象数），逗号分隔')
+    parser.add_argument('--seconds', type=float, default=2.0, help='每项最短持续时间（秒）')
+    parser.add_argument('--min-ops', type=int, default=3, help='每项最少执行次数')
+    parser.add_argument('--seed', type=int, default=42, help='语料与请求参数的随机种子')
+    parser.add_argument('--output', default='benchmark-results.json', help='结果 JSON 文件')
+    parser.add_argument('--compare', help='对比的历史结果 JSON 文件')
+    parser.add_argument('--part', help=argparse.SUPPRESS)  # 子进程内部使用：单个规模的结果文件
+    args = parser.parse_args()
+
+    if args.part:
+        run_size(int(args.sizes), args)
+        return
+
+    results = []
+    for size in [int(value) for value in args.sizes.split(',')]:
+        handle, part = tempfile.mkstemp(prefix='dsqds-bench-', suffix='.json')
+        os.close(handle)
+        # 每个规模在独立进程中运行，互不共享缓存、连接池与后台线程
+        subprocess.run([
+            sys.executable, '-m', 'benchmarks.suite', '--sizes', str(size), '--seconds', str(args.seconds),
+            '--min-ops', str(args.min_ops), '--seed', str(args.seed), '--part', part
+        ], cwd=ROOT, check=True)
+        with open(part, encoding='utf-8') as handle:
+            results.append(json.load(handle))
+        os.remove(part)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seconds': args.seconds,
+            'min_ops': args.min_ops,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已写入 {args.output}")
+
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
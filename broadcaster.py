@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS实时推送
+每个进程一个轮询线程跟踪版本计数器，版本变化时读取新增安全事件、分级变化的数据对象与汇总表增量，
+写入环形缓冲区并唤醒全部订阅者；SSE 连接只在条件变量上等待，不访问数据库。
+等待期间连接仍占用服务器的一个执行单元：gevent 工作模式下是一个协程，gthread 模式下是一个线程
+（此时连接数受线程数限制，见 server.py）。
+本进程提交事务时立即唤醒轮询线程，其他进程的写入在下一个轮询周期内被发现。
+每个应用有各自的轮询线程与缓冲区（broadcaster 转发给当前应用的实例）。
+"""
+
+from collections import deque
+import os
+import random
+import threading
+import time
+import uuid
+
+from app import db, DataObject, SecurityEvent, read_versions
+from app import DATA_OBJECTS_VERSION, THREATS_VERSION, EVENTS_VERSION, rule_cache
+from extensions import AppLocal
+import aggregates
+
+WATCHED_VERSIONS = (DATA_OBJECTS_VERSION, THREATS_VERSION, EVENTS_VERSION, rule_cache.version_name)
+EVENT_FIELDS = ('id', 'event_id', 'data_object_id', 'trigger_condition', 'executed_strategy', 'result', 'event_time')
+OBJECT_FIELDS = ('id', 'name', 'data_type', 'lifecycle_stage', 'security_score', 'security_level', 'updated_at')
+HEARTBEAT_SECONDS = 15
+# 连接数已满时让客户端在该范围内随机等待（毫秒）后重连，错开重连高峰
+BUSY_RETRY_MS = (5000, 15000)
+
+class Subscription:
+    """一个 SSE 连接；WSGI 服务器结束响应时调用 close() 释放连接名额"""
+
+    def __init__(self, broadcaster, cursor, resync):
+        self.broadcaster = broadcaster
+        self.cursor = cursor
+        self.resync = resync
+        self._closed = False
+
+    def __iter__(self):
+        return self.broadcaster._events(self)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.broadcaster._release()
+
+class Broadcaster:
+    """进程内 SSE 广播：单轮询线程 + 环形缓冲区 + 条件变量"""
+
+    def __init__(self, poll_interval=1.0, buffer_size=1000, max_clients=100, max_seconds=300, object_limit=500):
+        self.poll_interval = poll_interval  # 无提交通知时的轮询间隔（秒）
+        self.max_clients = max_clients  # 本进程最多同时保持的连接数
+        self.max_seconds = max_seconds  # 单个连接最长保持时间，到期由客户端自动重连
+        self.object_limit = object_limit  # 单次推送的数据对象变更上限，超出时通知客户端整体刷新
+        self._buffer = deque(maxlen=buffer_size)  # (序号, 事件类型, JSON文本)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._clients = 0
+        self._thread = None
+        self._pid = None
+        self._hooked = False
+        self.app = None
+        self.token = uuid.uuid4().hex[:8]  # 进程标识，重连到其他进程时据此判断需整体刷新
+        self.stats = {'published': 0, 'polls': 0, 'connections': 0, 'rejected': 0}
+
+    def init_app(self, app):
+        """绑定应用并读取推送配置（create_app 中经 broadcaster.init_app 调用）"""
+        self.app = app
+        self.poll_interval = app.config.get('STREAM_POLL_INTERVAL', self.poll_interval)
+        self.max_clients = app.config.get('STREAM_MAX_CLIENTS', self.max_clients)
+        self.max_seconds = app.config.get('STREAM_MAX_SECONDS', self.max_seconds)
+
+    def busy_response(self):
+        """连接数已满时的 SSE 响应体：只下发重连间隔后结束，EventSource 按 retry 自动重连
+
+        （非 200 响应会使 EventSource 永久放弃重连）
+        """
+        return f'retry: {random.randint(*BUSY_RETRY_MS)}\nevent: busy\ndata: {{}}\n\n'
+
+    def subscribe(self, last_event_id=None):
+        """登记一个连接，连接数已满时返回 None"""
+        with self._lock:
+            if self._clients >= self.max_clients:
+                self.stats['rejected'] += 1
+                return None
+            self._clients += 1
+            self.stats['connections'] += 1
+        self._ensure_started()
+
+        with self._condition:
+            cursor = self._seq
+            resync = False
+            if last_event_id:
+                token, _, seq = last_event_id.partition('-')
+                oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+                if token == self.token and seq.isdigit() and int(seq) + 1 >= oldest:
+                    cursor = int(seq)  # 从缓冲区补发断线期间的消息
+                else:
+                    resync = True
+        return Subscription(self, cursor, resync)
+
+    def publish(self, event_type, payload):
+        """追加一条消息并唤醒全部订阅者"""
+        data = self.app.json.dumps(payload, sort_keys=False)
+        with self._condition:
+            self._seq += 1
+            self._buffer.append((self._seq, event_type, data))
+            self.stats['published'] += 1
+            self._condition.notify_all()
+
+    def wake(self):
+        """唤醒轮询线程（本进程有事务提交）"""
+        self._wake.set()
+
+    def metrics(self):
+        return dict(self.stats, clients=self._clients, buffered=len(self._buffer), seq=self._seq)
+
+    def _release(self):
+        with self._lock:
+            self._clients -= 1
+
+    def _events(self, subscription):
+        """生成 SSE 文本；仅在条件变量上等待，不访问数据库"""
+        yield 'retry: 3000\n\n'
+        if subscription.resync:
+            yield 'event: refresh\ndata: {}\n\n'
+
+        deadline = time.monotonic() + self.max_seconds
+        try:
+            while time.monotonic() < deadline:
+                with self._condition:
+                    if self._seq == subscription.cursor:
+                        self._condition.wait(timeout=HEARTBEAT_SECONDS)
+                    oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+                    items = [item for item in self._buffer if item[0] > subscription.cursor]
+
+                if subscription.cursor + 1 < oldest:
+                    # 客户端落后超过缓冲区容量
+                    yield f'id: {self.token}-{self._seq}\nevent: refresh\ndata: {{}}\n\n'
+                    subscription.cursor = self._seq
+                    continue
+                if not items:
+                    yield ': keepalive\n\n'
+                    continue
+                yield ''.join(f'id: {self.token}-{seq}\nevent: {event_type}\ndata: {data}\n\n' for seq, event_type, data in items)
+                subscription.cursor = items[-1][0]
+        finally:
+            subscription.close()
+
+    def _ensure_started(self):
+        # 惰性启动；fork 出的子进程中重新生成进程标识并启动轮询线程
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid is not None and self._pid != os.getpid():
+                    self.token = uuid.uuid4().hex[:8]
+                    self._buffer.clear()
+                self._pid = os.getpid()
+                self._install_commit_hook()
+                self._thread = threading.Thread(target=self._run, name='dsqds-broadcaster', daemon=True)
+                self._thread.start()
+
+    def _install_commit_hook(self):
+        if self._hooked:
+            return
+        from sqlalchemy import event
+        with self.app.app_context():
+            event.listen(db.engine, 'commit', lambda connection: self.wake())
+        self._hooked = True
+
+    def _run(self):
+        with self.app.app_context():
+            state = None
+            while True:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                if not self._clients:
+                    state = None  # 无订阅者时不轮询，下次有连接时重新建立基线
+                    continue
+                time.sleep(0.05)  # 合并短时间内的连续提交
+                try:
+                    if state is None:
+                        state = self._baseline()
+                    else:
+                        self._poll(state)
+                    self.stats['polls'] += 1
+                except Exception as e:
+                    print(f"实时推送轮询错误: {e}")
+                finally:
+                    db.session.remove()
+
+    def _baseline(self):
+        """记录当前版本、最新事件与汇总表，之后只推送增量"""
+        versions = read_versions(WATCHED_VERSIONS)
+        return {
+            'versions': versions,
+            'event_version': versions[EVENTS_VERSION][0],
+            'object_version': versions[DATA_OBJECTS_VERSION][0],
+            'aggregates': aggregates.load_aggregates()
+        }
+
+    def _poll(self, state):
+        versions = read_versions(WATCHED_VERSIONS)
+        changed = {name for name in WATCHED_VERSIONS if versions[name] != state['versions'][name]}
+        if not changed:
+            return
+        state['versions'] = versions
+
+        if EVENTS_VERSION in changed:
+            self._publish_events(state, versions[EVENTS_VERSION][0])
+        if DATA_OBJECTS_VERSION in changed:
+            self._publish_objects(state, versions[DATA_OBJECTS_VERSION][0])
+
+        current = aggregates.load_aggregates()
+        delta = [
+            {'category': category, 'key': key, 'count': count, 'value_sum': value_sum}
+            for (category, key), (count, value_sum) in current.items()
+            if category != aggregates.META and state['aggregates'].get((category, key)) != (count, value_sum)
+        ]
+        delta.extend(
+            {'category': category, 'key': key, 'count': 0, 'value_sum': 0.0}
+            for category, key in state['aggregates'].keys() - current.keys()
+        )
+        state['aggregates'] = current
+        if delta:
+            self.publish('aggregates', delta)
+
+    def _publish_events(self, state, version):
+        """推送行版本在 (上次版本, version] 内的安全事件，按 (版本号, 主键) 分页"""
+        columns = [getattr(SecurityEvent, field) for field in EVENT_FIELDS]
+        after = SecurityEvent.row_version > state['event_version']
+        while True:
+            rows = db.session.query(*columns, SecurityEvent.row_version, SecurityEvent.id).filter(
+                after, SecurityEvent.row_version <= version
+            ).order_by(SecurityEvent.row_version, SecurityEvent.id).limit(self.object_limit).all()
+            if rows:
+                self.publish('security_event', [dict(zip(EVENT_FIELDS, row)) for row in rows])
+            if len(rows) < self.object_limit:
+                break
+            last_version, last_id = rows[-1][-2], rows[-1][-1]
+            after = db.or_(
+                SecurityEvent.row_version > last_version,
+                db.and_(SecurityEvent.row_version == last_version, SecurityEvent.id > last_id)
+            )
+        state['event_version'] = version
+
+    def _publish_objects(self, state, version):
+        """推送行版本在 (上次版本, version] 内的数据对象；版本号随提交递增，不会遗漏或重复"""
+        columns = [getattr(DataObject, field) for field in OBJECT_FIELDS]
+        rows = db.session.query(*columns).filter(
+            DataObject.row_version > state['object_version'], DataObject.row_version <= version
+        ).order_by(DataObject.row_version, DataObject.id).limit(self.object_limit + 1).all()
+        state['object_version'] = version
+
+        if len(rows) > self.object_limit:
+            # 批量重新评分等大范围变更：通知客户端整体刷新
+            self.publish('refresh', {'reason': 'data_objects'})
+            return
+        if rows:
+            self.publish('data_objects', [dict(zip(OBJECT_FIELDS, row)) for row in rows])
+
+broadcaster = AppLocal('broadcaster', Broadcaster)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS仪表板汇总一致性检查脚本
+用法: python check_aggregates.py [--fix]
+"""
+
+import sys
+
+from app import create_app, db
+from aggregates import check_aggregates, rebuild_aggregates
+
+def main():
+    """检查汇总表偏差，--fix 时重建汇总表"""
+    fix = '--fix' in sys.argv[1:]
+    print("🔍 DSQDS仪表板汇总一致性检查")
+    print("=" * 50)
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        drift = check_aggregates()
+        
+        if not drift:
+            print("✅ 汇总表与明细表一致")
+            return 0
+        
+        print(f"⚠️  发现 {len(drift)} 项偏差:")
+        for category, key, (stored_count, stored_sum), (actual_count, actual_sum) in drift:
+            print(f"  - {category}/{key}: 存储 {stored_count} ({stored_sum:.4f}) ≠ 实际 {actual_count} ({actual_sum:.4f})")
+        
+        if fix:
+            rebuild_aggregates()
+            print("🔧 已从明细表重建汇总表")
+            return 0
+        
+        print("💡 运行 python check_aggregates.py --fix 重建汇总表")
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,13 +4,14 @@
 DSQDS系统数据检查脚本
 """
 
-from app import app, db, DataObject, SecurityEvent, SecurityRule, ThreatDatabase, WeightConfig
+from app import create_app, db, DataObject, SecurityEvent, SecurityRule, ThreatDatabase, WeightConfig
 
 def check_data():
     """检查数据库中的数据"""
     print("🔍 DSQDS系统数据检查")
     print("=" * 50)
     
+    app = create_app()
     with app.app_context():
         # 检查数据对象
         data_objects = DataObject.query.all()
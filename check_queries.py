@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS查询模式检查脚本
+在临时库上生成小规模合成数据，逐个请求全部 /api/* 接口（并等待请求启动的后台任务完成），
+同一请求或同一后台线程中规范化后相同的语句执行超过 --threshold 次即视为 N+1，存在时以非零状态退出，
+可放入 CI 防止新增的逐条查询。pytest 版本见 test_query_budget.py。
+
+用法: python check_queries.py [--threshold 3] [--objects 500] [-v]
+"""
+
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app import create_app, db, DataObject
+from diagnostics import query_budget, NPlusOneError
+
+def requests_to_check(max_id):
+    """(方法, URL, 请求体) 列表，写请求放在最后"""
+    objects = [{
+        'name': f'检查对象{i}', 'data_type': '遥感影像', 'lifecycle_stage': stage,
+        'spatial_scale': 0.9, 'position_accuracy': 0.8, 'content_sensitivity': 0.7 + i / 100, 'data_flow': 0.9
+    } for i, stage in enumerate(['采集', '传输', '存储', '共享', '应用'] * 20)]
+    return [
+        ('GET', '/api/data-objects?limit=100', None),
+        ('GET', '/api/data-objects?since=', None),
+        ('GET', '/api/threats', None),
+        ('GET', '/api/weights', None),
+        ('GET', '/api/rules', None),
+        ('GET', '/api/events', None),
+        ('GET', '/api/events?since=', None),
+        ('GET', '/api/events?start=2025-01-01T00:00:00&end=2026-01-01T00:00:00', None),
+        ('GET', '/api/analytics/dashboard', None),
+        ('GET', '/api/jobs', None),
+        ('GET', '/api/system/event-sink', None),
+        ('GET', '/api/system/stream', None),
+        ('GET', '/api/system/diagnostics', None),
+        ('GET', '/api/export/data-objects', None),
+        ('GET', '/api/export/events?format=csv', None),
+        ('GET', '/metrics', None),
+        ('POST', '/api/batch-assessment', {'data_objects': objects}),
+        ('POST', '/api/data-objects', objects[0]),
+        ('POST', '/api/data-objects/bulk', {'data_objects': objects}),
+        ('PUT', f'/api/data-objects/{max_id}', {'content_sensitivity': 0.1, 'external_threats': [{'impact': 0.3}]}),
+        ('DELETE', f'/api/data-objects/{max_id - 1}', None),
+        ('POST', '/api/threats', {'threat_id': 'CHECK001', 'stage': '共享', 'threat_type': '越权访问', 'risk_level': 0.6}),
+        ('POST', '/api/rules', {
+            'rule_id': 'CHECK001', 'condition_type': '环节规则',
+            'condition_json': json.dumps({'type': 'lifecycle_stage', 'stage': '共享'}),
+            'action_json': json.dumps({'type': 'audit', 'description': '检查'})
+        }),
+        ('PUT', '/api/weights', [
+            {'indicator_name': name, 'weight': weight}
+            for name, weight in {'S': 0.25, 'P': 0.2, 'C': 0.25, 'F': 0.15, 'H': 0.15}.items()
+        ]),
+        ('POST', '/api/jobs/reclassify', None),
+    ]
+
+def wait_for_jobs():
+    from jobs import job_registry
+    while any(not job.finished for job in job_registry.list()):
+        time.sleep(0.05)
+
+def create_check_app(objects, directory=None):
+    """在临时库上创建应用并生成合成数据，返回 (应用, 最大数据对象主键)"""
+    from migrations import upgrade_database
+    from seed_data import seed_database
+    from generate_corpus import generate_corpus
+
+    directory = directory or tempfile.mkdtemp(prefix='dsqds-check-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'check.db')}", 'TESTING': True, 'METRICS_ENABLED': True
+    })
+    with app.app_context():
+        upgrade_database()
+        seed_database()
+        generate_corpus(objects, seed=1, end=datetime(2026, 1, 1))
+        max_id = db.session.query(db.func.max(DataObject.id)).scalar()
+    return app, max_id
+
+def main():
+    parser = argparse.ArgumentParser(description='检查各接口是否存在 N+1 查询')
+    parser.add_argument('--threshold', type=int, default=3, help='同一请求中相同语句允许的最多执行次数')
+    parser.add_argument('--objects', type=int, default=500, help='合成数据对象数')
+    parser.add_argument('-v', '--verbose', action='store_true', help='列出每个请求（及其后台任务）执行的语句数')
+    args = parser.parse_args()
+
+    app, max_id = create_check_app(args.objects)
+    client = app.test_client()
+    failures = 0
+    print(f"🔍 检查 N+1 查询（同一语句最多 {args.threshold} 次）")
+    for method, url, body in requests_to_check(max_id):
+        try:
+            with query_budget(app, args.threshold) as recorder:
+                response = client.open(url, method=method, json=body)
+                response.get_data()
+                wait_for_jobs()  # 后台任务在块内完成，其语句计入本次检查
+        except NPlusOneError as e:
+            failures += 1
+            print(f"❌ {method} {url}\n{e}")
+            wait_for_jobs()
+            continue
+        if response.status_code >= 400:
+            failures += 1
+            print(f"❌ {method} {url}: HTTP {response.status_code}")
+        elif args.verbose:
+            threads = ', '.join(f'{log.label} {log.total}' for log in recorder.logs[1:] if log.label.startswith('<thread'))
+            print(f"✅ {method} {url}: {sum(log.total for log in recorder.logs)} 条语句" + (f"（{threads}）" if threads else ''))
+
+    if failures:
+        print(f"❌ {failures} 个请求未通过")
+        sys.exit(1)
+    print("✅ 未发现 N+1 查询")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS安全事件归档脚本
+将超出在线保留期（DSQDS_EVENT_HOT_MONTHS）的月份压缩归档，并清理超出归档保留期的文件，
+以及超出保留期（DSQDS_TOMBSTONE_DAYS）的增量同步墓碑。
+建议通过 cron 每日执行: python compact_events.py
+"""
+
+from datetime import datetime, timedelta
+
+from app import create_app, db, EventArchive, prune_tombstones
+from event_store import compact_expired_buckets, hot_cutoff, archive_dir
+from migrations import upgrade_database
+
+def main():
+    print("🗜️  DSQDS安全事件归档")
+    print("=" * 50)
+    
+    app = create_app()
+    with app.app_context():
+        upgrade_database()
+        print(f"在线保留起始: {hot_cutoff():%Y-%m}，归档目录: {archive_dir()}")
+        
+        compacted = compact_expired_buckets()
+        if compacted:
+            for bucket, count in compacted.items():
+                print(f"  ✓ {bucket}: 归档 {count} 条")
+        else:
+            print("✅ 没有需要归档的事件")
+        
+        total = sum(archive.row_count for archive in EventArchive.query.all())
+        print(f"\n📦 归档分片: {EventArchive.query.count()} 个，共 {total} 条事件")
+        
+        days = app.config['TOMBSTONE_RETENTION_DAYS']
+        pruned = prune_tombstones(datetime.utcnow() - timedelta(days=days))
+        db.session.commit()
+        print(f"🪦 清理 {days} 天前的同步墓碑: {sum(pruned.values())} 条")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS配置
+数据库地址与连接池参数从环境变量读取；SQLite 连接建立时统一设置 WAL 等 PRAGMA。
+
+环境变量:
+    DSQDS_DATABASE_URI          数据库地址，默认 sqlite:///dsqds.db（位于 instance 目录）
+    DSQDS_DB_POOL_SIZE          连接池大小（服务器数据库），默认 10
+    DSQDS_DB_MAX_OVERFLOW       连接池溢出上限，默认 20
+    DSQDS_DB_POOL_TIMEOUT       获取连接超时（秒），默认 30
+    DSQDS_DB_POOL_RECYCLE       连接回收周期（秒），默认 1800
+    DSQDS_SQLITE_JOURNAL_MODE   默认 WAL
+    DSQDS_SQLITE_SYNCHRONOUS    默认 NORMAL
+    DSQDS_SQLITE_BUSY_TIMEOUT   锁等待（毫秒），默认 5000
+    DSQDS_SQLITE_MMAP_SIZE      内存映射大小（字节），默认 268435456
+    DSQDS_SQLITE_CACHE_SIZE     页缓存（负数为KiB），默认 -65536
+    DSQDS_EVENT_QUEUE_SIZE      安全事件写入队列容量，默认 10000
+    DSQDS_EVENT_BATCH_SIZE      安全事件每批写入条数，默认 500
+    DSQDS_EVENT_FLUSH_MS        安全事件攒批最长等待（毫秒），默认 200
+    DSQDS_EVENT_HOT_MONTHS      安全事件在线保留的月份数（含当月），默认 3
+    DSQDS_EVENT_ARCHIVE_MONTHS  归档文件保留的月份数，0 表示永久保留，默认 0
+    DSQDS_EVENT_ARCHIVE_DIR     归档目录，默认 instance/event_archive
+    DSQDS_TOMBSTONE_DAYS        增量同步墓碑（删除记录）保留天数，早于保留期的同步游标需全量同步，默认 30
+    DSQDS_STREAM_POLL_MS        实时推送轮询间隔（毫秒），默认 1000
+    DSQDS_STREAM_MAX_CLIENTS    每个进程的实时推送连接上限，默认 100
+    DSQDS_STREAM_MAX_SECONDS    单个推送连接最长保持时间（秒），到期客户端自动重连，默认 300
+    DSQDS_JSON_ENCODER          JSON编码器 auto/orjson/json，auto 在安装了 orjson 时使用 orjson
+    DSQDS_METRICS               是否记录请求与 SQL 指标并提供 /metrics（无访问控制，需由网络隔离），默认 0
+    DSQDS_SERVER_TIMING         是否在响应头中输出 Server-Timing，默认 1
+    DSQDS_SLOW_QUERY_MS         慢查询日志阈值（毫秒），记录语句与执行计划，0 表示关闭，默认 0
+    DSQDS_N_PLUS_ONE            同一请求中相同语句执行超过该次数时告警（N+1 检测），0 表示关闭，默认 0
+"""
+
+import os
+
+DEFAULT_DATABASE_URI = 'sqlite:///dsqds.db'
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+def sqlite_pragmas():
+    """每个 SQLite 连接需执行的 PRAGMA（名称, 值）"""
+    return [
+        ('journal_mode', os.environ.get('DSQDS_SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', os.environ.get('DSQDS_SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', _env_int('DSQDS_SQLITE_BUSY_TIMEOUT', 5000)),
+        ('mmap_size', _env_int('DSQDS_SQLITE_MMAP_SIZE', 268435456)),
+        ('cache_size', _env_int('DSQDS_SQLITE_CACHE_SIZE', -65536)),
+    ]
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas=None):
+    """在新建的 DB-API 连接上执行 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas if pragmas is not None else sqlite_pragmas():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+def engine_options(uri):
+    """按数据库类型生成 SQLAlchemy 引擎参数"""
+    if is_sqlite(uri):
+        # SQLite 写入在库级别串行，等待由 busy_timeout 负责
+        return {'connect_args': {'timeout': _env_int('DSQDS_SQLITE_BUSY_TIMEOUT', 5000) / 1000}}
+    return {
+        'pool_size': _env_int('DSQDS_DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DSQDS_DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DSQDS_DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DSQDS_DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+def load_config(overrides=None):
+    """从环境变量生成 Flask 配置，overrides 中的项覆盖默认值"""
+    overrides = dict(overrides or {})
+    uri = overrides.get('SQLALCHEMY_DATABASE_URI') or os.environ.get('DSQDS_DATABASE_URI', DEFAULT_DATABASE_URI)
+    config = {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(uri),
+        'EVENT_SINK_MAX_QUEUE': _env_int('DSQDS_EVENT_QUEUE_SIZE', 10000),
+        'EVENT_SINK_BATCH_SIZE': _env_int('DSQDS_EVENT_BATCH_SIZE', 500),
+        'EVENT_SINK_FLUSH_INTERVAL': _env_int('DSQDS_EVENT_FLUSH_MS', 200) / 1000,
+        'EVENT_HOT_MONTHS': _env_int('DSQDS_EVENT_HOT_MONTHS', 3),
+        'EVENT_ARCHIVE_MONTHS': _env_int('DSQDS_EVENT_ARCHIVE_MONTHS', 0),
+        'EVENT_ARCHIVE_DIR': os.environ.get('DSQDS_EVENT_ARCHIVE_DIR'),
+        'TOMBSTONE_RETENTION_DAYS': _env_int('DSQDS_TOMBSTONE_DAYS', 30),
+        'STREAM_POLL_INTERVAL': _env_int('DSQDS_STREAM_POLL_MS', 1000) / 1000,
+        'STREAM_MAX_CLIENTS': _env_int('DSQDS_STREAM_MAX_CLIENTS', 100),
+        'STREAM_MAX_SECONDS': _env_int('DSQDS_STREAM_MAX_SECONDS', 300),
+        'JSON_ENCODER': os.environ.get('DSQDS_JSON_ENCODER', 'auto'),
+        'METRICS_ENABLED': bool(_env_int('DSQDS_METRICS', 0)),
+        'SERVER_TIMING': bool(_env_int('DSQDS_SERVER_TIMING', 1)),
+        'SLOW_QUERY_MS': _env_int('DSQDS_SLOW_QUERY_MS', 0),
+        'N_PLUS_ONE_THRESHOLD': _env_int('DSQDS_N_PLUS_ONE', 0),
+    }
+    config.update(overrides)
+    return config
+
+def install_engine_hooks(engine):
+    """为 SQLite 引擎注册连接钩子，使每个新连接都应用 PRAGMA"""
+    if engine.dialect.name != 'sqlite':
+        return
+    from sqlalchemy import event
+    
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
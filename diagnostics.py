@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS查询诊断（开发模式，默认关闭）
+- 慢查询日志：单条 SQL 超过 DSQDS_SLOW_QUERY_MS 毫秒时记录语句、参数、耗时与执行计划（EXPLAIN QUERY PLAN）
+- N+1 检测：同一请求中规范化后相同的语句执行超过 DSQDS_N_PLUS_ONE 次时告警
+
+语句按请求归组（记录在请求的 environ 中，流式响应体中执行的语句也计入该请求），请求之外按线程归组。
+测试中可用 query_budget() 包裹请求与后台任务，出现 N+1 时抛出 NPlusOneError：
+
+    with query_budget(app, threshold=3):
+        client.put('/api/weights', json=[...])
+        wait_for_jobs()  # 后台任务线程中的语句同样计入
+"""
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import re
+import threading
+
+from extensions import AppLocal
+from metrics import on_query
+
+logger = logging.getLogger('dsqds.diagnostics')
+
+# 规范化：字面量替换为 ?，IN 列表与多行 VALUES 折叠，空白合并
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+_REPEATED_TUPLES = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+
+# 每种记录保留的最近条数
+HISTORY_SIZE = 100
+
+def normalize_statement(statement):
+    """将语句规范化为模式，参数取值或 IN 列表长度不同的同类语句得到相同结果"""
+    statement = _LITERALS.sub('?', statement)
+    statement = _PLACEHOLDER_LISTS.sub('(?)', statement)
+    statement = _REPEATED_TUPLES.sub('(?)', statement)
+    return ' '.join(statement.split())
+
+class NPlusOneError(AssertionError):
+    """同一请求内重复执行相同语句的次数超过阈值"""
+
+class QueryLog:
+    """一个请求（或 query_budget 块中请求之外的一个线程）执行的语句统计"""
+
+    def __init__(self, label):
+        self.label = label
+        self.counts = Counter()  # 规范化语句 -> 次数
+        self.total = 0
+
+    def record(self, statement):
+        self.counts[normalize_statement(statement)] += 1
+        self.total += 1
+
+    def repeated(self, threshold):
+        """返回执行次数超过 threshold 的 [(规范化语句, 次数)]"""
+        return [(statement, count) for statement, count in self.counts.most_common() if count > threshold]
+
+class QueryRecorder:
+    """query_budget 块内按请求与线程分组记录语句（块内任何线程执行的语句都会记录）"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.outside = QueryLog('<outside request>')
+        self.logs = [self.outside]
+        self._lock = threading.Lock()
+        self._threads = {threading.get_ident(): self.outside}  # 线程 -> 请求之外的语句
+
+    def add(self, log):
+        with self._lock:
+            self.logs.append(log)
+        return log
+
+    def thread_log(self):
+        """当前线程在请求之外执行的语句（如后台任务、事件写入线程）"""
+        ident = threading.get_ident()
+        log = self._threads.get(ident)
+        if log is None:
+            with self._lock:
+                log = self._threads.get(ident)
+                if log is None:
+                    log = self._threads[ident] = QueryLog(f'<thread {threading.current_thread().name}>')
+                    self.logs.append(log)
+        return log
+
+    def violations(self):
+        with self._lock:
+            logs = list(self.logs)
+        return [
+            (log.label, statement, count)
+            for log in logs for statement, count in log.repeated(self.threshold)
+        ]
+
+# 请求的语句统计保存在 request.environ 中的键
+_ENVIRON_KEY = 'dsqds.query_log'
+
+class Diagnostics:
+    """慢查询日志 + N+1 检测"""
+
+    def __init__(self):
+        self.slow_query_seconds = None  # None 表示关闭
+        self.n_plus_one_threshold = 0  # 0 表示关闭
+        self.slow_queries = deque(maxlen=HISTORY_SIZE)
+        self.n_plus_one = deque(maxlen=HISTORY_SIZE)
+        self.recorder = None  # query_budget 块内的 QueryRecorder
+
+    @property
+    def enabled(self):
+        return self.slow_query_seconds is not None or self.n_plus_one_threshold > 0
+
+    def init_app(self, app):
+        """读取诊断配置（create_app 中经 diagnostics.init_app 调用）；均未开启时不注册任何钩子与数据库事件"""
+        slow_ms = app.config.get('SLOW_QUERY_MS') or 0
+        self.slow_query_seconds = slow_ms / 1000 if slow_ms > 0 else None
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD') or 0
+        if not self.enabled:
+            return
+        if self.n_plus_one_threshold:
+            app.teardown_request(self._teardown_request)
+        self.install(app)
+
+    def install(self, app):
+        """在应用的数据库引擎上注册语句监听（与运行指标共用 metrics.on_query 的计时事件）"""
+        from app import db
+
+        with app.app_context():
+            on_query(db.engine, self._record_query)
+
+    def report(self):
+        return {
+            'slow_query_ms': self.slow_query_seconds * 1000 if self.slow_query_seconds is not None else None,
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'slow_queries': list(self.slow_queries),
+            'n_plus_one': list(self.n_plus_one)
+        }
+
+    def _record_query(self, connection, statement, parameters, executemany, elapsed, failed):
+        if failed:
+            return
+        scope = self._scope()
+        if scope is not None:
+            scope.record(statement)
+        if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds:
+            self._log_slow_query(connection, statement, parameters, executemany, elapsed, scope)
+
+    def _scope(self):
+        """当前语句归属的统计：请求中为该请求的统计（首条语句时创建），请求之外仅在 query_budget 块内按线程记录"""
+        from flask import has_request_context, request
+
+        recorder = self.recorder
+        if not has_request_context():
+            return recorder.thread_log() if recorder is not None else None
+        if recorder is None and not self.n_plus_one_threshold:
+            return None
+        scope = request.environ.get(_ENVIRON_KEY)
+        if scope is None:
+            label = f'{request.method} {request.url_rule.rule if request.url_rule is not None else request.path}'
+            scope = request.environ[_ENVIRON_KEY] = QueryLog(label)
+            if recorder is not None:
+                recorder.add(scope)
+        return scope
+
+    def _log_slow_query(self, connection, statement, parameters, executemany, elapsed, scope):
+        plan = None
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            plan = self._explain(connection, statement, parameters)
+        entry = {
+            'statement': ' '.join(statement.split()),
+            'parameters': repr(parameters)[:500],
+            'duration_ms': round(elapsed * 1000, 3),
+            'plan': plan,
+            'route': scope.label if scope is not None else None,
+            'time': datetime.utcnow().isoformat()
+        }
+        self.slow_queries.append(entry)
+        logger.warning('慢查询 %.1f ms [%s]: %s\n  参数: %s\n  执行计划:\n    %s',
+                       entry['duration_ms'], entry['route'] or '-', entry['statement'], entry['parameters'],
+                       '\n    '.join(plan or ['（无）']))
+
+    @staticmethod
+    def _explain(connection, statement, parameters):
+        """在同一连接上获取执行计划（直接使用 DB-API 游标，不触发语句事件）"""
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            return [f'EXPLAIN 失败: {e}']
+        finally:
+            cursor.close()
+        if connection.dialect.name == 'sqlite':
+            return [str(row[-1]) for row in rows]  # (id, parent, notused, detail)
+        return [' '.join(str(value) for value in row) for row in rows]
+
+    def _teardown_request(self, exception=None):
+        # 流式响应在响应体生成完毕后才执行 teardown，统计包含响应体中的语句
+        from flask import request
+
+        scope = request.environ.pop(_ENVIRON_KEY, None)
+        if scope is None or self.recorder is not None:
+            return
+        for statement, count in scope.repeated(self.n_plus_one_threshold):
+            self.n_plus_one.append({
+                'route': scope.label, 'statement': statement, 'count': count, 'time': datetime.utcnow().isoformat()
+            })
+            logger.warning('疑似 N+1 [%s]: 同一语句执行 %d 次（阈值 %d）: %s',
+                           scope.label, count, self.n_plus_one_threshold, statement)
+
+diagnostics = AppLocal('diagnostics', Diagnostics)
+
+@contextmanager
+def query_budget(app, threshold=3):
+    """块内每个请求（及请求之外的每个线程）中，同一规范化语句最多执行 threshold 次，超出时在退出时抛出 NPlusOneError
+
+    不依赖诊断配置，适合在测试中使用；块内启动的后台任务需在块内等待完成才会计入。
+    返回的 QueryRecorder 可查看各请求与线程的语句统计。
+    """
+    instance = diagnostics.get(app)
+    instance.install(app)
+    recorder = QueryRecorder(threshold)
+    previous, instance.recorder = instance.recorder, recorder
+    try:
+        yield recorder
+    finally:
+        instance.recorder = previous
+    violations = recorder.violations()
+    if violations:
+        raise NPlusOneError('同一语句重复执行超过 {} 次:\n{}'.format(threshold, '\n'.join(
+            f'  [{label}] ×{count}: {statement}' for label, statement, count in violations
+        )))
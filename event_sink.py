@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS安全事件异步写入
+请求处理只将事件放入有界队列，由独立写线程按批量大小或时间间隔分组提交。
+每个应用有各自的队列与写线程（event_sink 转发给当前应用的实例）。
+"""
+
+from datetime import datetime
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+
+from flask import has_app_context
+
+from app import db, SecurityEvent, bump_version, EVENTS_VERSION
+from extensions import AppLocal
+from metrics import metrics
+
+_STOP = object()
+
+class EventSink:
+    """有界队列 + 单写线程的安全事件组提交器"""
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=0.2, put_timeout=5.0):
+        self.batch_size = batch_size  # 每批最多写入的事件数
+        self.flush_interval = flush_interval  # 攒批最长等待时间（秒）
+        self.put_timeout = put_timeout  # 队列满时生产者最长等待时间（秒）
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()  # 保护写线程启停与 stats（请求线程与写线程都会更新）
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self.app = None
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'failed': 0,
+            'flushes': 0,
+            'backpressure_waits': 0,
+            'sync_fallbacks': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    def init_app(self, app):
+        """绑定应用并读取队列配置（create_app 中经 event_sink.init_app 调用）"""
+        self.app = app
+        self.batch_size = app.config.get('EVENT_SINK_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('EVENT_SINK_FLUSH_INTERVAL', self.flush_interval)
+        self._queue.maxsize = app.config.get('EVENT_SINK_MAX_QUEUE', self._queue.maxsize)
+
+    def enqueue(self, data_object_id, trigger_condition, executed_strategy, result):
+        """放入一条安全事件，返回事件ID；队列满时阻塞等待（背压），超时则同步写入"""
+        event = {
+            'event_id': str(uuid.uuid4()),
+            'data_object_id': data_object_id,
+            'trigger_condition': trigger_condition,
+            'executed_strategy': executed_strategy,
+            'result': result,
+            'event_time': datetime.utcnow()
+        }
+        if self._closed:
+            self._write_now([event])
+            return event['event_id']
+
+        self._ensure_started()
+        with metrics.stage('event_enqueue'):
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count('backpressure_waits')
+                try:
+                    self._queue.put(event, timeout=self.put_timeout)
+                except queue.Full:
+                    self._count('sync_fallbacks')
+                    self._write_now([event])
+                    return event['event_id']
+        self._count('enqueued')
+        return event['event_id']
+
+    def flush(self):
+        """等待队列中已有事件全部写入"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """停止写线程，退出前写完队列中剩余事件"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def metrics(self):
+        """队列深度与写入延迟指标"""
+        with self._lock:
+            stats = dict(self.stats)
+        flushes = stats['flushes']
+        return dict(
+            stats,
+            queue_depth=self._queue.qsize(),
+            queue_capacity=self._queue.maxsize,
+            avg_flush_ms=stats['total_flush_ms'] / flushes if flushes else 0.0,
+            running=self._thread is not None and self._thread.is_alive()
+        )
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _ensure_started(self):
+        # 惰性启动；fork 出的子进程中需要重新启动写线程
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='dsqds-event-sink', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                item = self._queue.get()
+                batch = [] if item is _STOP else [item]
+                deadline = time.monotonic() + self.flush_interval
+                while item is not _STOP and len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+
+                if batch:
+                    try:
+                        self._write(batch)
+                    finally:
+                        db.session.remove()
+                for _ in range(len(batch) + (1 if item is _STOP else 0)):
+                    self._queue.task_done()
+                if item is _STOP:
+                    return
+
+    def _write(self, batch):
+        """在当前会话中写入一批事件并提交"""
+        start = time.perf_counter()
+        written = failed = 0
+        try:
+            from ingest import bulk_insert
+            with metrics.stage('event_write'):
+                version = bump_version(EVENTS_VERSION)
+                bulk_insert(SecurityEvent.__table__, [{**event, 'row_version': version} for event in batch])
+                db.session.commit()
+            written = len(batch)
+        except Exception as e:
+            db.session.rollback()
+            failed = len(batch)
+            print(f"安全事件写入错误: {e}")
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats['written'] += written
+            self.stats['failed'] += failed
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = elapsed
+            self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed)
+            self.stats['total_flush_ms'] += elapsed
+
+    def _write_now(self, batch):
+        """在调用方线程中同步写入（队列不可用时的降级路径）
+
+        在请求中调用时沿用当前应用上下文与会话，调用方需已提交自己的写入。
+        """
+        if has_app_context():
+            self._write(batch)
+            return
+        with self.app.app_context():
+            try:
+                self._write(batch)
+            finally:
+                db.session.remove()
+
+event_sink = AppLocal('event_sink', EventSink)
+
+def close_all():
+    """停止本进程全部应用的写线程并写完剩余事件"""
+    for sink in event_sink.instances():
+        sink.close()
+
+atexit.register(close_all)
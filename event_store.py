@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS安全事件分桶存储
+security_event 表按月份分桶保存在线（热）数据，超出保留期的月份压缩归档为
+NDJSON.gz 文件并登记到 event_archive 表；按时间范围查询时透明合并热表与归档。
+"""
+
+from datetime import datetime, timezone
+from itertools import islice
+import gzip
+import heapq
+import json
+import os
+
+from flask import current_app
+
+from app import db, SecurityEvent, EventArchive, bump_version, EVENTS_VERSION
+
+EVENT_FIELDS = [column.name for column in SecurityEvent.__table__.columns]
+ARCHIVE_CHUNK_SIZE = 5000
+
+def archive_dir():
+    """归档目录（不存在时创建）"""
+    directory = current_app.config.get('EVENT_ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'event_archive')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def naive_utc(moment):
+    """带时区的时间转换为 UTC 并去掉时区（库中事件时间均为 UTC 无时区值），无时区的原样返回"""
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+def add_months(moment, months):
+    """月初日期加减月份"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def bucket_name(moment):
+    return moment.strftime('%Y-%m')
+
+def hot_cutoff(now=None):
+    """在线分桶的起始时间，早于此时间的事件视为过期"""
+    months = max(current_app.config.get('EVENT_HOT_MONTHS', 3), 1)
+    return add_months(month_start(now or datetime.utcnow()), -(months - 1))
+
+def _serialize(row):
+    return {field: value.isoformat() if isinstance(value, datetime) else value for field, value in zip(EVENT_FIELDS, row)}
+
+def _deserialize(record):
+    if record.get('event_time'):
+        record['event_time'] = datetime.fromisoformat(record['event_time'])
+    return record
+
+def compact_bucket(start):
+    """将 [start, 下月) 的热数据写入归档文件，登记目录并从热表删除，返回归档条数"""
+    end = add_months(start, 1)
+    bucket = bucket_name(start)
+    in_bucket = (SecurityEvent.event_time >= start) & (SecurityEvent.event_time < end)
+    
+    # 同一月份可能因迟到事件多次归档，按序号追加分片
+    part = EventArchive.query.filter_by(bucket=bucket).count() + 1
+    filename = f"security_event_{bucket.replace('-', '_')}.part{part}.ndjson.gz"
+    path = os.path.join(archive_dir(), filename)
+    
+    statement = db.select(*[getattr(SecurityEvent, field) for field in EVENT_FIELDS]).where(in_bucket).order_by(
+        SecurityEvent.event_time, SecurityEvent.id
+    ).execution_options(yield_per=ARCHIVE_CHUNK_SIZE)
+    
+    row_count = 0
+    min_time = max_time = None
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as archive:
+            for partition in db.session.execute(statement).partitions():
+                for row in partition:
+                    archive.write(json.dumps(_serialize(row), ensure_ascii=False) + '\n')
+                    row_count += 1
+                    event_time = row[EVENT_FIELDS.index('event_time')]
+                    min_time = event_time if min_time is None else min(min_time, event_time)
+                    max_time = event_time if max_time is None else max(max_time, event_time)
+        raw.flush()
+        os.fsync(raw.fileno())
+    
+    if not row_count:
+        os.remove(temporary)
+        return 0
+    
+    # 文件落盘后再在同一事务中登记目录并删除热数据；中途失败时重跑会覆盖同名分片
+    os.replace(temporary, path)
+    db.session.add(EventArchive(
+        bucket=bucket, path=filename, row_count=row_count, min_event_time=min_time, max_event_time=max_time
+    ))
+    SecurityEvent.query.filter(in_bucket).delete(synchronize_session=False)
+    bump_version(EVENTS_VERSION)
+    db.session.commit()
+    return row_count
+
+def compact_expired_buckets(now=None):
+    """归档全部过期月份，并按保留策略删除过旧的归档文件，返回 {分桶: 条数}"""
+    cutoff = hot_cutoff(now)
+    oldest = db.session.query(db.func.min(SecurityEvent.event_time)).filter(SecurityEvent.event_time < cutoff).scalar()
+    
+    compacted = {}
+    if oldest is not None:
+        start = month_start(oldest)
+        while start < cutoff:
+            count = compact_bucket(start)
+            if count:
+                compacted[bucket_name(start)] = count
+            start = add_months(start, 1)
+    
+    # 事件时间为空的记录无法分桶，保留在热表中
+    keep_months = current_app.config.get('EVENT_ARCHIVE_MONTHS', 0)
+    if keep_months:
+        expired = bucket_name(add_months(cutoff, -keep_months))
+        archives = EventArchive.query.filter(EventArchive.bucket < expired).all()
+        for archive in archives:
+            try:
+                os.remove(os.path.join(archive_dir(), archive.path))
+            except FileNotFoundError:
+                pass
+            db.session.delete(archive)
+        if archives:
+            bump_version(EVENTS_VERSION)
+        db.session.commit()
+    
+    return compacted
+
+def _read_archive(archive, start, end):
+    """逐行读取一个归档文件中落在时间范围内的事件；分片按时间升序写入，读到 end 即停止"""
+    path = os.path.join(archive_dir(), archive.path)
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            record = _deserialize(json.loads(line))
+            event_time = record.get('event_time')
+            if start is not None and event_time < start:
+                continue
+            if end is not None and event_time >= end:
+                return
+            yield record
+
+def _sort_key(record):
+    return (record['event_time'] or datetime.min, record['id'])
+
+def query_events(start=None, end=None, limit=100):
+    """按时间范围查询事件（时间倒序），透明合并热表与相关归档分桶
+
+    归档分片按最晚事件时间倒序流式读取，每个分片只保留最新的 limit 条，与已有结果归并后截断；
+    已有 limit 条且分片最晚事件早于其中最早一条时，其余分片不再读取。带时区的时间先转换为 UTC。
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    query = db.session.query(*[getattr(SecurityEvent, field) for field in EVENT_FIELDS])
+    if start is not None:
+        query = query.filter(SecurityEvent.event_time >= start)
+    if end is not None:
+        query = query.filter(SecurityEvent.event_time < end)
+    hot = [_deserialize(_serialize(row)) for row in query.order_by(
+        SecurityEvent.event_time.desc(), SecurityEvent.id.desc()
+    ).limit(limit)]
+    
+    # 仅读取与时间范围重叠的归档分片
+    archives = EventArchive.query
+    if start is not None:
+        archives = archives.filter(EventArchive.max_event_time >= start)
+    if end is not None:
+        archives = archives.filter(EventArchive.min_event_time < end)
+    newest = hot
+    for archive in archives.order_by(EventArchive.max_event_time.desc()).all():
+        if len(newest) >= limit and archive.max_event_time < _sort_key(newest[-1])[0]:
+            break
+        archived = heapq.nlargest(limit, _read_archive(archive, start, end), key=_sort_key)
+        newest = list(islice(heapq.merge(newest, archived, key=_sort_key, reverse=True), limit))
+    return newest
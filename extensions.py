@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS应用级扩展状态
+缓存、安全事件写入器、实时推送、运行指标与查询诊断均按应用保存在 app.extensions['dsqds'] 中，
+同一进程内用不同配置（如各自的临时库）创建的多个应用互不影响。
+"""
+
+import weakref
+
+from flask import current_app, has_app_context
+
+EXTENSION_NAME = 'dsqds'
+
+def app_state(app=None):
+    """应用的扩展状态字典（create_app 中创建），未传 app 时取当前应用"""
+    return (app or current_app).extensions[EXTENSION_NAME]
+
+class AppLocal:
+    """按应用隔离的扩展实例
+
+    init_app 为每个应用创建一个 factory() 实例并调用其 init_app，属性访问转发给当前应用（current_app）的实例；
+    没有应用上下文时转发给 fallback（未提供时报错）。
+    """
+
+    def __init__(self, name, factory, fallback=None):
+        self.name = name
+        self.factory = factory
+        self.fallback = fallback
+        self._instances = weakref.WeakSet()
+
+    def init_app(self, app):
+        instance = self.factory()
+        app_state(app)[self.name] = instance
+        self._instances.add(instance)
+        instance.init_app(app)
+        return instance
+
+    def get(self, app=None):
+        """指定应用（默认当前应用）的实例"""
+        if app is None and not has_app_context():
+            if self.fallback is None:
+                raise RuntimeError(f'{self.name} 需要在应用上下文中使用')
+            return self.fallback
+        return app_state(app)[self.name]
+
+    def instances(self):
+        """本进程中全部应用的实例"""
+        return list(self._instances)
+
+    def __getattr__(self, attribute):
+        return getattr(self.get(), attribute)
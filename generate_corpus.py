@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS合成数据生成脚本
+按数据类型的典型属性分布生成数据对象，并按泊松分布为每个对象生成安全事件，另生成威胁与安全规则，
+用于在真实规模的数据量下测试与压测。分值与等级按当前权重计算，写入走批量 INSERT，每块一个事务。
+
+相同的 --seed、--end 与起始数据库生成完全相同的数据（对象按固定大小分块，每块使用独立的随机流）。
+
+用法: python generate_corpus.py [--objects 100000] [--events-per-object 2] [--threats 50] [--rules 50]
+                               [--seed 42] [--end 2026-01-01] [--months 12] [--database sqlite:////tmp/corpus.db]
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import time
+
+from app import create_app, db, DataObject, SecurityEvent, ThreatDatabase, SecurityRule, SecurityQuantificationEngine
+from app import bump_version, bump_all_versions, weight_cache, DATA_OBJECTS_VERSION, EVENTS_VERSION
+from ingest import insert_tuples
+from aggregates import rebuild_aggregates
+
+# 每块生成并提交的对象数；块大小参与随机流划分，修改后相同种子生成的数据会变化
+GENERATOR_BLOCK_SIZE = 50000
+# 对象数达到该值时先删除数据对象与安全事件表的二级索引，写完后重建（整体建索引快于逐行维护）
+DEFER_INDEX_THRESHOLD = 200000
+
+# 离散等级：国家/省/市/县/乡级，厘米/分米/米/十米/百米级
+ATTRIBUTE_LEVELS = (1.0, 0.8, 0.6, 0.4, 0.2)
+LIFECYCLE_STAGES = ('采集', '传输', '存储', '共享', '应用')
+STAGE_WEIGHTS = (0.15, 0.15, 0.35, 0.15, 0.2)
+REGIONS = ('华北', '东北', '华东', '华中', '华南', '西南', '西北')
+
+# 数据类型 -> 占比、空间尺度与位置精度等级概率、内容敏感性与流通性 Beta 参数、无历史风险概率
+DATA_TYPE_PROFILES = {
+    '遥感影像': {
+        'share': 0.25, 'scale': (0.3, 0.3, 0.2, 0.15, 0.05), 'accuracy': (0.25, 0.35, 0.25, 0.1, 0.05),
+        'sensitivity': (5, 2), 'flow': (2, 3), 'no_risk': 0.8
+    },
+    '基础地理信息': {
+        'share': 0.2, 'scale': (0.15, 0.35, 0.3, 0.15, 0.05), 'accuracy': (0.1, 0.3, 0.4, 0.15, 0.05),
+        'sensitivity': (3, 3), 'flow': (3, 2), 'no_risk': 0.85
+    },
+    '专题地图': {
+        'share': 0.25, 'scale': (0.05, 0.15, 0.4, 0.3, 0.1), 'accuracy': (0.02, 0.1, 0.4, 0.33, 0.15),
+        'sensitivity': (2, 4), 'flow': (3, 2), 'no_risk': 0.9
+    },
+    '公开地理数据': {
+        'share': 0.15, 'scale': (0.02, 0.08, 0.2, 0.4, 0.3), 'accuracy': (0.0, 0.05, 0.25, 0.4, 0.3),
+        'sensitivity': (1, 8), 'flow': (5, 2), 'no_risk': 0.95
+    },
+    '传感器数据': {
+        'share': 0.15, 'scale': (0.05, 0.25, 0.4, 0.2, 0.1), 'accuracy': (0.4, 0.35, 0.15, 0.07, 0.03),
+        'sensitivity': (3, 2), 'flow': (5, 2), 'no_risk': 0.75
+    },
+}
+DATA_TYPES = tuple(DATA_TYPE_PROFILES)
+
+# 安全事件：(触发条件, 执行策略, 处置结果)
+EVENT_TEMPLATES = (
+    ('检测到异常访问行为', '启动多因子认证，提升数据分级', '成功阻止未授权访问'),
+    ('外部安全预警触发', '限制数据共享，启动审计记录', '有效控制数据流通，记录完整操作日志'),
+    ('检测到数据多次流转未脱敏', '强制脱敏处理，限制共享次数', '数据成功脱敏，共享次数限制生效'),
+    ('存储介质异常检测', '数据只读锁定，触发安全审计', '及时发现并修复存储问题'),
+    ('权限配置错误检测', '重新配置访问权限，通知管理员', '权限配置已修正'),
+    ('传输链路加密校验失败', '切换加密通道，重传数据', '数据完整送达'),
+    ('批量下载频次超限', '临时冻结账号，通知数据管理员', '已核实为授权操作，解除冻结'),
+)
+
+# 威胁：阶段 -> [(威胁类型, 描述)]
+THREAT_TEMPLATES = {
+    '采集': [('非法设备入侵', '未授权设备接入数据采集网络'), ('数据篡改', '采集过程中数据被恶意修改'),
+             ('采集误差', '传感器故障或环境干扰导致数据误差')],
+    '传输': [('数据包截获', '传输过程中数据包被截获'), ('链路监听', '网络链路被恶意监听'),
+             ('注入攻击', '传输过程中遭受SQL注入等攻击')],
+    '存储': [('权限配置漏洞', '存储系统存在权限管理漏洞'), ('介质损坏', '存储介质物理损坏导致数据丢失'),
+             ('物理盗窃', '存储设备被物理盗窃')],
+    '共享': [('越权访问', '用户超出权限范围访问数据'), ('敏感数据无控制扩散', '敏感数据在共享过程中失控扩散')],
+    '应用': [('非法调用', '应用程序非法调用数据接口'), ('数据滥用', '应用程序非法使用数据'),
+             ('内容泄漏', '应用过程中敏感内容被泄漏')],
+}
+IMPACT_SCOPES = ('数据完整性', '数据机密性', '数据可用性', '访问控制', '数据可控性', '数据追溯性')
+
+RULE_ACTIONS = (
+    {'type': 'encryption', 'level': 'high', 'description': '高级加密存储'},
+    {'type': 'access_control', 'level': 'strict', 'description': '严格访问控制'},
+    {'type': 'audit', 'level': 'full', 'description': '全程审计记录'},
+    {'type': 'encrypted_transmission', 'description': '全过程加密传输'},
+    {'type': 'enhanced_monitoring', 'description': '审核频次提升，分级门槛上调'},
+    {'type': 'flow_control', 'description': '限制共享次数，强制脱敏处理'},
+    {'type': 'storage_protection', 'description': '数据只读锁定，触发系统安全审计'},
+)
+
+OBJECT_COLUMNS = (
+    'id', 'name', 'data_type', *SecurityQuantificationEngine.ATTRIBUTES, 'lifecycle_stage',
+    'security_score', 'security_level', 'created_at', 'updated_at', 'row_version', 'base_score'
+)
+EVENT_COLUMNS = (
+    'id', 'event_id', 'data_object_id', 'trigger_condition', 'executed_strategy', 'result', 'event_time', 'row_version'
+)
+
+def _rng(seed, stream, block=0):
+    import numpy as np
+    return np.random.default_rng([seed, stream, block])
+
+def _next_id(model):
+    """锁定表的写入直到本事务提交，返回下一个可用主键
+
+    生成器需要显式主键（对象名称与事件编号由主键派生，保证可复现），读取最大主键前先取得写锁，
+    避免与并发写入者分配到相同的主键。
+    """
+    table = model.__table__
+    connection = db.session.connection()
+    if db.engine.dialect.name == 'sqlite':
+        connection.execute(table.update().where(db.false()).values(id=table.c.id))  # 空更新，仅为取得库级写锁
+    elif db.engine.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f'LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE')
+    return (connection.execute(db.select(db.func.max(table.c.id))).scalar() or 0) + 1
+
+def _sync_sequence(model):
+    """显式写入主键后将 PostgreSQL 的自增序列推进到最大主键，之后由接口新建的行不会主键冲突
+
+    SQLite 与 MySQL 的自增主键按表中最大值分配，无需处理。
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    table = model.__table__.name
+    db.session.execute(db.text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+    ))
+
+def _time_values(values):
+    """datetime64[us] 数组转换为 insert_tuples 所需的时间值"""
+    import numpy as np
+    if db.engine.dialect.name != 'sqlite':
+        return values.astype(datetime).tolist()
+    return [text[:10] + ' ' + text[11:] for text in np.datetime_as_string(values, unit='us').tolist()]
+
+def sample_attributes(rng, size):
+    """按数据类型画像抽样，返回 (类型下标, 阶段下标, N×5 属性矩阵)"""
+    import numpy as np
+    profiles = list(DATA_TYPE_PROFILES.values())
+    types = rng.choice(len(profiles), size=size, p=[profile['share'] for profile in profiles])
+    stages = rng.choice(len(LIFECYCLE_STAGES), size=size, p=STAGE_WEIGHTS)
+    matrix = np.zeros((size, len(SecurityQuantificationEngine.ATTRIBUTES)))
+    levels = np.array(ATTRIBUTE_LEVELS)
+    for index, profile in enumerate(profiles):
+        mask = types == index
+        count = int(mask.sum())
+        if not count:
+            continue
+        risk = np.round(rng.beta(2, 5, count), 2)
+        risk[rng.random(count) < profile['no_risk']] = 0.0
+        matrix[mask] = np.column_stack([
+            levels[rng.choice(len(levels), size=count, p=profile['scale'])],
+            levels[rng.choice(len(levels), size=count, p=profile['accuracy'])],
+            np.round(rng.beta(*profile['sensitivity'], count), 2),
+            np.round(rng.beta(*profile['flow'], count), 2),
+            risk
+        ])
+    return types, stages, matrix
+
+def generate_block(seed, block, size, first_id, first_event_id, version, event_version, weights, end, window,
+                   events_per_object):
+    """生成一块数据对象与安全事件的元组行"""
+    import numpy as np
+    rng = _rng(seed, 0, block)
+    types, stages, matrix = sample_attributes(rng, size)
+    scores = SecurityQuantificationEngine.calculate_security_scores(matrix, weights)
+    levels = SecurityQuantificationEngine.determine_security_levels(scores)
+
+    end = np.datetime64(end, 'us')
+    window_us = int(window.total_seconds() * 1e6)
+    age = rng.integers(0, window_us, size)
+    created = end - age.astype('timedelta64[us]')
+    updated = created + np.minimum(rng.exponential(7 * 86400e6, size).astype(np.int64), age).astype('timedelta64[us]')
+
+    ids = np.arange(first_id, first_id + size)
+    regions = rng.integers(0, len(REGIONS), size)
+    names = [
+        f'{REGIONS[region]}{DATA_TYPES[data_type]}-{object_id:08d}'
+        for region, data_type, object_id in zip(regions.tolist(), types.tolist(), ids.tolist())
+    ]
+    objects = list(zip(
+        ids.tolist(), names, [DATA_TYPES[index] for index in types.tolist()],
+        *(matrix[:, column].tolist() for column in range(matrix.shape[1])),
+        [LIFECYCLE_STAGES[index] for index in stages.tolist()],
+        scores.tolist(), levels.tolist(), _time_values(created), _time_values(updated), [version] * size, scores.tolist()
+    ))
+
+    # 事件数服从泊松分布，事件时间在对象创建时间与截止时间之间
+    counts = rng.poisson(events_per_object, size)
+    owners = np.repeat(np.arange(size), counts)
+    total = len(owners)
+    offsets = (rng.random(total) * age[owners]).astype(np.int64).astype('timedelta64[us]')
+    event_times = _time_values(created[owners] + offsets)
+    templates = rng.integers(0, len(EVENT_TEMPLATES), total).tolist()
+    event_ids = range(first_event_id, first_event_id + total)
+    events = [
+        (event_pk, f'GEN-{seed}-{event_pk:010d}', object_id, *EVENT_TEMPLATES[template], event_time, event_version)
+        for event_pk, object_id, template, event_time in zip(event_ids, ids[owners].tolist(), templates, event_times)
+    ]
+    return objects, events
+
+def generate_threats(seed, count):
+    """生成威胁元组行（不含主键）"""
+    rng = _rng(seed, 1)
+    stages = rng.choice(len(LIFECYCLE_STAGES), size=count).tolist()
+    picks = rng.random(count).tolist()
+    scopes = rng.integers(0, len(IMPACT_SCOPES), count).tolist()
+    risks = rng.beta(5, 3, count).round(2).tolist()
+    rows = []
+    for stage, pick, scope, risk in zip(stages, picks, scopes, risks):
+        templates = THREAT_TEMPLATES[LIFECYCLE_STAGES[stage]]
+        threat_type, description = templates[int(pick * len(templates))]
+        rows.append((LIFECYCLE_STAGES[stage], threat_type, description, IMPACT_SCOPES[scope], risk))
+    return rows
+
+def _random_condition(rng, allow_composite=True):
+    """随机生成一个可编译的规则条件，返回 (条件类型, 条件)"""
+    kind = int(rng.integers(0, 7 if allow_composite else 6))
+    if kind == 0:
+        return '属性规则', {'type': 'score_threshold', 'threshold': round(float(rng.uniform(0.5, 0.95)), 2)}
+    if kind == 1:
+        return '属性规则', {'type': 'security_level', 'level': str(rng.choice(SecurityQuantificationEngine.LEVEL_NAMES))}
+    if kind == 2:
+        return '环节规则', {'type': 'lifecycle_stage', 'stage': str(rng.choice(LIFECYCLE_STAGES))}
+    if kind == 3:
+        return '属性规则', {'type': 'data_type', 'value': str(rng.choice(DATA_TYPES))}
+    if kind == 4:
+        attribute = str(rng.choice(SecurityQuantificationEngine.ATTRIBUTES))
+        return '属性规则', {'type': attribute, 'threshold': round(float(rng.uniform(0.3, 0.95)), 2)}
+    if kind == 5:
+        return '事件触发规则', {'type': 'data_flow_anomaly', 'frequency': str(rng.choice(['high', 'medium']))}
+    children = [_random_condition(rng, allow_composite=False)[1] for _ in range(int(rng.integers(2, 4)))]
+    return '复合规则', {'type': 'composite', 'operator': str(rng.choice(['AND', 'OR'], p=[0.7, 0.3])), 'conditions': children}
+
+def generate_rules(seed, count):
+    """生成安全规则元组行（不含主键与规则编号）"""
+    rng = _rng(seed, 2)
+    rows = []
+    for _ in range(count):
+        condition_type, condition = _random_condition(rng)
+        action = RULE_ACTIONS[int(rng.integers(0, len(RULE_ACTIONS)))]
+        rows.append((
+            condition_type, json.dumps(condition, ensure_ascii=False), json.dumps(action, ensure_ascii=False),
+            int(rng.integers(1, 4)), bool(rng.random() < 0.9)
+        ))
+    return rows
+
+def deferred_indexes(tables):
+    """删除各表的二级索引，返回重建函数（唯一约束随表保留）"""
+    indexes = [index for table in tables for index in table.indexes]
+    connection = db.session.connection()
+    for index in indexes:
+        index.drop(bind=connection)
+    db.session.commit()
+
+    def rebuild():
+        connection = db.session.connection()
+        for index in indexes:
+            index.create(bind=connection)
+        db.session.commit()
+    return rebuild
+
+def generate_corpus(objects, events_per_object=2.0, threats=50, rules=50, seed=42, end=None, months=12, progress=None):
+    """向当前数据库追加合成数据，返回各表写入行数
+
+    需在应用上下文中调用。progress(已写对象数, 已写事件数) 在每块提交后调用；
+    对象数达到 DEFER_INDEX_THRESHOLD 时写入期间暂时删除二级索引。
+    """
+    end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    window = timedelta(days=30 * months)
+    stored_end = end.isoformat(' ', 'microseconds') if db.engine.dialect.name == 'sqlite' else end
+
+    threat_rows = generate_threats(seed, threats)
+    first_threat = _next_id(ThreatDatabase)
+    insert_tuples(ThreatDatabase.__table__, ('id', 'threat_id', 'stage', 'threat_type', 'description', 'impact_scope', 'risk_level', 'created_at'), [
+        (pk, f'TS{pk:06d}', *row, stored_end) for pk, row in enumerate(threat_rows, first_threat)
+    ])
+    _sync_sequence(ThreatDatabase)
+    rule_rows = generate_rules(seed, rules)
+    first_rule = _next_id(SecurityRule)
+    insert_tuples(SecurityRule.__table__, ('id', 'rule_id', 'condition_type', 'condition_json', 'action_json', 'priority', 'is_active', 'created_at'), [
+        (pk, f'RS{pk:05d}', *row, stored_end) for pk, row in enumerate(rule_rows, first_rule)
+    ])
+    _sync_sequence(SecurityRule)
+    db.session.commit()
+
+    weights, _ = weight_cache.snapshot()
+    written_objects = written_events = 0
+    rebuild_indexes = None
+    if objects >= DEFER_INDEX_THRESHOLD:
+        rebuild_indexes = deferred_indexes((DataObject.__table__, SecurityEvent.__table__))
+    try:
+        for block, start in enumerate(range(0, objects, GENERATOR_BLOCK_SIZE)):
+            size = min(GENERATOR_BLOCK_SIZE, objects - start)
+            version = bump_version(DATA_OBJECTS_VERSION)
+            event_version = bump_version(EVENTS_VERSION)
+            object_rows, event_rows = generate_block(
+                seed, block, size, _next_id(DataObject), _next_id(SecurityEvent), version, event_version,
+                weights, end, window, events_per_object
+            )
+            insert_tuples(DataObject.__table__, OBJECT_COLUMNS, object_rows)
+            insert_tuples(SecurityEvent.__table__, EVENT_COLUMNS, event_rows)
+            _sync_sequence(DataObject)
+            _sync_sequence(SecurityEvent)
+            db.session.commit()
+            written_objects += len(object_rows)
+            written_events += len(event_rows)
+            if progress:
+                progress(written_objects, written_events)
+    finally:
+        db.session.rollback()
+        if rebuild_indexes:
+            rebuild_indexes()
+
+    bump_all_versions()
+    rebuild_aggregates()
+    db.session.commit()
+    return {'data_objects': written_objects, 'security_events': written_events, 'threats': threats, 'rules': rules}
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成数据对象、安全事件、威胁与规则')
+    parser.add_argument('--objects', type=int, default=100000, help='数据对象数')
+    parser.add_argument('--events-per-object', type=float, default=2.0, help='每个对象的平均安全事件数（泊松分布）')
+    parser.add_argument('--threats', type=int, default=50, help='威胁条数')
+    parser.add_argument('--rules', type=int, default=50, help='安全规则条数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--end', type=lambda value: datetime.strptime(value, '%Y-%m-%d'), default=None,
+                        help='时间截止日期 YYYY-MM-DD（默认今天 0 点；固定后可完全复现）')
+    parser.add_argument('--months', type=int, default=12, help='创建时间分布的月数')
+    parser.add_argument('--database', default=None, help='数据库地址（默认 DSQDS_DATABASE_URI 或 instance/dsqds.db）')
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database} if args.database else None)
+    started = time.perf_counter()
+
+    def progress(objects, events):
+        elapsed = time.perf_counter() - started
+        print(f"  已写入 {objects} 个对象、{events} 条事件（{(objects + events) / elapsed:,.0f} 行/秒）")
+
+    with app.app_context():
+        from migrations import upgrade_database
+        upgrade_database()
+        print(f"🧪 生成合成数据: {args.objects} 个对象，每对象平均 {args.events_per_object} 条事件，种子 {args.seed}")
+        counts = generate_corpus(
+            args.objects, args.events_per_object, args.threats, args.rules,
+            args.seed, args.end, args.months, progress
+        )
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"✅ 完成: {counts['data_objects']} 个对象、{counts['security_events']} 条事件、"
+          f"{counts['threats']} 条威胁、{counts['rules']} 条规则，耗时 {elapsed:.1f}s（{total / elapsed:,.0f} 行/秒）")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS批量导入
+按块向量化评分、执行规则，并以批量 INSERT 在单个事务内写入数据对象与安全事件。
+"""
+
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+import json
+import uuid
+
+from app import db, DataObject, SecurityEvent, SecurityQuantificationEngine, weight_cache, rule_cache
+from app import bump_version, DATA_OBJECTS_VERSION, EVENTS_VERSION
+from metrics import metrics
+import aggregates
+
+# 每个事务写入的对象数
+INGEST_CHUNK_SIZE = 5000
+
+def parse_data_object(item):
+    """校验并规范化一条数据对象输入，出错时抛出 ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError('每条记录必须为JSON对象')
+    if not item.get('name'):
+        raise ValueError('缺少字段: name')
+    if not item.get('data_type'):
+        raise ValueError('缺少字段: data_type')
+
+    values = {
+        'name': str(item['name']),
+        'data_type': str(item['data_type']),
+        'lifecycle_stage': item.get('lifecycle_stage') or '采集'
+    }
+    for attribute in SecurityQuantificationEngine.ATTRIBUTES:
+        try:
+            values[attribute] = float(item.get(attribute, 0) or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f'{attribute} 必须为数值')
+    return values
+
+def parse_ndjson(text):
+    """逐行解析 NDJSON，解析失败的行以 ValueError 实例占位"""
+    items = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(ValueError(f'第 {line_number} 行不是合法JSON'))
+    return items
+
+def _insert_rows(table, rows):
+    """批量插入并按输入顺序返回由数据库分配的主键
+
+    SQLite 走 executemany 快速路径：同一条语句持有库级写锁，逐行按 max(rowid)+1 分配主键，
+    本批主键即以 last_insert_rowid() 结尾的连续区间。其他数据库使用 INSERT ... RETURNING。
+    """
+    if db.engine.dialect.name != 'sqlite':
+        statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        return db.session.scalars(statement, rows).all()
+
+    connection = db.session.connection()
+    _executemany_sqlite(connection, table, rows)
+    last_id = connection.exec_driver_sql('SELECT last_insert_rowid()').scalar()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+def _insert_sql(table, names):
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(table.name, ', '.join(names), ', '.join('?' for _ in names))
+
+def _executemany_sqlite(connection, table, rows):
+    """SQLite 快速路径：直接以元组调用 DB-API executemany，时间按 SQLAlchemy 的存储格式转为字符串"""
+    names = [column.name for column in table.columns if column.name in rows[0]]
+    connection.exec_driver_sql(_insert_sql(table, names), [
+        tuple(value.isoformat(' ') if isinstance(value, datetime) else value for value in map(row.get, names))
+        for row in rows
+    ])
+
+def insert_tuples(table, names, rows):
+    """在当前事务中批量插入元组行（按 names 顺序），省去逐行构造字典
+
+    SQLite 下直接调用 DB-API executemany，时间列需已是 SQLAlchemy 存储格式的文本（YYYY-MM-DD HH:MM:SS.ffffff）。
+    """
+    if not rows:
+        return
+    if db.engine.dialect.name == 'sqlite':
+        db.session.connection().exec_driver_sql(_insert_sql(table, names), rows)
+    else:
+        db.session.execute(table.insert(), [dict(zip(names, row)) for row in rows])
+
+def bulk_insert(table, rows):
+    """在当前事务中批量插入（不返回主键）"""
+    if not rows:
+        return
+    if db.engine.dialect.name == 'sqlite':
+        _executemany_sqlite(db.session.connection(), table, rows)
+    else:
+        db.session.execute(table.insert(), rows)
+
+def ingest_data_objects(items, chunk_size=INGEST_CHUNK_SIZE):
+    """批量创建数据对象，返回与输入一一对应的结果列表
+
+    整批只读取一次权重与规则快照；每块在一个事务内批量写入对象与命中规则的安全事件，
+    并同步更新汇总表。某块写入失败时仅该块各项返回错误。
+    """
+    weights, _ = weight_cache.snapshot()
+    rule_set, _ = rule_cache.snapshot()
+    object_table = DataObject.__table__
+    executed_actions = {}  # 命中规则组合 -> 与单条创建接口相同格式的动作列表
+    strategy_text = {}  # 命中规则组合 -> 策略描述，避免逐条格式化
+    results = []
+
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        valid = []
+        for offset, item in enumerate(chunk):
+            index = start + offset
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                valid.append((index, parse_data_object(item)))
+            except ValueError as e:
+                results.append({'index': index, 'error': str(e)})
+        if not valid:
+            continue
+
+        rows = [values for _, values in valid]
+        scores, levels = SecurityQuantificationEngine.assess_batch(rows, weights)
+        now = datetime.utcnow()
+        for values, score, level in zip(rows, scores, levels):
+            values['security_score'] = values['base_score'] = float(score)
+            values['security_level'] = str(level)
+            values['created_at'] = now
+            values['updated_at'] = now
+
+        try:
+            version = bump_version(DATA_OBJECTS_VERSION)  # 本块写入的行版本
+            for values in rows:
+                values['row_version'] = version
+            ids = _insert_rows(object_table, rows)
+
+            events = []
+            counts = Counter()
+            with metrics.stage('rule_eval'):
+                for object_id, values in zip(ids, rows):
+                    values['id'] = object_id
+                    counts[(aggregates.LEVEL, values['security_level'])] += 1
+                    counts[(aggregates.STAGE, values['lifecycle_stage'])] += 1
+                    matched = tuple(rule_set.match(SimpleNamespace(**values)))
+                    if matched not in executed_actions:
+                        executed_actions[matched] = [{'rule_id': rule.rule_id, 'action': rule.action} for rule in matched]
+                        strategy_text[matched] = str(executed_actions[matched])
+                    values['executed_actions'] = executed_actions[matched]
+                    if matched:
+                        events.append({
+                            'event_id': str(uuid.uuid4()),
+                            'data_object_id': object_id,
+                            'trigger_condition': f"新建数据对象: {values['name']}",
+                            'executed_strategy': strategy_text[matched],
+                            'result': '规则执行成功',
+                            'event_time': now
+                        })
+
+            if events:
+                event_version = bump_version(EVENTS_VERSION)
+                for event in events:
+                    event['row_version'] = event_version
+                with metrics.stage('event_write'):
+                    bulk_insert(SecurityEvent.__table__, events)
+            aggregates.adjust_many(counts)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            results.extend({'index': index, 'error': f'写入失败: {e}'} for index, _ in valid)
+            continue
+
+        results.extend({
+            'index': index,
+            'id': object_id,
+            'security_score': values['security_score'],
+            'security_level': values['security_level'],
+            'executed_actions': values['executed_actions']
+        } for (index, _), object_id, values in zip(valid, ids, rows))
+
+    results.sort(key=lambda result: result['index'])
+    return results
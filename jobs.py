@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS后台任务
+权重变更后分块重新评分全部数据对象；按威胁清单全量动态分级。
+两类任务都由属性重新计算基础分值（base_score），重新评分以其作为安全分值，动态分级在其上叠加阶段威胁与阶段系数；
+两者共用一个任务槽，后启动的任务取消正在运行的任务。
+"""
+
+from collections import Counter
+from datetime import datetime
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from app import db, DataObject, SecurityEvent, SecurityQuantificationEngine, DynamicClassificationEngine, read_version
+from app import bump_version, DATA_OBJECTS_VERSION, EVENTS_VERSION
+from extensions import app_state
+import aggregates
+
+class BackgroundJob:
+    """后台任务状态（进程内）"""
+
+    def __init__(self, job_type, params=None):
+        self.job_id = str(uuid.uuid4())
+        self.job_type = job_type
+        self.params = params or {}
+        self.status = 'pending'  # pending/running/completed/failed/cancelled
+        self.total = 0
+        self.processed = 0
+        self.changed = 0
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.thread = None
+        self._started = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def to_dict(self):
+        """任务状态及进度、预计剩余时间"""
+        elapsed = None
+        eta = None
+        if self._started is not None:
+            elapsed = time.monotonic() - self._started if not self.finished else (
+                (self.finished_at - self.started_at).total_seconds()
+            )
+            if self.status == 'running' and self.processed:
+                eta = elapsed / self.processed * (self.total - self.processed)
+
+        return {
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'params': self.params,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'changed': self.changed,
+            'progress': self.processed / self.total if self.total else (1.0 if self.finished else 0.0),
+            'elapsed_seconds': elapsed,
+            'eta_seconds': eta,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobRegistry:
+    """进程内任务登记表，同一应用同一任务槽只保留一个任务在运行，新任务会取消旧任务"""
+
+    def __init__(self, max_history=50):
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def start(self, job_type, target, params=None, slot=None):
+        """在后台线程中运行 target(job)，返回任务对象；slot 默认为任务类型。需在应用上下文中调用"""
+        app = current_app._get_current_object()
+        job = BackgroundJob(job_type, params)
+        slot = slot or job_type
+        with self._lock:
+            active = app_state(app).setdefault('active_jobs', {})  # 任务槽 -> 当前任务
+            previous = active.get(slot)
+            if previous is not None and not previous.finished:
+                previous.cancel()
+            active[slot] = job
+            self._jobs[job.job_id] = job
+            self._trim()
+
+        job.thread = threading.Thread(
+            target=self._run, args=(app, job, target, previous), name=f'dsqds-{job_type}', daemon=True
+        )
+        job.thread.start()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _run(self, app, job, target, previous):
+        # 等待被取消的旧任务退出，避免两个任务同时写同一批数据
+        if previous is not None and previous.thread is not None:
+            previous.thread.join()
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        job._started = time.monotonic()
+        try:
+            with app.app_context():
+                target(job)
+            job.status = 'cancelled' if job.cancelled else 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            print(f"后台任务执行错误 {job.job_type}: {e}")
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _trim(self):
+        finished = [job for job in self.list() if job.finished]
+        for job in finished[self.max_history:]:
+            del self._jobs[job.job_id]
+
+job_registry = JobRegistry()
+
+# 重新评分与动态分级共用的任务槽
+SCORING_SLOT = 'scoring'
+
+def _score_corpus(job, weights, trigger, stage_risks=None):
+    """按主键分块重新计算全部数据对象的基础分值、安全分值与等级
+
+    基础分值 base_score 为属性加权分值；stage_risks 为 None 时安全分值即基础分值（静态评估），
+    否则为叠加阶段威胁与阶段系数后的动态分值。每块向量化计算后，以一次 executemany UPDATE
+    写回有变化的行（三者总是一起写回），并为发生等级变化的块写入一条汇总安全事件。
+    UPDATE 以读取时的 row_version 为条件（乐观并发）：读取后被其他请求修改或删除的行不覆盖，
+    也不计入等级变化，由下次评分处理。
+    """
+    import numpy as np
+    chunk_size = current_app.config.get('RESCORE_CHUNK_SIZE', 2000)
+    job.total = db.session.query(db.func.count(DataObject.id)).scalar()
+
+    table = DataObject.__table__
+    update_statement = table.update().where(
+        table.c.id == db.bindparam('row_id'), table.c.row_version == db.bindparam('read_version')
+    ).values(
+        base_score=db.bindparam('base'),
+        security_score=db.bindparam('score'),
+        security_level=db.bindparam('level'),
+        updated_at=db.bindparam('updated_at'),
+        row_version=db.bindparam('row_version')
+    )
+    attribute_columns = [getattr(DataObject, name) for name in SecurityQuantificationEngine.ATTRIBUTES]
+
+    last_id = 0
+    while not job.cancelled:
+        rows = db.session.query(
+            DataObject.id, *attribute_columns, DataObject.lifecycle_stage, DataObject.security_score,
+            DataObject.security_level, DataObject.base_score, DataObject.row_version
+        ).filter(DataObject.id > last_id).order_by(DataObject.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        ids = [row[0] for row in rows]
+        matrix = np.array([row[1:6] for row in rows], dtype=float)
+        matrix = np.nan_to_num(matrix)  # 空值按0处理
+        stages = [row[6] for row in rows]
+        old_scores = np.array([row[7] or 0.0 for row in rows], dtype=float)
+        old_levels = [row[8] for row in rows]
+        old_bases = np.array([row[9] if row[9] is not None else np.nan for row in rows], dtype=float)
+        read_versions = [row[10] for row in rows]
+
+        bases = SecurityQuantificationEngine.calculate_security_scores(matrix, weights)
+        scores = bases if stage_risks is None else DynamicClassificationEngine.adjust_scores(bases, stages, stage_risks)
+        levels = SecurityQuantificationEngine.determine_security_levels(scores)
+
+        changed = (levels != np.array(old_levels, dtype=object)) | (np.abs(scores - old_scores) > 1e-9)
+        changed |= ~(np.abs(bases - old_bases) <= 1e-9)  # 基础分值为空（迁移前的行）时同样写回
+
+        now = datetime.utcnow()
+        changed_indexes = np.flatnonzero(changed)
+        applied = set()
+        if len(changed_indexes):
+            version = bump_version(DATA_OBJECTS_VERSION)
+            db.session.execute(update_statement, [{
+                'row_id': ids[index], 'read_version': read_versions[index], 'base': float(bases[index]),
+                'score': float(scores[index]), 'level': str(levels[index]), 'updated_at': now, 'row_version': version
+            } for index in changed_indexes])
+            # 本块的版本号只由本次 UPDATE 写入，据此找出未被并发修改抢先的行
+            applied = {row_id for (row_id,) in db.session.query(DataObject.id).filter(
+                DataObject.id.between(ids[0], ids[-1]), DataObject.row_version == version
+            )}
+
+        transitions = Counter()
+        for index in changed_indexes:
+            level = str(levels[index])
+            if ids[index] in applied and level != old_levels[index]:
+                transitions[(old_levels[index], level)] += 1
+        if transitions:
+            aggregates.record_level_transitions(transitions)
+            level_changes = sum(transitions.values())
+            db.session.add(SecurityEvent(
+                event_id=str(uuid.uuid4()),
+                row_version=bump_version(EVENTS_VERSION),
+                trigger_condition=f"{trigger}: 对象ID {ids[0]}-{ids[-1]}",
+                executed_strategy='; '.join(f"{old} → {new}: {count}" for (old, new), count in sorted(transitions.items(), key=str)),
+                result=f"{level_changes} 个对象分级变更"
+            ))
+        db.session.commit()
+
+        job.processed += len(rows)
+        job.changed += len(applied)
+        last_id = ids[-1]
+        time.sleep(0)  # 让出GIL，保证请求线程及时响应
+
+def rescore_corpus(job):
+    """权重变更后重新评分全部数据对象：安全分值恢复为属性加权分值，动态调整需重新执行动态分级"""
+    weights = SecurityQuantificationEngine.load_weights()
+    weight_version = read_version('weights')
+    job.params['weight_version'] = weight_version
+    _score_corpus(job, weights, f"权重变更重新评分(版本 {weight_version})")
+
+def reclassify_corpus(job):
+    """威胁感知的全量动态分级
+
+    任务开始时读取一次权重与各阶段威胁风险表，分值由属性重新计算后统一叠加阶段威胁与阶段系数
+    （不在已存分值上累加，可反复执行）。
+    """
+    weights = SecurityQuantificationEngine.load_weights()
+    stage_risks = DynamicClassificationEngine.load_stage_risks()
+    job.params['stage_risks'] = stage_risks
+    _score_corpus(job, weights, "威胁感知动态分级", stage_risks)
+
+def start_rescore_job():
+    """启动（或重启）全量重新评分任务，会取消正在运行的动态分级任务"""
+    return job_registry.start('rescore', rescore_corpus, slot=SCORING_SLOT)
+
+def start_reclassify_job():
+    """启动（或重启）全量动态分级任务，会取消正在运行的重新评分任务"""
+    return job_registry.start('reclassify', reclassify_corpus, slot=SCORING_SLOT)
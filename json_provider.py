@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS JSON编码
+可插拔的 Flask JSON Provider：默认使用 orjson（可选依赖），未安装或 DSQDS_JSON_ENCODER=json 时
+回退到标准库 json。两种编码器都将时间输出为 ISO 8601，NumPy 数值输出为普通数值。
+"""
+
+from datetime import date
+import json
+import sys
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+def _default(value):
+    """标准库 json 无法直接编码的类型"""
+    if isinstance(value, date):
+        return value.isoformat()
+    np = sys.modules.get('numpy')  # 未导入 NumPy 时不可能出现 NumPy 值，无需为此导入
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    if np is not None and isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """按 JSON_ENCODER 配置（auto/orjson/json）选择编码器"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        encoder = app.config.get('JSON_ENCODER', 'auto')
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError('DSQDS_JSON_ENCODER=orjson 但未安装 orjson')
+        self.use_orjson = orjson is not None and encoder != 'json'
+
+    @property
+    def encoder_name(self):
+        return 'orjson' if self.use_orjson else 'json'
+
+    def dumps_bytes(self, obj, sort_keys=None):
+        """编码为 UTF-8 字节串"""
+        sort_keys = self.sort_keys if sort_keys is None else sort_keys
+        if self.use_orjson:
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=_default, option=option)
+        return json.dumps(obj, default=_default, ensure_ascii=self.ensure_ascii, sort_keys=sort_keys).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson:
+            return self.dumps_bytes(obj, kwargs.get('sort_keys')).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """jsonify 的实现：直接写入编码后的字节串，避免再次转换为 str"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS运行指标
+按路由记录请求延迟、响应大小与状态码，通过 SQLAlchemy 事件统计每个请求的查询次数与 SQL 耗时，
+并记录权重加载、规则编译与执行、安全事件写入等内部阶段耗时。GET /metrics 以 Prometheus 文本格式输出，
+响应头 Server-Timing 给出本次请求的分项耗时。
+
+指标保存在进程内存中：多进程部署时每个工作进程各自计数，由 Prometheus 按实例分别抓取。
+同一进程中的多个应用各有一份指标（metrics 转发给当前应用的实例），无应用上下文时阶段计时不记录。
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+from extensions import AppLocal
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# 未匹配到路由的请求统一记为该标签，避免任意 URL 产生无限多的时间序列
+UNMATCHED_ROUTE = '<unmatched>'
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}  # 标签值元组 -> 计数
+
+    def inc(self, label_values=(), amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        lines.extend(
+            f'{self.name}{_labels(self.labels, values)} {_number(value)}'
+            for values, value in sorted(self.series.items())
+        )
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}  # 标签值元组 -> [各桶计数..., +Inf 桶计数, 总和]
+
+    def observe(self, value, label_values=()):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for values, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                labels = _labels((*self.labels, 'le'), (*values, bound if bound == '+Inf' else _number(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, values)} {_number(series[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labels, values)} {cumulative}')
+        return lines
+
+def _labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class RequestTimer:
+    """单个请求的累计耗时"""
+    __slots__ = ('started', 'queries', 'sql_seconds', 'stages')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.stages = {}  # 阶段名 -> 累计秒数
+
+class QueryEvents:
+    """一个数据库引擎上唯一的一组语句计时事件，将每条语句的耗时分发给各监听者（运行指标、查询诊断）"""
+
+    def __init__(self):
+        self.listeners = []
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('dsqds_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info['dsqds_query_start'].pop()
+        for listener in self.listeners:
+            listener(connection, statement, parameters, executemany, elapsed, False)
+
+    def _handle_error(self, exception_context):
+        # 执行失败的语句不会触发 after_cursor_execute，在此弹出开始时间，避免在池化连接上累积
+        connection = exception_context.connection
+        starts = connection.info.get('dsqds_query_start') if connection is not None else None
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        context = exception_context.execution_context
+        executemany = context.executemany if context is not None else False
+        for listener in self.listeners:
+            listener(connection, exception_context.statement, exception_context.parameters, executemany, elapsed, True)
+
+_query_events = {}  # id(引擎) -> QueryEvents
+_query_events_lock = threading.Lock()
+
+def on_query(engine, listener):
+    """在引擎上注册语句监听者 listener(connection, statement, parameters, executemany, elapsed, failed)
+
+    每个引擎只注册一组 SQLAlchemy 事件，同一监听者重复注册时忽略；执行失败的语句以 failed=True 回调。
+    """
+    from sqlalchemy import event
+
+    with _query_events_lock:
+        events = _query_events.get(id(engine))
+        if events is None:
+            events = _query_events[id(engine)] = QueryEvents()
+            event.listen(engine, 'before_cursor_execute', events._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', events._after_cursor_execute)
+            event.listen(engine, 'handle_error', events._handle_error)
+        if listener not in events.listeners:
+            events.listeners.append(listener)
+
+class Metrics:
+    """进程内指标注册表 + Flask 请求钩子 + SQLAlchemy 查询事件"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.server_timing = enabled
+        self._lock = threading.Lock()
+        self._current = ContextVar('dsqds_request_timer', default=None)
+        self.requests = Counter('dsqds_http_requests_total', '请求数', ('method', 'route', 'status'))
+        self.latency = Histogram(
+            'dsqds_http_request_duration_seconds', '请求处理耗时（至视图返回，不含流式响应体）',
+            LATENCY_BUCKETS, ('method', 'route')
+        )
+        self.response_size = Histogram(
+            'dsqds_http_response_size_bytes', '响应体字节数（流式响应不计）', SIZE_BUCKETS, ('method', 'route')
+        )
+        self.request_queries = Histogram(
+            'dsqds_http_request_queries', '每个请求执行的 SQL 语句数', QUERY_COUNT_BUCKETS, ('method', 'route')
+        )
+        self.request_sql = Histogram(
+            'dsqds_http_request_sql_seconds', '每个请求的 SQL 总耗时', LATENCY_BUCKETS, ('method', 'route')
+        )
+        self.queries = Counter('dsqds_db_queries_total', 'SQL 语句数（含后台任务）')
+        self.query_latency = Histogram('dsqds_db_query_duration_seconds', '单条 SQL 耗时（含后台任务）', STAGE_BUCKETS)
+        self.stages = Histogram('dsqds_stage_duration_seconds', '内部阶段耗时', STAGE_BUCKETS, ('stage',))
+        self.collectors = (
+            self.requests, self.latency, self.response_size, self.request_queries, self.request_sql,
+            self.queries, self.query_latency, self.stages
+        )
+
+    def init_app(self, app):
+        """注册请求钩子与数据库查询事件（create_app 中经 metrics.init_app 调用）"""
+        from app import db
+
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.server_timing = app.config.get('SERVER_TIMING', self.server_timing)
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            on_query(db.engine, self._record_query)
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个内部阶段的耗时；在请求中时同时计入本请求的 Server-Timing"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages.observe(elapsed, (name,))
+            timer = self._current.get()
+            if timer is not None:
+                timer.stages[name] = timer.stages.get(name, 0.0) + elapsed
+
+    def render(self, extra=()):
+        """Prometheus 文本格式；extra 为附加的 (指标名, counter|gauge, 说明, 数值)"""
+        with self._lock:
+            lines = [line for collector in self.collectors for line in collector.render()]
+        for name, kind, documentation, value in extra:
+            lines.extend([f'# HELP {name} {documentation}', f'# TYPE {name} {kind}', f'{name} {_number(value)}'])
+        return '\n'.join(lines) + '\n'
+
+    def _record_query(self, connection, statement, parameters, executemany, elapsed, failed):
+        with self._lock:
+            self.queries.inc()
+            self.query_latency.observe(elapsed)
+        timer = self._current.get()
+        if timer is not None:
+            timer.queries += 1
+            timer.sql_seconds += elapsed
+
+    def _before_request(self):
+        self._current.set(RequestTimer())
+
+    def _after_request(self, response):
+        from flask import request
+
+        timer = self._current.get()
+        if timer is None:
+            return response
+        elapsed = time.perf_counter() - timer.started
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+        labels = (request.method, route)
+        size = None if response.is_streamed else response.calculate_content_length()
+        with self._lock:
+            self.requests.inc((*labels, str(response.status_code)))
+            self.latency.observe(elapsed, labels)
+            self.request_queries.observe(timer.queries, labels)
+            self.request_sql.observe(timer.sql_seconds, labels)
+            if size is not None:
+                self.response_size.observe(size, labels)
+
+        if self.server_timing:
+            entries = [
+                f'app;dur={elapsed * 1000:.2f}',
+                f'db;dur={timer.sql_seconds * 1000:.2f};desc="{timer.queries} queries"'
+            ]
+            entries.extend(f'{name};dur={seconds * 1000:.2f}' for name, seconds in timer.stages.items())
+            response.headers['Server-Timing'] = ', '.join(entries)
+        return response
+
+    def _teardown_request(self, exception=None):
+        self._current.set(None)
+
+metrics = AppLocal('metrics', Metrics, fallback=Metrics(enabled=False))
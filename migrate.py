@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS数据库迁移脚本
+用法: python migrate.py [--status]
+"""
+
+import sys
+
+from app import create_app, db
+from migrations import MIGRATIONS, current_version, upgrade_database
+
+def main():
+    """执行待执行的迁移，--status 仅显示迁移状态"""
+    print("🛠️  DSQDS数据库迁移")
+    print("=" * 50)
+    
+    app = create_app()
+    with app.app_context():
+        if '--status' in sys.argv[1:]:
+            db.create_all()
+            with db.engine.connect() as connection:
+                version = current_version(connection)
+            for number, description, _ in MIGRATIONS:
+                mark = '✓' if number <= version else '·'
+                print(f"  {mark} {number:03d} {description}")
+            print(f"\n当前版本: {version}")
+            return
+        
+        applied = upgrade_database()
+        if applied:
+            for number in applied:
+                print(f"  ✓ 已执行迁移 {number:03d}")
+        else:
+            print("✅ 数据库已是最新版本")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS数据库迁移
+按版本号顺序对已有数据库就地执行结构变更，已执行的版本记录在 schema_version 表中。
+新增迁移时在 MIGRATIONS 末尾追加，版本号递增，语句需可重复执行。
+"""
+
+from datetime import datetime
+
+from app import db
+
+def add_column(table, column, definition):
+    """新增列的迁移步骤；列已存在（新库由 create_all 建出）时跳过"""
+    def apply(connection):
+        columns = {item['name'] for item in db.inspect(connection).get_columns(table)}
+        if column not in columns:
+            connection.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+    return apply
+
+def _advance_counter(connection, name, query):
+    """将版本计数器推进到不小于 query 的结果"""
+    target = connection.execute(db.text(query)).scalar() or 0
+    current = connection.execute(
+        db.text('SELECT version FROM version_counter WHERE name = :name'), {'name': name}
+    ).scalar()
+    if current is None:
+        connection.execute(
+            db.text('INSERT INTO version_counter (name, version) VALUES (:name, :version)'),
+            {'name': name, 'version': target}
+        )
+    elif current < target:
+        connection.execute(
+            db.text('UPDATE version_counter SET version = :version WHERE name = :name'),
+            {'name': name, 'version': target}
+        )
+
+# (版本号, 说明, 迁移步骤列表)：步骤为 SQL 语句或接收连接的函数
+MIGRATIONS = [
+    (1, '热点查询二级索引', [
+        'CREATE INDEX IF NOT EXISTS ix_data_object_security_level ON data_object (security_level)',
+        'CREATE INDEX IF NOT EXISTS ix_data_object_lifecycle_stage ON data_object (lifecycle_stage)',
+        'CREATE INDEX IF NOT EXISTS ix_threat_database_stage ON threat_database (stage)',
+        'CREATE INDEX IF NOT EXISTS ix_security_rule_active_priority ON security_rule (is_active, priority)',
+        'CREATE INDEX IF NOT EXISTS ix_security_event_event_time ON security_event (event_time)',
+        'CREATE INDEX IF NOT EXISTS ix_security_event_data_object_id ON security_event (data_object_id)',
+    ]),
+    (2, '数据对象更新时间索引（实时推送增量查询）', [
+        'CREATE INDEX IF NOT EXISTS ix_data_object_updated_at ON data_object (updated_at)',
+    ]),
+    (3, '数据对象行版本（增量同步）', [
+        add_column('data_object', 'row_version', 'INTEGER NOT NULL DEFAULT 0'),
+        'CREATE INDEX IF NOT EXISTS ix_data_object_row_version ON data_object (row_version)',
+    ]),
+    (4, '安全事件行版本（增量同步）', [
+        add_column('security_event', 'row_version', 'INTEGER NOT NULL DEFAULT 0'),
+        'CREATE INDEX IF NOT EXISTS ix_security_event_row_version ON security_event (row_version)',
+        # 此前事件按主键同步：已有事件的行版本取主键，计数器推进到最大主键之后，客户端保存的游标仍然有效
+        'UPDATE security_event SET row_version = id WHERE row_version = 0',
+        lambda connection: _advance_counter(connection, 'events', 'SELECT max(id) FROM security_event'),
+    ]),
+    (5, '数据对象基础分值（属性加权分值）', [
+        add_column('data_object', 'base_score', 'FLOAT'),
+        # 已有行暂以当前安全分值填充，下次重新评分或动态分级时按属性重新计算
+        'UPDATE data_object SET base_score = security_score WHERE base_score IS NULL',
+    ]),
+]
+
+schema_version = db.Table(
+    'schema_version', db.metadata,
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('description', db.String(200)),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow)
+)
+
+def current_version(connection):
+    """已执行的最高迁移版本，未执行过时为0"""
+    return connection.execute(db.select(db.func.max(schema_version.c.version))).scalar() or 0
+
+def pending_migrations(connection):
+    version = current_version(connection)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+def upgrade_database():
+    """创建缺失的表并执行全部待执行迁移，返回本次执行的版本号列表
+
+    需在应用上下文中调用。每个版本在单独事务中执行。
+    """
+    db.create_all()
+    with db.engine.connect() as connection:
+        pending = pending_migrations(connection)
+    
+    applied = []
+    for version, description, statements in pending:
+        with db.engine.begin() as connection:
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(db.text(statement))
+            connection.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+    return applied
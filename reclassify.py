@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS全量动态分级脚本
+按威胁清单各阶段风险重新分级全部数据对象，基础分值、分值与等级一起写回（仅写回有变化的行）。
+建议通过 cron 每隔几分钟执行: python reclassify.py
+"""
+
+from app import create_app
+from jobs import BackgroundJob, reclassify_corpus
+from migrations import upgrade_database
+
+def main():
+    print("🔄 DSQDS全量动态分级")
+    print("=" * 50)
+
+    app = create_app()
+    with app.app_context():
+        upgrade_database()
+        job = BackgroundJob('reclassify')
+        reclassify_corpus(job)
+
+    for stage, risk in sorted(job.params['stage_risks'].items()):
+        print(f"  {stage}: 平均威胁风险 {risk:.2f}")
+    print(f"✅ 已处理 {job.processed} 个对象，{job.changed} 个对象分值或等级更新")
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,12 @@
 """
 DSQDS系统启动脚本
 全生命周期自然资源多维安全量化与动态分级体系
+用法: python run.py [--host 0.0.0.0] [--port 3000] [--workers N] [--worker-class gthread] [--threads 8] [--pidfile PATH]
+不指定 --workers 时使用 Flask 开发服务器；指定时以 Gunicorn 多进程模式运行（见 server.py）
 """
 
+import argparse
+import importlib.util
 import os
 import sys
 import subprocess
@@ -13,19 +17,15 @@ import time
 from threading import Timer
 
 def check_dependencies():
-    """检查依赖是否安装"""
-    try:
-        import flask
-        import flask_sqlalchemy
-        import flask_cors
-        import numpy
-        import requests
-        print("✓ 所有依赖已安装")
-        return True
-    except ImportError as e:
-        print(f"✗ 缺少依赖: {e}")
+    """检查依赖是否安装（只查找模块，不导入）"""
+    missing = [name for name in ('flask', 'flask_sqlalchemy', 'flask_cors', 'numpy', 'requests')
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"✗ 缺少依赖: {', '.join(missing)}")
         print("请运行: pip install -r requirements.txt")
         return False
+    print("✓ 所有依赖已安装")
+    return True
 
 def open_browser():
     """延迟打开浏览器"""
@@ -36,8 +36,49 @@ def open_browser():
     except:
         print("🌐 请手动访问: http://localhost:3000")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='DSQDS系统启动')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=3000, help='监听端口')
+    parser.add_argument('--workers', type=int, help='工作进程数（生产模式），0 表示按CPU核数')
+    parser.add_argument('--worker-class', choices=('gthread', 'gevent'), default='gthread',
+                        help='工作模式，gevent 需另行安装 gevent，SSE 长连接不占用线程（建议配合 PostgreSQL 使用）')
+    parser.add_argument('--threads', type=int, default=8, help='每个工作进程的线程数（gthread 模式）')
+    parser.add_argument('--worker-connections', type=int, default=1000, help='每个工作进程的最大连接数（gevent 模式）')
+    parser.add_argument('--timeout', type=int, default=120, help='工作进程无响应超时（秒）')
+    parser.add_argument('--graceful-timeout', type=int, default=30, help='平滑停止/重载时等待在途请求的时间（秒）')
+    parser.add_argument('--pidfile', help='主进程PID文件，用于 kill -HUP 平滑重载')
+    parser.add_argument('--preload', action='store_true', help='主进程预先加载应用，工作进程 fork 后即可服务（HUP 不重新加载代码）')
+    parser.add_argument('--no-browser', action='store_true', help='不自动打开浏览器')
+    return parser.parse_args()
+
+def serve_production(args):
+    """多进程生产模式"""
+    from server import serve
+    workers = args.workers or os.cpu_count() or 1
+    if args.worker_class == 'gevent':
+        print(f"\n✓ 生产模式: {workers} 个工作进程（gevent 协程），每进程最多 {args.worker_connections} 个连接")
+    else:
+        print(f"\n✓ 生产模式: {workers} 个工作进程 × {args.threads} 线程（gthread）")
+    print(f"🔗 访问地址: http://{args.host}:{args.port}")
+    print(f"🔄 平滑重载: kill -HUP <主进程PID>    ⏹️  平滑停止: Ctrl+C 或 kill -TERM")
+    print("-" * 60)
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        threads=args.threads,
+        timeout=args.timeout,
+        graceful_timeout=args.graceful_timeout,
+        pidfile=args.pidfile,
+        preload=args.preload,
+        worker_class=args.worker_class,
+        worker_connections=args.worker_connections
+    )
+
 def main():
     """主函数"""
+    args = parse_args()
     print("=" * 60)
     print("🛡️  DSQDS - 全生命周期自然资源多维安全量化与动态分级体系")
     print("=" * 60)
@@ -55,15 +96,25 @@ def main():
     print("   - 闭环防护机制")
     print("   - 可视化分析界面")
     
+    if args.workers is not None:
+        try:
+            serve_production(args)
+        except Exception as e:
+            print(f"\n❌ 启动失败: {e}")
+            sys.exit(1)
+        return
+    
     # 设置自动打开浏览器
-    Timer(3.0, open_browser).start()
+    if not args.no_browser:
+        Timer(3.0, open_browser).start()
     
     try:
         # 启动Flask应用
-        from app import app, db
+        from app import create_app
+        app = create_app()
         print(f"\n✓ 系统启动成功!")
-        print(f"🔗 访问地址: http://localhost:3000")
-        print(f"📱 移动端访问: http://你的IP地址:3000")
+        print(f"🔗 访问地址: http://localhost:{args.port}")
+        print(f"📱 移动端访问: http://你的IP地址:{args.port}")
         print(f"⏹️  停止服务: Ctrl+C")
         print("-" * 60)
         
@@ -71,12 +122,14 @@ def main():
         os.makedirs(os.path.dirname(os.path.abspath('dsqds.db')), exist_ok=True)
         
         with app.app_context():
-            db.create_all()
+            # 创建缺失的表并执行数据库迁移
+            from migrations import upgrade_database
+            upgrade_database()
         
         app.run(
             debug=False,  # 生产环境关闭debug
-            host='0.0.0.0',
-            port=3000,
+            host=args.host,
+            port=args.port,
             threaded=True
         )
         
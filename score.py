@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DSQDS离线批量评分脚本
+流式读取 CSV / JSONL 文件，按块向量化评分并执行安全规则，结果边算边写入输出文件。
+用法: python score.py INPUT [-o OUTPUT] [--workers N] [--chunk-size 10000] [--weights weights.json] [--no-rules]
+"""
+
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from types import SimpleNamespace
+import argparse
+import csv
+import json
+import os
+import time
+
+from app import create_app, SecurityQuantificationEngine, SecurityRuleEngine
+from ingest import parse_data_object
+
+SCORE_CHUNK_SIZE = 10000
+OUTPUT_FIELDS = [
+    'index', 'name', 'data_type', 'lifecycle_stage', *SecurityQuantificationEngine.ATTRIBUTES,
+    'security_score', 'security_level', 'matched_rules', 'error'
+]
+
+# 工作进程内的权重与规则集，由 init_worker 设置
+_worker = {}
+
+def detect_format(path, explicit=None):
+    """根据 --format 或文件扩展名确定格式（csv / jsonl）"""
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def read_records(path, input_format):
+    """逐条读取输入文件，JSONL 中解析失败的行以 ValueError 实例占位"""
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        if input_format == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield ValueError(f'第 {line_number} 行不是合法JSON')
+
+def read_chunks(records, chunk_size):
+    """按固定大小切块，返回 (起始序号, 记录列表)"""
+    start = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def load_weight_file(path):
+    """读取权重文件：{"S": 0.2, ...} 或 GET /api/weights 返回的列表"""
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+    if isinstance(data, list):
+        data = {item['indicator_name']: item['weight'] for item in data}
+    return SecurityQuantificationEngine.weight_vector(data)
+
+def init_worker(weights, rule_definitions):
+    """在工作进程中保存权重并编译规则（编译后的谓词闭包无法跨进程传递）"""
+    _worker['weights'] = weights
+    _worker['rule_set'] = SecurityRuleEngine.build_rule_set(rule_definitions) if rule_definitions else None
+
+def score_chunk(start, items):
+    """评分一块记录，返回与输入一一对应的结果列表"""
+    results = [None] * len(items)
+    valid = []
+    for offset, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            valid.append((offset, item, parse_data_object(item)))
+        except ValueError as e:
+            results[offset] = {'index': start + offset, 'error': str(e)}
+    if not valid:
+        return results
+
+    rule_set = _worker['rule_set']
+    rows = [values for _, _, values in valid]
+    scores, levels = SecurityQuantificationEngine.assess_batch(rows, _worker['weights'])
+    for (offset, item, values), score, level in zip(valid, scores, levels):
+        values['security_score'] = float(score)
+        values['security_level'] = str(level)
+        matched = rule_set.match(SimpleNamespace(**values)) if rule_set is not None else []
+        results[offset] = {
+            **item,
+            **values,
+            'index': start + offset,  # 放在输入字段之后，输入中的 index 字段不会覆盖行号
+            'matched_rules': [rule.rule_id for rule in matched]
+        }
+    return results
+
+class ResultWriter:
+    """按输出格式逐块写入结果"""
+
+    def __init__(self, handle, output_format):
+        self.handle = handle
+        self.output_format = output_format
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.DictWriter(handle, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            self.csv_writer.writeheader()
+
+    def write(self, results):
+        if self.csv_writer is not None:
+            self.csv_writer.writerows(
+                dict(result, matched_rules=';'.join(result['matched_rules'])) if 'matched_rules' in result else result
+                for result in results
+            )
+        else:
+            self.handle.writelines(json.dumps(result, ensure_ascii=False) + '\n' for result in results)
+
+def main():
+    parser = argparse.ArgumentParser(description='DSQDS离线批量评分')
+    parser.add_argument('input', help='输入文件（.csv 或 .jsonl）')
+    parser.add_argument('-o', '--output', help='输出文件，默认 <输入>.scored.jsonl')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='输入格式，默认按扩展名判断')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='输出格式，默认按扩展名判断')
+    parser.add_argument('--chunk-size', type=int, default=SCORE_CHUNK_SIZE, help='每块记录数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='工作进程数，1 表示在当前进程计算')
+    parser.add_argument('--weights', help='权重文件（JSON），默认读取数据库 weight_config 表')
+    parser.add_argument('--no-rules', action='store_true', help='不执行安全规则')
+    args = parser.parse_args()
+
+    input_format = detect_format(args.input, args.format)
+    output = args.output or os.path.splitext(args.input)[0] + '.scored.jsonl'
+    output_format = detect_format(output, args.output_format)
+    workers = max(args.workers, 1)
+
+    print("📈 DSQDS离线批量评分")
+    print("=" * 50)
+
+    # 权重与规则只在主进程读取一次，以普通数据传给各工作进程
+    app = create_app()
+    if args.weights:
+        weights = load_weight_file(args.weights)
+    else:
+        with app.app_context():
+            weights = SecurityQuantificationEngine.load_weights()
+    rule_definitions = []
+    if not args.no_rules:
+        with app.app_context():
+            rule_definitions = SecurityRuleEngine.load_rule_definitions()
+    weight_text = ', '.join(f'{name}={weight:.2f}' for name, weight in zip(SecurityQuantificationEngine.INDICATORS, weights))
+    print(f"权重: {weight_text}；规则: {len(rule_definitions)} 条；工作进程: {workers}")
+
+    total = errors = 0
+    levels = Counter()
+    started = time.perf_counter()
+
+    def consume(results):
+        nonlocal total, errors
+        writer.write(results)
+        total += len(results)
+        for result in results:
+            if 'error' in result:
+                errors += 1
+            else:
+                levels[result['security_level']] += 1
+
+    chunks = read_chunks(read_records(args.input, input_format), args.chunk_size)
+    with open(output, 'w', encoding='utf-8', newline='') as handle:
+        writer = ResultWriter(handle, output_format)
+        if workers == 1:
+            init_worker(weights, rule_definitions)
+            for start, items in chunks:
+                consume(score_chunk(start, items))
+        else:
+            # 在途块数有上限，内存占用与文件大小无关；按提交顺序写出，保持输出与输入同序
+            with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(weights, rule_definitions)) as executor:
+                pending = deque()
+                for start, items in chunks:
+                    pending.append(executor.submit(score_chunk, start, items))
+                    if len(pending) >= workers * 2:
+                        consume(pending.popleft().result())
+                while pending:
+                    consume(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ 已评分 {total - errors} 条，失败 {errors} 条，用时 {elapsed:.2f}s（{total / elapsed if elapsed else 0:.0f} 条/秒）")
+    for level in SecurityQuantificationEngine.LEVEL_NAMES[::-1]:
+        print(f"  {level}: {levels.get(level, 0)}")
+    print(f"📄 结果文件: {output}")
+
+if __name__ == '__main__':
+    main()
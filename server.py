@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS生产服务
+以 Gunicorn（可选依赖，仅 Linux/macOS）prefork 模式运行：默认主进程只负责监督，不导入应用，
+各工作进程启动时加载应用并预热权重与规则缓存；preload 模式下主进程加载并预热后再 fork，
+工作进程无需重新导入即可服务。
+
+工作模式:
+    gthread  默认：每个连接（含 SSE 长连接）占用一个线程，推送连接数受线程数限制
+    gevent   需另行安装 gevent 并显式指定：每个连接是一个协程，SSE 长连接在条件变量上等待时
+             不占用线程，单进程可保持 worker_connections 个连接；SQLite 调用会阻塞整个工作进程，
+             仅建议在 PostgreSQL（配合 psycogreen）下使用
+
+信号:
+    HUP   平滑重载：按新代码（preload 模式下仅配置）启动新工作进程，旧进程处理完在途请求后退出
+    TERM  平滑停止：等待在途请求（最长 graceful_timeout 秒）并写完安全事件队列
+    TTIN / TTOU  工作进程数加一 / 减一
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # 可选依赖
+    BaseApplication = object
+
+def gunicorn_available():
+    return BaseApplication is not object
+
+def run_migrations():
+    """在子进程中执行数据库迁移，主进程不导入应用，HUP 重载时工作进程才能加载新代码"""
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrate.py')], check=True)
+
+def warm_up(app):
+    """建立数据库连接并加载权重与规则缓存"""
+    from app import db, weight_cache, rule_cache
+
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))  # 建立连接并应用 SQLite PRAGMA
+        weight_cache.snapshot()
+        rule_cache.snapshot()
+        db.session.remove()
+
+def post_worker_init(worker):
+    """工作进程加载应用后：预热缓存，并为普通请求保留一半连接（gevent）或线程（gthread）"""
+    from broadcaster import broadcaster
+
+    if worker.cfg.worker_class_str == 'gevent' and importlib.util.find_spec('psycogreen') is not None:
+        # PostgreSQL 驱动等待 I/O 时让出协程
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    warm_up(worker.wsgi)
+    stream = broadcaster.get(worker.wsgi)
+    if worker.cfg.worker_class_str == 'gevent':
+        stream.max_clients = min(stream.max_clients, max(worker.cfg.worker_connections // 2, 1))
+    else:
+        stream.max_clients = min(stream.max_clients, max(worker.cfg.threads // 2, 1))
+        worker.log.warning('gthread 模式下每个实时推送连接占用一个线程，每进程最多 %d 个连接；--worker-class gevent 可解除限制',
+                           stream.max_clients)
+    worker.log.info('工作进程 %s 已预热权重与规则缓存', worker.pid)
+
+def worker_exit(server, worker):
+    """工作进程退出前写完安全事件队列"""
+    if 'event_sink' in sys.modules:
+        from event_sink import close_all
+        close_all()
+
+class DSQDSServer(BaseApplication):
+    """以代码方式配置的 Gunicorn 应用"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set('post_worker_init', post_worker_init)
+        self.cfg.set('worker_exit', worker_exit)
+
+    def load(self):
+        from app import create_app, db
+        app = create_app()
+        if self.cfg.preload_app:
+            # 在主进程中完成导入与缓存加载，fork 前关闭连接，子进程各自重新连接
+            warm_up(app)
+            with app.app_context():
+                db.engine.dispose()
+        return app
+
+def serve(host='0.0.0.0', port=3000, workers=None, threads=8, timeout=120, graceful_timeout=30, pidfile=None, preload=False,
+          worker_class='gthread', worker_connections=1000):
+    """启动多进程服务（阻塞直到主进程退出）"""
+    if not gunicorn_available():
+        raise RuntimeError('多进程模式需要 gunicorn: pip install gunicorn')
+    if worker_class == 'gevent' and preload:
+        # gevent 工作进程启动时自行打补丁；preload 模式下应用（锁、线程与连接）在主进程中创建，
+        # 需在此之前打补丁，fork 后的工作进程才能沿用
+        from gevent import monkey
+        monkey.patch_all()
+    run_migrations()
+    DSQDSServer({
+        'bind': f'{host}:{port}',
+        'workers': workers or os.cpu_count() or 1,
+        'worker_class': worker_class,
+        'worker_connections': worker_connections,
+        'threads': threads,
+        'timeout': timeout,
+        'graceful_timeout': graceful_timeout,
+        'keepalive': 5,
+        'pidfile': pidfile,
+        'preload_app': preload,
+        'proc_name': 'dsqds',
+        'accesslog': None,
+    }).run()
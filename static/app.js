@@ -10,6 +10,7 @@ document.addEventListener('DOMContentLoaded', function() {
     loadWeights();
     loadRules();
     loadEvents();
+    connectStream();
 });
 
 // 显示指定的内容区域
@@ -53,22 +54,37 @@ function showSection(sectionId) {
     }
 }
 
+// GET 响应缓存：url -> {etag, data}，配合 If-None-Match 条件请求，数据未变化时服务端返回 304
+const responseCache = new Map();
+
 // API请求封装
 async function apiRequest(url, options = {}) {
     try {
+        const method = (options.method || 'GET').toUpperCase();
+        const cached = method === 'GET' ? responseCache.get(url) : undefined;
         const response = await fetch(url, {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...(cached ? { 'If-None-Match': cached.etag } : {}),
                 ...options.headers
-            },
-            ...options
+            }
         });
         
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
-        return await response.json();
+        const data = await response.json();
+        const etag = response.headers.get('ETag');
+        if (method === 'GET' && etag) {
+            responseCache.set(url, { etag, data });
+        }
+        return data;
     } catch (error) {
         console.error('API请求错误:', error);
         showAlert('请求失败: ' + error.message, 'danger');
@@ -251,13 +267,17 @@ function displayRecentEvents(events) {
         return;
     }
     
-    container.innerHTML = events.map(event => `
-        <div class="border-start border-primary ps-3 mb-3">
+    container.innerHTML = events.map(renderRecentEvent).join('');
+}
+
+function renderRecentEvent(event) {
+    return `
+        <div class="border-start border-primary ps-3 mb-3" data-event-id="${event.event_id}">
             <div class="small text-muted">${formatDateTime(event.event_time)}</div>
             <div class="fw-bold">${event.trigger_condition}</div>
             <div class="small">${event.result}</div>
         </div>
-    `).join('');
+    `;
 }
 
 // 数据对象管理相关函数
@@ -278,8 +298,12 @@ function displayDataObjects(objects) {
         return;
     }
     
-    tbody.innerHTML = objects.map(obj => `
-        <tr>
+    tbody.innerHTML = objects.map(renderDataObjectRow).join('');
+}
+
+function renderDataObjectRow(obj) {
+    return `
+        <tr data-object-id="${obj.id}">
             <td>${obj.name}</td>
             <td>${obj.data_type}</td>
             <td><span class="stage-badge stage-${obj.lifecycle_stage}">${obj.lifecycle_stage}</span></td>
@@ -302,7 +326,7 @@ function displayDataObjects(objects) {
                 </button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
 // 添加数据对象
@@ -543,15 +567,151 @@ function displayEvents(events) {
         return;
     }
     
-    tbody.innerHTML = events.map(event => `
-        <tr>
+    tbody.innerHTML = events.map(renderEventRow).join('');
+}
+
+function renderEventRow(event) {
+    return `
+        <tr data-event-id="${event.event_id}">
             <td><code>${event.event_id.substring(0, 8)}</code></td>
             <td>${event.trigger_condition}</td>
             <td><small>${event.executed_strategy}</small></td>
             <td><span class="badge bg-success">${event.result}</span></td>
             <td>${formatDateTime(event.event_time)}</td>
         </tr>
-    `).join('');
+    `;
+}
+
+// 实时推送：订阅 /api/stream，在页面上就地应用增量
+function connectStream() {
+    if (!window.EventSource) {
+        return;
+    }
+    
+    const source = new EventSource('/api/stream');
+    source.addEventListener('security_event', e => applySecurityEvents(JSON.parse(e.data)));
+    source.addEventListener('data_objects', e => applyDataObjectChanges(JSON.parse(e.data)));
+    source.addEventListener('aggregates', e => applyAggregateDelta(JSON.parse(e.data)));
+    source.addEventListener('refresh', () => {
+        // 变更过多或断线过久，整体重新加载
+        loadDashboard();
+        loadDataObjects();
+        loadEvents();
+    });
+}
+
+// 删除超出数量的子元素
+function trimChildren(container, maxCount) {
+    while (container.children.length > maxCount) {
+        container.lastElementChild.remove();
+    }
+}
+
+function applySecurityEvents(events) {
+    const newestFirst = events.slice().reverse();
+    
+    // 安全事件列表
+    const tbody = document.getElementById('events-table-body');
+    if (!tbody.querySelector('tr[data-event-id]')) {
+        tbody.innerHTML = '';
+    }
+    tbody.insertAdjacentHTML('afterbegin', newestFirst.map(renderEventRow).join(''));
+    trimChildren(tbody, 100);
+    
+    // 仪表板最近事件
+    const container = document.getElementById('recent-events-list');
+    if (!container.querySelector('[data-event-id]')) {
+        container.innerHTML = '';
+    }
+    container.insertAdjacentHTML('afterbegin', newestFirst.slice(0, 5).map(renderRecentEvent).join(''));
+    trimChildren(container, 5);
+    if (currentData.dashboard) {
+        currentData.dashboard.recent_events = newestFirst.concat(currentData.dashboard.recent_events).slice(0, 5);
+    }
+}
+
+function applyDataObjectChanges(objects) {
+    const tbody = document.getElementById('objects-table-body');
+    if (!tbody.querySelector('tr[data-object-id]')) {
+        tbody.innerHTML = '';
+    }
+    
+    objects.forEach(obj => {
+        const row = tbody.querySelector(`tr[data-object-id="${obj.id}"]`);
+        if (row) {
+            row.outerHTML = renderDataObjectRow(obj);
+        } else {
+            tbody.insertAdjacentHTML('beforeend', renderDataObjectRow(obj));
+        }
+    });
+}
+
+// 更新分布列表中的一项，计数为0时移除（与服务端汇总一致）
+function upsertDistribution(list, keyField, key, values) {
+    const index = list.findIndex(item => item[keyField] === key);
+    if (values.count <= 0) {
+        if (index >= 0) {
+            list.splice(index, 1);
+        }
+        return;
+    }
+    if (index >= 0) {
+        Object.assign(list[index], values);
+    } else {
+        list.push({ [keyField]: key, ...values });
+        list.sort((a, b) => (a[keyField] < b[keyField] ? -1 : 1));
+    }
+}
+
+function updateChartData(chart, labels, datasets) {
+    if (!chart) {
+        return;
+    }
+    chart.data.labels = labels;
+    datasets.forEach((data, index) => {
+        chart.data.datasets[index].data = data;
+    });
+    chart.update();
+}
+
+function applyAggregateDelta(delta) {
+    const dashboard = currentData.dashboard;
+    if (!dashboard) {
+        return;
+    }
+    
+    delta.forEach(item => {
+        if (item.category === 'security_level') {
+            upsertDistribution(dashboard.security_level_distribution, 'level', item.key, { count: item.count });
+        } else if (item.category === 'lifecycle_stage') {
+            upsertDistribution(dashboard.lifecycle_stage_distribution, 'stage', item.key, { count: item.count });
+        } else if (item.category === 'threat_stage') {
+            upsertDistribution(dashboard.threat_statistics, 'stage', item.key, {
+                count: item.count,
+                avg_risk: item.count ? item.value_sum / item.count : 0
+            });
+        } else if (item.category === 'active_rules') {
+            dashboard.total_rules = item.count;
+        }
+    });
+    
+    // 更新关键指标
+    dashboard.total_data_objects = dashboard.security_level_distribution.reduce((sum, item) => sum + item.count, 0);
+    dashboard.total_threats = dashboard.threat_statistics.reduce((sum, item) => sum + item.count, 0);
+    document.getElementById('total-objects').textContent = dashboard.total_data_objects;
+    document.getElementById('total-threats').textContent = dashboard.total_threats;
+    document.getElementById('total-rules').textContent = dashboard.total_rules;
+    
+    // 就地更新图表数据
+    const levels = dashboard.security_level_distribution;
+    const stages = dashboard.lifecycle_stage_distribution;
+    const threats = dashboard.threat_statistics;
+    updateChartData(charts.securityLevel, levels.map(item => item.level), [levels.map(item => item.count)]);
+    updateChartData(charts.lifecycle, stages.map(item => item.stage), [stages.map(item => item.count)]);
+    updateChartData(charts.threat, threats.map(item => item.stage), [
+        threats.map(item => item.count),
+        threats.map(item => item.avg_risk)
+    ]);
 }
 
 // 批量评估相关函数
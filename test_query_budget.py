@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+DSQDS查询预算测试
+在临时库上生成小规模合成数据，用 query_budget 检查全部 /api/* 接口、流式导出与后台任务均无 N+1 查询。
+
+运行: python -m pytest test_query_budget.py
+"""
+
+import pytest
+
+from check_queries import create_check_app, requests_to_check, wait_for_jobs
+from diagnostics import diagnostics, query_budget
+from jobs import BackgroundJob, rescore_corpus, reclassify_corpus
+
+THRESHOLD = 3
+OBJECTS = 500
+
+REQUESTS = requests_to_check(0)
+
+@pytest.fixture(scope='module')
+def checked_app(tmp_path_factory):
+    return create_check_app(OBJECTS, str(tmp_path_factory.mktemp('dsqds-budget')))
+
+@pytest.mark.parametrize('index', range(len(REQUESTS)), ids=[f'{method} {url}' for method, url, _ in REQUESTS])
+def test_endpoint_query_budget(checked_app, index):
+    app, max_id = checked_app
+    method, url, body = requests_to_check(max_id)[index]
+    with query_budget(app, THRESHOLD):
+        response = app.test_client().open(url, method=method, json=body)
+        response.get_data()
+        wait_for_jobs()
+    assert response.status_code < 400
+
+def test_streamed_export_is_counted(checked_app):
+    app, _ = checked_app
+    with query_budget(app, THRESHOLD) as recorder:
+        response = app.test_client().get('/api/export/events?format=csv')
+        response.get_data()
+    logs = {log.label: log.total for log in recorder.logs}
+    assert logs.get('GET /api/export/events', 0) > 0
+
+def test_background_job_thread_is_counted(checked_app):
+    app, _ = checked_app
+    with query_budget(app, THRESHOLD) as recorder:
+        app.test_client().post('/api/jobs/reclassify')
+        wait_for_jobs()
+    logs = {log.label: log.total for log in recorder.logs}
+    assert logs.get('<thread dsqds-reclassify>', 0) > 0
+
+@pytest.mark.parametrize('job_function', [rescore_corpus, reclassify_corpus], ids=lambda function: function.__name__)
+def test_job_query_budget(checked_app, job_function):
+    app, _ = checked_app
+    # 在当前线程同步执行（默认块大小下为单块），块内每条语句不随对象数重复
+    with app.app_context(), query_budget(app, THRESHOLD) as recorder:
+        job = BackgroundJob(job_function.__name__)
+        job_function(job)
+    assert job.processed == job.total
+    assert recorder.outside.total > 0
+
+def test_disabled_diagnostics_registers_no_hooks(checked_app):
+    app, _ = checked_app
+    instance = diagnostics.get(app)
+    assert not instance.enabled
+    hooks = [function for functions in app.teardown_request_funcs.values() for function in functions]
+    hooks += [function for functions in app.before_request_funcs.values() for function in functions]
+    assert all(getattr(function, '__self__', None) is not instance for function in hooks)